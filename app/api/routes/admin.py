@@ -0,0 +1,73 @@
+from fastapi import APIRouter, HTTPException, Depends, Header
+from typing import Optional
+import logging
+import secrets
+from app.config import settings
+from app.models.schemas import IndexRebuildRequest
+from app.services.index_manager import index_manager, IndexBuildInProgressError
+from app.services.health_monitor import health_monitor
+
+logger = logging.getLogger(__name__)
+
+async def verify_admin_key(x_admin_key: Optional[str] = Header(None)):
+    """Require the X-Admin-Key header when ADMIN_API_KEY is configured"""
+    if settings.admin_api_key and not secrets.compare_digest(x_admin_key or "", settings.admin_api_key):
+        raise HTTPException(status_code=401, detail="Invalid admin key")
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+    dependencies=[Depends(verify_admin_key)],
+    responses={404: {"description": "Not found"}}
+)
+
+@router.get("/index")
+async def get_index_status():
+    """
+    Report vector index definitions, sizes and build progress
+    """
+    try:
+        return await index_manager.get_status()
+    except Exception as e:
+        logger.error(f"Failed to get index status: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to get index status: {str(e)}"
+        )
+
+@router.post("/index/rebuild", status_code=202)
+async def rebuild_index(rebuild_request: IndexRebuildRequest):
+    """
+    Rebuild the vector index concurrently in the background
+    """
+    try:
+        index_manager.start_rebuild(
+            index_type=rebuild_request.index_type,
+            lists=rebuild_request.lists,
+            m=rebuild_request.m,
+            ef_construction=rebuild_request.ef_construction,
+            binary=rebuild_request.binary
+        )
+        return {
+            "message": "Vector index rebuild started",
+            "index_type": rebuild_request.index_type or settings.vector_index_type
+        }
+    except IndexBuildInProgressError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to start index rebuild: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to start index rebuild: {str(e)}"
+        )
+
+@router.get("/health")
+async def deep_health_check():
+    """
+    Run every health check now, including a real query encode
+    """
+    components = await health_monitor.deep_check()
+    return {
+        "status": "healthy" if health_monitor.is_healthy(components) else "unhealthy",
+        "checks": components
+    }
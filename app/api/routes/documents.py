@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException
 from typing import Dict, Any
 import logging
 import time
@@ -9,8 +9,11 @@ from app.models.schemas import (
     ProcessingStatus, 
     ErrorResponse
 )
-from app.models.database import db_manager
-from app.services.document_processor import document_processor
+from app.config import settings
+from app.models.async_database import async_db_manager, DOCUMENT_LIST_FIELDS
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.services.ingestion_worker import ingestion_worker_pool
+from app.services.job_queue import JobAlreadyRunningError, JOB_RUNNING
 from app.services.vector_store import vector_store
 
 logger = logging.getLogger(__name__)
@@ -20,45 +23,19 @@ router = APIRouter(
     responses={404: {"description": "Not found"}}
 )
 
-async def process_document_background(document_request: DocumentProcessRequest):
-    """Background task to process document"""
-    try:
-        logger.info(f"Starting background processing for document {document_request.document_id}")
-        
-        # Process the document
-        full_text, chunks_data = await document_processor.process_document(
-            file_url=str(document_request.file_url),
-            file_type=document_request.file_type,
-            document_id=document_request.document_id
-        )
-        
-        # Store chunks with embeddings
-        chunks_stored = await vector_store.store_document_chunks(chunks_data)
-        
-        # Update document status to completed
-        db_manager.update_document_status(document_request.document_id, "completed")
-        
-        logger.info(f"Successfully processed document {document_request.document_id} with {chunks_stored} chunks")
-        
-    except Exception as e:
-        logger.error(f"Background processing failed for document {document_request.document_id}: {e}")
-        # Update document status to failed
-        try:
-            db_manager.update_document_status(document_request.document_id, "failed")
-        except Exception as db_error:
-            logger.error(f"Failed to update document status: {db_error}")
-
 @router.post("/process", response_model=DocumentProcessResponse)
-async def process_document(
-    document_request: DocumentProcessRequest,
-    background_tasks: BackgroundTasks
-):
+async def process_document(document_request: DocumentProcessRequest):
     """
-    Process a document by downloading, extracting text, chunking, and storing embeddings
+    Queue a document for downloading, text extraction, chunking, and embedding storage
     """
     try:
+        # A running job would ignore the new request; reprocess once it has finished
+        job = await ingestion_worker_pool.job_queue.get_job_for_document(document_request.document_id)
+        if job is not None and job['status'] == JOB_RUNNING:
+            raise JobAlreadyRunningError(f"Document {document_request.document_id} is already being processed")
+
         # Insert document record
-        db_manager.insert_document(
+        await async_db_manager.insert_document(
             document_id=document_request.document_id,
             user_id=document_request.user_id,
             filename=document_request.filename,
@@ -67,18 +44,24 @@ async def process_document(
             metadata=document_request.metadata
         )
         
-        # Add background task for processing
-        background_tasks.add_task(process_document_background, document_request)
+        # Reprocessing hides the document's chunks until it completes
+        vector_store.invalidate_tenant(document_request.user_id)
+        
+        # Queue the processing job for the worker pool
+        job_id = await ingestion_worker_pool.enqueue(document_request)
         
         return DocumentProcessResponse(
             success=True,
             document_id=document_request.document_id,
+            job_id=job_id,
             processing_status=ProcessingStatus(
                 status="processing",
-                message="Document processing started in background"
+                message="Document queued for processing"
             )
         )
         
+    except JobAlreadyRunningError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.error(f"Failed to initiate document processing: {e}")
         raise HTTPException(
@@ -90,31 +73,31 @@ async def process_document(
 async def get_document_status(document_id: str, user_id: str):
     """Get the processing status of a document"""
     try:
-        with db_manager.get_connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute("""
-                    SELECT d.status, d.filename, d.file_type, d.created_at, d.updated_at,
-                           COUNT(dc.id) as chunk_count
-                    FROM documents d
-                    LEFT JOIN document_chunks dc ON d.id = dc.document_id
-                    WHERE d.id = %s AND d.user_id = %s
-                    GROUP BY d.id, d.status, d.filename, d.file_type, d.created_at, d.updated_at
-                """, (document_id, user_id))
-                
-                result = cur.fetchone()
-                
-                if not result:
-                    raise HTTPException(status_code=404, detail="Document not found")
-                
-                return {
-                    "document_id": document_id,
-                    "status": result['status'],
-                    "filename": result['filename'],
-                    "file_type": result['file_type'],
-                    "chunk_count": result['chunk_count'],
-                    "created_at": result['created_at'],
-                    "updated_at": result['updated_at']
-                }
+        result = await async_db_manager.get_document_status(document_id, user_id)
+        
+        if not result:
+            raise HTTPException(status_code=404, detail="Document not found")
+        
+        job = await ingestion_worker_pool.job_queue.get_job_for_document(document_id)
+        
+        return {
+            "document_id": document_id,
+            "status": result['status'],
+            "filename": result['filename'],
+            "file_type": result['file_type'],
+            "chunk_count": result['chunk_count'],
+            "character_count": result['content_chars'],
+            "ingestion": (result['metadata'] or {}).get('ingestion'),
+            "created_at": result['created_at'],
+            "updated_at": result['updated_at'],
+            "job": {
+                "job_id": job['id'],
+                "status": job['status'],
+                "attempts": job['attempts'],
+                "max_attempts": job['max_attempts'],
+                "last_error": job['last_error']
+            } if job else None
+        }
                 
     except HTTPException:
         raise
@@ -126,38 +109,58 @@ async def get_document_status(document_id: str, user_id: str):
         )
 
 @router.get("/list")
-async def list_user_documents(user_id: str, status: str = None):
-    """List all documents for a user"""
+async def list_user_documents(user_id: str, status: str = None, limit: int = None,
+                              cursor: str = None, fields: str = None):
+    """
+    List a user's documents, newest first, one page at a time.
+    
+    Pass the returned ``next_cursor`` as ``cursor`` for the next page;
+    ``fields`` is an optional comma-separated list of columns to return.
+    """
     try:
-        with db_manager.get_connection() as conn:
-            with conn.cursor() as cur:
-                base_query = """
-                    SELECT d.id, d.filename, d.file_type, d.status, d.created_at, d.updated_at,
-                           COUNT(dc.id) as chunk_count
-                    FROM documents d
-                    LEFT JOIN document_chunks dc ON d.id = dc.document_id
-                    WHERE d.user_id = %s
-                """
-                
-                params = [user_id]
-                
-                if status:
-                    base_query += " AND d.status = %s"
-                    params.append(status)
-                
-                base_query += """
-                    GROUP BY d.id, d.filename, d.file_type, d.status, d.created_at, d.updated_at
-                    ORDER BY d.created_at DESC
-                """
-                
-                cur.execute(base_query, params)
-                documents = cur.fetchall()
-                
-                return {
-                    "documents": [dict(doc) for doc in documents],
-                    "total_count": len(documents)
-                }
+        if limit is None:
+            limit = settings.documents_page_size
+        if not 1 <= limit <= settings.documents_max_page_size:
+            raise HTTPException(
+                status_code=400,
+                detail=f"limit must be between 1 and {settings.documents_max_page_size}"
+            )
+        
+        try:
+            after = decode_cursor(cursor) if cursor else None
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        requested_fields = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+        unknown = set(requested_fields or []) - set(DOCUMENT_LIST_FIELDS)
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown fields: {', '.join(sorted(unknown))} (available: {', '.join(DOCUMENT_LIST_FIELDS)})"
+            )
+        
+        # One extra row tells whether another page follows
+        documents = await async_db_manager.list_documents(
+            user_id, status, limit=limit + 1, after=after, fields=requested_fields
+        )
+        has_more = len(documents) > limit
+        documents = documents[:limit]
+        next_cursor = encode_cursor(documents[-1]['created_at'], documents[-1]['id']) if has_more else None
+        
+        if requested_fields:
+            documents = [{field: document[field] for field in requested_fields} for document in documents]
+        
+        total_count = await async_db_manager.count_documents(user_id, status)
+        
+        return {
+            "documents": documents,
+            "total_count": total_count,
+            "limit": limit,
+            "next_cursor": next_cursor
+        }
                 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to list documents: {e}")
         raise HTTPException(
@@ -169,24 +172,14 @@ async def list_user_documents(user_id: str, status: str = None):
 async def delete_document(document_id: str, user_id: str):
     """Delete a document and all its chunks"""
     try:
-        with db_manager.get_connection() as conn:
-            with conn.cursor() as cur:
-                # Check if document exists and belongs to user
-                cur.execute(
-                    "SELECT id FROM documents WHERE id = %s AND user_id = %s",
-                    (document_id, user_id)
-                )
-                
-                if not cur.fetchone():
-                    raise HTTPException(status_code=404, detail="Document not found")
-                
-                # Delete document (chunks will be deleted due to CASCADE)
-                cur.execute(
-                    "DELETE FROM documents WHERE id = %s AND user_id = %s",
-                    (document_id, user_id)
-                )
-                
-                return {"message": "Document deleted successfully"}
+        # Delete document (chunks will be deleted due to CASCADE)
+        deleted = await async_db_manager.delete_document(document_id, user_id)
+        vector_store.invalidate_tenant(user_id)
+        
+        if not deleted:
+            raise HTTPException(status_code=404, detail="Document not found")
+        
+        return {"message": "Document deleted successfully"}
                 
     except HTTPException:
         raise
@@ -1,8 +1,16 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Body
+from pydantic import ValidationError
+from typing import List, Optional, Union
 import logging
 import time
-from app.models.schemas import QueryRequest, QueryResponse, ErrorResponse
+from app.config import settings
+from app.models.schemas import (
+    QueryRequest, QueryResponse, ErrorResponse,
+    BatchSearchRequest, BatchSearchResponse, BatchQueryResult
+)
 from app.services.vector_store import vector_store
+from app.services.reranker import reranker
+from app.models.async_database import async_db_manager
 
 logger = logging.getLogger(__name__)
 router = APIRouter(
@@ -21,14 +29,46 @@ async def semantic_search(query_request: QueryRequest):
         
         logger.info(f"Processing search query for user {query_request.user_id}: '{query_request.query[:100]}...'")
         
-        # Perform similarity search
-        relevant_chunks = await vector_store.similarity_search(
-            query=query_request.query,
-            user_id=query_request.user_id,
-            document_ids=query_request.document_ids,
-            top_k=query_request.top_k,
-            similarity_threshold=query_request.similarity_threshold
-        )
+        mode = query_request.mode or settings.search_default_mode
+        timings = None
+        rerank_info = None
+        
+        # Over-fetch when reranking; the reranker keeps the best top_k
+        fetch_k = query_request.top_k
+        if query_request.rerank:
+            fetch_k = max(query_request.rerank_candidates or settings.reranker_candidates, query_request.top_k)
+        
+        if mode == "hybrid":
+            relevant_chunks, timings = await vector_store.hybrid_search(
+                query=query_request.query,
+                user_id=query_request.user_id,
+                document_ids=query_request.document_ids,
+                top_k=fetch_k,
+                similarity_threshold=query_request.similarity_threshold,
+                vector_weight=query_request.vector_weight,
+                lexical_weight=query_request.lexical_weight,
+                probes=query_request.probes,
+                ef_search=query_request.ef_search
+            )
+        else:
+            # Perform similarity search
+            relevant_chunks = await vector_store.similarity_search(
+                query=query_request.query,
+                user_id=query_request.user_id,
+                document_ids=query_request.document_ids,
+                top_k=fetch_k,
+                similarity_threshold=query_request.similarity_threshold,
+                probes=query_request.probes,
+                ef_search=query_request.ef_search
+            )
+        
+        if query_request.rerank:
+            relevant_chunks, rerank_info = await reranker.rerank(
+                query_request.query,
+                relevant_chunks,
+                top_k=query_request.top_k,
+                budget_ms=query_request.rerank_budget_ms
+            )
         
         search_time = time.time() - start_time
         
@@ -39,7 +79,10 @@ async def semantic_search(query_request: QueryRequest):
             query=query_request.query,
             relevant_chunks=relevant_chunks,
             total_chunks_found=len(relevant_chunks),
-            search_time=search_time
+            search_time=search_time,
+            mode=mode,
+            timings=timings,
+            rerank=rerank_info
         )
         
     except Exception as e:
@@ -55,28 +98,17 @@ async def find_similar_chunks(chunk_id: str, user_id: str, top_k: int = 5):
     Find chunks similar to a specific chunk
     """
     try:
-        from app.models.database import db_manager
-        
         # Get the chunk content and embedding
-        with db_manager.get_connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute("""
-                    SELECT dc.content, dc.embedding, d.user_id
-                    FROM document_chunks dc
-                    JOIN documents d ON dc.document_id = d.id
-                    WHERE dc.id = %s AND d.user_id = %s
-                """, (chunk_id, user_id))
-                
-                result = cur.fetchone()
-                
-                if not result:
-                    raise HTTPException(status_code=404, detail="Chunk not found")
-                
-                chunk_content = result['content']
-                chunk_embedding = result['embedding']
+        result = await async_db_manager.get_chunk(chunk_id, user_id)
+        
+        if not result:
+            raise HTTPException(status_code=404, detail="Chunk not found")
+        
+        chunk_content = result['content']
+        chunk_embedding = result['embedding']
         
         # Perform similarity search using the chunk's embedding
-        search_results = db_manager.semantic_search(
+        search_results = await async_db_manager.semantic_search(
             query_embedding=chunk_embedding,
             user_id=user_id,
             top_k=top_k + 1,  # +1 to account for the original chunk
@@ -116,37 +148,60 @@ async def find_similar_chunks(chunk_id: str, user_id: str, top_k: int = 5):
             detail=f"Similar chunks search failed: {str(e)}"
         )
 
-@router.post("/batch-search")
-async def batch_search(queries: list[str], user_id: str, top_k: int = 3):
+@router.post("/batch-search", response_model=BatchSearchResponse)
+async def batch_search(batch_request: Union[BatchSearchRequest, List[str]] = Body(...),
+                       user_id: Optional[str] = None, top_k: Optional[int] = None):
     """
-    Perform multiple searches in batch
+    Perform multiple searches in batch (one embedding pass, one database round trip).
+    Also accepts the older shape: a JSON array of queries with user_id and top_k
+    as query parameters.
     """
-    try:
-        if len(queries) > 10:
-            raise HTTPException(status_code=400, detail="Maximum 10 queries allowed in batch")
-        
-        results = []
-        for query in queries:
-            if not query.strip():
-                continue
-                
-            relevant_chunks = await vector_store.similarity_search(
-                query=query,
+    if isinstance(batch_request, list):
+        if user_id is None:
+            raise HTTPException(status_code=422, detail="user_id query parameter is required with a list body")
+        try:
+            batch_request = BatchSearchRequest(
+                queries=batch_request,
                 user_id=user_id,
-                top_k=top_k,
-                similarity_threshold=0.3
+                **({"top_k": top_k} if top_k is not None else {})
+            )
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+
+    try:
+        if len(batch_request.queries) > settings.batch_search_max_queries:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Maximum {settings.batch_search_max_queries} queries allowed in batch"
             )
-            
-            results.append({
-                "query": query,
-                "relevant_chunks": relevant_chunks,
-                "chunks_found": len(relevant_chunks)
-            })
         
-        return {
-            "batch_results": results,
-            "total_queries": len(results)
-        }
+        start_time = time.time()
+        queries = [item for item in batch_request.queries if item.query]
+        
+        batch_chunks = await vector_store.batch_similarity_search(
+            queries=[item.query for item in queries],
+            user_id=batch_request.user_id,
+            top_ks=[item.top_k or batch_request.top_k for item in queries],
+            similarity_thresholds=[
+                batch_request.similarity_threshold if item.similarity_threshold is None
+                else item.similarity_threshold
+                for item in queries
+            ],
+            document_ids=batch_request.document_ids,
+            probes=batch_request.probes,
+            ef_search=batch_request.ef_search
+        ) if queries else []
+        
+        results = [
+            BatchQueryResult(query=item.query, relevant_chunks=chunks, chunks_found=len(chunks))
+            for item, chunks in zip(queries, batch_chunks)
+        ]
+        
+        return BatchSearchResponse(
+            batch_results=results,
+            total_queries=len(results),
+            search_time=time.time() - start_time
+        )
         
     except HTTPException:
         raise
@@ -163,34 +218,19 @@ async def get_search_statistics(user_id: str):
     Get search and document statistics for a user
     """
     try:
-        from app.models.database import db_manager
-        
-        with db_manager.get_connection() as conn:
-            with conn.cursor() as cur:
-                # Get document and chunk counts
-                cur.execute("""
-                    SELECT 
-                        COUNT(DISTINCT d.id) as total_documents,
-                        COUNT(DISTINCT CASE WHEN d.status = 'completed' THEN d.id END) as completed_documents,
-                        COUNT(dc.id) as total_chunks,
-                        AVG(CASE WHEN d.status = 'completed' THEN 
-                            (SELECT COUNT(*) FROM document_chunks WHERE document_id = d.id) 
-                        END) as avg_chunks_per_document
-                    FROM documents d
-                    LEFT JOIN document_chunks dc ON d.id = dc.document_id
-                    WHERE d.user_id = %s
-                """, (user_id,))
-                
-                stats = cur.fetchone()
-                
-                return {
-                    "user_id": user_id,
-                    "total_documents": stats['total_documents'] or 0,
-                    "completed_documents": stats['completed_documents'] or 0,
-                    "total_chunks": stats['total_chunks'] or 0,
-                    "avg_chunks_per_document": float(stats['avg_chunks_per_document'] or 0),
-                    "embedding_model": vector_store.embedding_service.model_name
-                }
+        # Get document and chunk counts
+        stats = await async_db_manager.get_user_statistics(user_id)
+        
+        return {
+            "user_id": user_id,
+            "total_documents": stats.get('total_documents') or 0,
+            "completed_documents": stats.get('completed_documents') or 0,
+            "total_chunks": stats.get('total_chunks') or 0,
+            "avg_chunks_per_document": float(stats.get('avg_chunks_per_document') or 0),
+            "total_characters": stats.get('content_chars') or 0,
+            "total_bytes": stats.get('content_bytes') or 0,
+            "embedding_model": vector_store.embedding_service.model_name
+        }
                 
     except Exception as e:
         logger.error(f"Failed to get search statistics: {e}")
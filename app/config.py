@@ -11,20 +11,139 @@ class Settings(BaseSettings):
     # Database Configuration
     database_url: str
     
+    # Database Connection Pool Configuration
+    db_pool_min_size: int = 1
+    db_pool_max_size: int = 10
+    db_pool_timeout: float = 30.0  # Seconds to wait for a free connection
+    db_pool_max_lifetime: float = 1800.0  # Recycle connections older than this (seconds)
+    db_pool_health_check: bool = True
+    db_pool_health_check_idle_seconds: float = 30.0  # Ping connections idle longer than this
+    
+    # Async Database Pool Configuration (used by the API routes)
+    db_async_pool_min_size: int = 2
+    db_async_pool_max_size: int = 20
+    db_async_pool_max_idle_seconds: float = 300.0  # Close connections idle longer than this (asyncpg has no max age)
+    db_command_timeout: float = 60.0
+    db_statement_cache_size: int = 100  # Set to 0 behind PgBouncer in transaction mode
+    db_bulk_insert_method: str = "copy"  # "copy" (binary COPY + merge) or "executemany"
+    chunk_partitions: int = 0  # Hash-partition document_chunks by user_id (0 = unpartitioned)
+    
+    # Vector Index Configuration
+    vector_index_type: str = "hnsw"  # "hnsw" or "ivfflat"
+    hnsw_m: int = 16
+    hnsw_ef_construction: int = 64
+    ivfflat_lists: int = 0  # 0 = derive from the row count at build time
+    embedding_storage: str = "vector"  # "vector" (float32) or "halfvec" (float16); changing it rewrites the table
+    vector_quantization: str = "none"  # "binary" adds a Hamming index used as a re-scored first search pass (approximate: see BINARY_SEARCH_SQL)
+    vector_index_build_memory: str = "512MB"  # maintenance_work_mem for index builds
+    search_ivfflat_probes: Optional[int] = None  # Default per-query probes (None = server default)
+    search_hnsw_ef_search: Optional[int] = None  # Default per-query ef_search (None = server default)
+    batch_search_max_queries: int = 100  # Queries accepted by one /query/batch-search request
+    search_candidate_multiplier: int = 20  # Nearest neighbours fetched per requested result before filtering
+    search_widen_factor: int = 4  # Candidate growth per pass when filters leave too few results
+    search_max_candidates: int = 1000  # Beyond this, fall back to an exact scan of the tenant's chunks
+    
+    # Hybrid (lexical + vector) Search Configuration
+    search_default_mode: str = "vector"  # "vector" or "hybrid" when a request does not choose
+    text_search_config: str = "english"  # Postgres text search configuration for the full-text index
+    hybrid_candidates: int = 50  # Candidates taken from each leg before fusion
+    hybrid_rrf_k: int = 60  # Reciprocal-rank fusion constant (higher flattens rank differences)
+    hybrid_vector_weight: float = 1.0
+    hybrid_lexical_weight: float = 1.0
+    
+    # Reranking Configuration
+    reranker_model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    reranker_candidates: int = 50  # Candidates retrieved for reranking when a request does not say
+    reranker_budget_ms: float = 300.0  # Past this, results are returned in vector order
+    reranker_batch_size: int = 16
+    reranker_max_length: int = 512
+    reranker_cache_max_entries: int = 50000  # (query, chunk) scores kept in memory
+    reranker_preload: bool = False  # Load the cross-encoder at startup instead of on first use
+    
+    # Tenant Vector Cache (exact in-memory search for small tenants)
+    tenant_cache_enabled: bool = False
+    tenant_cache_max_mb: float = 256  # Total memory for cached tenant matrices
+    tenant_cache_max_chunks: int = 20000  # Tenants with more searchable chunks stay in Postgres
+    tenant_cache_ttl_seconds: float = 600  # Backstop only: other processes' changes arrive by NOTIFY
+    
     # Embedding Model Configuration
     embedding_model_name: str = "sentence-transformers/all-MiniLM-L6-v2"
     embedding_dimension: int = 384
+    embedding_backend: str = "torch"  # "torch", "onnx" or "onnx-int8" (export with scripts/export_onnx_model.py)
+    embedding_onnx_dir: str = "models/onnx"  # Output of the export script
+    embedding_onnx_threads: int = 0  # onnxruntime intra-op threads (0 = one per core)
+    embedding_mode: str = "local"  # "local" (model in each process) or "server" (shared embedding server)
+    embedding_server_socket: str = "/tmp/smartmate-embedding.sock"
+    embedding_server_timeout_seconds: float = 30.0  # Per request, including queueing on the server
+    embedding_server_connect_timeout_seconds: float = 30.0  # How long workers wait for the server to come up
+    
+    # Query Embedding Micro-batching Configuration
+    embedding_batching_enabled: bool = True
+    embedding_batch_window_ms: float = 5.0  # How long to hold a batch open for more queries
+    embedding_batch_max_size: int = 32
+    
+    # Embedding Executor Configuration
+    embedding_executor_kind: str = "thread"  # "thread" or "process"
+    embedding_query_workers: int = 2  # Workers reserved for interactive query embeddings
+    embedding_bulk_workers: int = 1  # Workers for document ingestion embeddings
+    embedding_bulk_batch_size: int = 64  # Chunks per ingestion encode call
+    
+    # Query Embedding Cache Configuration
+    embedding_cache_enabled: bool = True
+    embedding_cache_max_entries: int = 10000
+    embedding_cache_max_mb: float = 64.0
+    embedding_cache_ttl_seconds: float = 3600.0
+    embedding_cache_redis_url: Optional[str] = None  # Optional shared cache across workers
     
     # Text Processing Configuration
     chunk_size: int = 500
     chunk_overlap: int = 50
     max_file_size_mb: int = 50
+    download_spool_threshold_mb: int = 5  # Larger downloads are spooled to a temp file
+    download_chunk_size_kb: int = 64
+    download_temp_dir: Optional[str] = None  # Defaults to the system temp directory
+    
+    # PDF Extraction Configuration
+    pdf_extraction_workers: int = 0  # Worker processes (0 = CPU count, 1 = no parallelism)
+    pdf_pages_per_shard: int = 16
+    pdf_page_timeout_seconds: float = 10.0  # Pages taking longer are skipped
+    pdf_parallel_min_pages: int = 32  # Smaller PDFs are extracted in-process
+    
+    # Streaming Ingestion Configuration
+    ingestion_batch_size: int = 64  # Chunks per batch flowing between pipeline stages
+    ingestion_queue_size: int = 4  # Batches buffered between stages before backpressure
+    
+    # Ingestion Job Queue Configuration
+    job_queue_backend: str = "postgres"  # "postgres" or "sqlite"
+    job_queue_sqlite_path: str = "ingestion_jobs.db"
+    ingestion_workers_enabled: bool = True  # Run the worker pool inside the API process
+    ingestion_concurrency: int = 2  # Documents processed at once per worker pool
+    job_lease_seconds: float = 300.0  # A job is reclaimable once its lease lapses
+    job_heartbeat_seconds: float = 30.0
+    job_poll_interval_seconds: float = 1.0
+    job_max_attempts: int = 3
+    job_retry_base_seconds: float = 10.0  # Retry delay doubles per attempt
+    job_retry_max_seconds: float = 600.0
     
     # API Configuration
     api_title: str = "RAG Service API"
     api_version: str = "1.0.0"
     api_description: str = "Retrieval-Augmented Generation Service for Document Processing"
     
+    # Startup Configuration
+    lazy_startup: bool = False  # Open the port before the models load; gate traffic on /health/ready
+    
+    # Health Check Configuration
+    health_refresh_seconds: float = 10.0  # Probes answer from cached checks younger than this
+    health_check_timeout_seconds: float = 2.0  # Per component check
+    
+    # Document Listing Configuration
+    documents_page_size: int = 50  # Default page size of GET /documents/list
+    documents_max_page_size: int = 200
+    
+    # Admin API Configuration
+    admin_api_key: Optional[str] = None  # Required in the X-Admin-Key header when set
+    
     # CORS Configuration
     cors_origins: list = ["*"]
     
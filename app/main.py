@@ -1,3 +1,6 @@
+import time
+_import_started = time.perf_counter()
+
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, HTMLResponse, FileResponse
@@ -6,12 +9,21 @@ import logging
 import uvicorn
 from contextlib import asynccontextmanager
 import os
+from datetime import datetime, timezone
 from pathlib import Path
 
 from app.config import settings
 from app.models.database import db_manager
+from app.models.async_database import async_db_manager
 from app.services.vector_store import vector_store
-from app.api.routes import documents, query
+from app.services.pdf_extractor import pdf_extractor
+from app.services.job_queue import job_queue
+from app.services.ingestion_worker import ingestion_worker_pool
+from app.services.index_manager import index_manager
+from app.services.reranker import reranker
+from app.services.startup import startup_tracker
+from app.services.health_monitor import health_monitor
+from app.api.routes import documents, query, admin
 
 # Configure logging
 logging.basicConfig(
@@ -20,22 +32,47 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+startup_tracker.record("imports", time.perf_counter() - _import_started)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Handle startup and shutdown events"""
     # Startup
     logger.info("Starting RAG Service...")
     try:
-        # Initialize database tables
-        db_manager.initialize_tables()
+        # Apply pending migrations (a read-only version check when the schema is current)
+        with startup_tracker.phase("migrations"):
+            db_manager.initialize_tables()
         logger.info("Database initialized successfully")
         
-        # Warm up embedding model
-        logger.info("Warming up embedding model...")
-        test_embedding = vector_store.embedding_service.generate_embedding("test")
-        logger.info(f"Embedding model ready. Dimension: {len(test_embedding)}")
+        # Open the async connection pool used by the request handlers
+        with startup_tracker.phase("database_pool"):
+            await async_db_manager.connect()
+            await job_queue.initialize()
+            await vector_store.tenant_cache.start_listener()
+        
+        # Build the vector index in the background if it is missing
+        with startup_tracker.phase("index_check"):
+            await index_manager.ensure_index()
+        
+        # Warm up the embedding model, after the port opens with LAZY_STARTUP (see /health/ready)
+        if settings.lazy_startup:
+            startup_tracker.run_in_background("embedding_model", vector_store.embedding_service.warmup)
+            if settings.reranker_preload:
+                startup_tracker.run_in_background("reranker_model", reranker.warmup)
+        else:
+            with startup_tracker.phase("embedding_model"):
+                vector_store.embedding_service.warmup()
+            if settings.reranker_preload:
+                with startup_tracker.phase("reranker_model"):
+                    reranker.warmup()
+        
+        # Start ingestion workers (or run them separately with python -m app.services.ingestion_worker)
+        if settings.ingestion_workers_enabled:
+            with startup_tracker.phase("ingestion_workers"):
+                await ingestion_worker_pool.start()
         
-        logger.info("RAG Service startup completed successfully")
+        startup_tracker.complete()
     except Exception as e:
         logger.error(f"Failed to initialize RAG Service: {e}")
         raise
@@ -44,6 +81,18 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Shutting down RAG Service...")
+    await startup_tracker.stop()
+    await health_monitor.stop()
+    await vector_store.tenant_cache.stop()
+    await ingestion_worker_pool.stop()
+    await job_queue.close()
+    await index_manager.stop()
+    await vector_store.embedding_batcher.stop()
+    reranker.shutdown()
+    vector_store.embedding_executor.shutdown()
+    pdf_extractor.shutdown()
+    await async_db_manager.close()
+    db_manager.close()
 
 # Create FastAPI app
 app = FastAPI(
@@ -72,25 +121,49 @@ app.mount("/static", StaticFiles(directory=static_dir), name="static")
 # Include routers
 app.include_router(documents.router)
 app.include_router(query.router)
+app.include_router(admin.router)
 
 # Health check endpoint
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
+    """Health check endpoint (cached component checks, no model inference)"""
     try:
-        # Check vector store health
-        health_status = vector_store.health_check()
+        components = await health_monitor.get_components()
         
         return {
-            "status": "healthy" if health_status.get('database_healthy') and health_status.get('embedding_service_healthy') else "unhealthy",
-            "timestamp": "2024-01-01T00:00:00Z",  # You can use datetime.utcnow().isoformat()
+            "status": "healthy" if health_monitor.is_healthy(components) else "unhealthy",
+            "timestamp": datetime.now(timezone.utc).isoformat(),
             "version": settings.api_version,
-            "components": health_status
+            "components": {
+                "database_healthy": components["database"]["healthy"],
+                "embedding_service_healthy": components["embedding_model"]["healthy"],
+                "checks": components,
+                "startup": startup_tracker.get_stats(),
+                "health_monitor": health_monitor.get_stats(),
+                **vector_store.get_stats()
+            }
         }
     except Exception as e:
         logger.error(f"Health check failed: {e}")
         raise HTTPException(status_code=503, detail="Service unavailable")
 
+@app.get("/health/live")
+async def liveness_check():
+    """Liveness probe: the process is up and serving requests"""
+    return {"status": "alive", "uptime_seconds": startup_tracker.get_stats()["uptime_seconds"]}
+
+@app.get("/health/ready")
+async def readiness_check():
+    """Readiness probe: startup finished, the embedding model is loaded and the database answered"""
+    components = await health_monitor.get_components()
+    stats = startup_tracker.get_stats()
+    if startup_tracker.ready and not components["database"]["healthy"]:
+        stats["status"] = "unavailable"
+    return JSONResponse(
+        status_code=200 if stats["status"] == "ready" else 503,
+        content={**stats, "database": components["database"]}
+    )
+
 @app.get("/", response_class=HTMLResponse)
 async def root():
     """Serve the home page"""
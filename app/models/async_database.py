@@ -0,0 +1,791 @@
+import asyncpg
+import numpy as np
+from pgvector.asyncpg import register_vector
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import logging
+import json
+from datetime import datetime
+from app.config import settings
+from app.models.database import (
+    CHUNK_STAGING_TABLE_SQL, CHUNK_STAGING_MERGE_SQL, CHUNK_UPSERT_SQL,
+    EXACT_SCAN, HNSW_MAX_EF_SEARCH, initial_candidate_limit, next_search_step
+)
+
+logger = logging.getLogger(__name__)
+
+# Index-driven search: the tenant's nearest-neighbour candidates first (served
+# by the ANN index, pruned to the tenant's partition when partitioned), then
+# the similarity threshold; also reports how many candidates were scanned so
+# the caller can decide whether to widen. documents is only looked up by key
+# for the returned rows' filename and metadata.
+SEMANTIC_SEARCH_SQL = """
+WITH candidates AS MATERIALIZED (
+    SELECT dc.id, dc.document_id, dc.content, dc.metadata, dc.embedding <=> $1 AS distance
+    FROM document_chunks dc
+    WHERE dc.user_id = $2
+    AND dc.searchable
+    AND ($4::text[] IS NULL OR dc.document_id = ANY($4::text[]))
+    ORDER BY dc.embedding <=> $1
+    LIMIT $5
+),
+scanned AS (
+    SELECT COUNT(*) AS candidate_count, MAX(distance) AS max_distance FROM candidates
+)
+SELECT s.candidate_count, s.max_distance, r.*
+FROM scanned s
+LEFT JOIN LATERAL (
+    SELECT
+        c.id as chunk_id,
+        c.document_id,
+        c.content,
+        c.metadata as chunk_metadata,
+        d.filename,
+        d.metadata as document_metadata,
+        1 - c.distance as similarity_score
+    FROM candidates c
+    JOIN documents d ON c.document_id = d.id
+    WHERE c.distance <= 1 - $3
+    ORDER BY c.distance
+    LIMIT $6
+) r ON true
+"""
+
+# Binary-quantized first pass: the shortlist is ordered by Hamming distance
+# between sign bits (served by the bit_hamming_ops index), then re-scored
+# with the exact cosine distance of the stored embeddings. Hamming order only
+# approximates cosine order, so max_distance (the farthest shortlisted row) is
+# a heuristic here: once it is past the threshold the caller stops widening,
+# which can miss a matching row the Hamming order ranked beyond the shortlist.
+BINARY_SEARCH_SQL = """
+WITH candidates AS MATERIALIZED (
+    SELECT dc.id, dc.document_id, dc.content, dc.metadata, dc.embedding <=> $1::{storage} AS distance
+    FROM document_chunks dc
+    WHERE dc.user_id = $2
+    AND dc.searchable
+    AND ($4::text[] IS NULL OR dc.document_id = ANY($4::text[]))
+    ORDER BY binary_quantize(dc.embedding)::bit({dim}) <~> binary_quantize($1::{storage})
+    LIMIT $5
+),
+scanned AS (
+    SELECT COUNT(*) AS candidate_count, MAX(distance) AS max_distance FROM candidates
+)
+SELECT s.candidate_count, s.max_distance, r.*
+FROM scanned s
+LEFT JOIN LATERAL (
+    SELECT
+        c.id as chunk_id,
+        c.document_id,
+        c.content,
+        c.metadata as chunk_metadata,
+        d.filename,
+        d.metadata as document_metadata,
+        1 - c.distance as similarity_score
+    FROM candidates c
+    JOIN documents d ON c.document_id = d.id
+    WHERE c.distance <= 1 - $3
+    ORDER BY c.distance
+    LIMIT $6
+) r ON true
+""".format(storage=settings.embedding_storage, dim=settings.embedding_dimension)
+
+# Several queries in one statement: a candidate scan per query vector (LATERAL
+# over the unnested arrays), ranked within each query. The first row of every
+# query is kept even when it does not match so its scan stats come back.
+# Built for the float ordering and for the binary-quantized first pass (Hamming
+# shortlist, exact re-ranking, as in BINARY_SEARCH_SQL).
+_BATCH_SEARCH_TEMPLATE = """
+SELECT
+    c.query_index,
+    c.candidate_count,
+    c.max_distance,
+    c.rank <= c.top_k AND c.distance <= 1 - c.threshold AS matched,
+    c.id as chunk_id,
+    c.document_id,
+    c.content,
+    c.metadata as chunk_metadata,
+    d.filename,
+    d.metadata as document_metadata,
+    1 - c.distance as similarity_score
+FROM (
+    SELECT q.query_index, q.top_k, q.threshold, n.*,
+           COUNT(n.id) OVER per_query AS candidate_count,
+           MAX(n.distance) OVER per_query AS max_distance,
+           ROW_NUMBER() OVER (per_query ORDER BY n.distance) AS rank
+    FROM unnest($1::{storage}[], $3::integer[], $4::float8[])
+         WITH ORDINALITY AS q(embedding, top_k, threshold, query_index)
+    LEFT JOIN LATERAL (
+        SELECT dc.id, dc.document_id, dc.content, dc.metadata, dc.embedding <=> q.embedding AS distance
+        FROM document_chunks dc
+        WHERE dc.user_id = $2
+        AND dc.searchable
+        AND ($5::text[] IS NULL OR dc.document_id = ANY($5::text[]))
+        ORDER BY {order}
+        LIMIT $6
+    ) n ON true
+    WINDOW per_query AS (PARTITION BY q.query_index)
+) c
+LEFT JOIN documents d ON c.document_id = d.id
+WHERE c.rank = 1 OR (c.rank <= c.top_k AND c.distance <= 1 - c.threshold)
+ORDER BY c.query_index, c.rank
+"""
+
+BATCH_SEARCH_SQL = _BATCH_SEARCH_TEMPLATE.format(
+    storage=settings.embedding_storage,
+    order="dc.embedding <=> q.embedding"
+)
+
+BINARY_BATCH_SEARCH_SQL = _BATCH_SEARCH_TEMPLATE.format(
+    storage=settings.embedding_storage,
+    order=f"binary_quantize(dc.embedding)::bit({settings.embedding_dimension}) <~> binary_quantize(q.embedding)"
+)
+
+# Hybrid retrieval in one statement: the tenant's nearest neighbours (above the
+# similarity threshold) and full-text matches are each ranked, then combined by
+# weighted reciprocal-rank fusion, score = sum(weight / (k + rank)). The
+# nearest-neighbour scan fetches $12 candidates and reports its scan stats (one
+# row even when nothing matches) so the caller can widen it or fall back to an
+# exact scan, as for semantic search; the vector leg keeps the best $5. With
+# binary quantization the nearest neighbours come from the Hamming shortlist
+# and are ranked by their exact distance.
+_HYBRID_SEARCH_TEMPLATE = """
+WITH nearest AS MATERIALIZED (
+    SELECT dc.id, dc.embedding <=> $1 AS distance
+    FROM document_chunks dc
+    WHERE dc.user_id = $2
+    AND dc.searchable
+    AND ($4::text[] IS NULL OR dc.document_id = ANY($4::text[]))
+    ORDER BY {order}
+    LIMIT $12
+),
+vector_leg AS MATERIALIZED (
+    SELECT ranked.id, ranked.rank
+    FROM (
+        SELECT nearest.id, ROW_NUMBER() OVER (ORDER BY nearest.distance) AS rank
+        FROM nearest
+        WHERE nearest.distance <= 1 - $3
+    ) ranked
+    WHERE ranked.rank <= $5
+),
+lexical_leg AS MATERIALIZED (
+    SELECT dc.id, ROW_NUMBER() OVER (ORDER BY ts_rank_cd(dc.content_tsv, q.query) DESC) AS rank
+    FROM document_chunks dc, websearch_to_tsquery($11::regconfig, $6) AS q(query)
+    WHERE dc.user_id = $2
+    AND dc.searchable
+    AND ($4::text[] IS NULL OR dc.document_id = ANY($4::text[]))
+    AND dc.content_tsv @@ q.query
+    ORDER BY rank
+    LIMIT $5
+),
+fused AS (
+    SELECT COALESCE(v.id, l.id) AS id, v.rank AS vector_rank, l.rank AS lexical_rank,
+           COALESCE($7::float8 / ($9::integer + v.rank), 0)
+           + COALESCE($8::float8 / ($9::integer + l.rank), 0) AS fusion_score
+    FROM vector_leg v
+    FULL OUTER JOIN lexical_leg l ON l.id = v.id
+    ORDER BY fusion_score DESC
+    LIMIT $10
+),
+scanned AS (
+    SELECT
+        (SELECT COUNT(*) FROM nearest) AS candidate_count,
+        (SELECT MAX(distance) FROM nearest) AS max_distance,
+        (SELECT COUNT(*) FROM vector_leg) AS vector_candidates,
+        (SELECT COUNT(*) FROM lexical_leg) AS lexical_candidates
+)
+SELECT s.*, r.*
+FROM scanned s
+LEFT JOIN LATERAL (
+    SELECT
+        dc.id as chunk_id,
+        dc.document_id,
+        dc.content,
+        dc.metadata as chunk_metadata,
+        d.filename,
+        d.metadata as document_metadata,
+        1 - (dc.embedding <=> $1) as similarity_score,
+        f.fusion_score,
+        f.vector_rank,
+        f.lexical_rank
+    FROM fused f
+    JOIN document_chunks dc ON dc.id = f.id AND dc.user_id = $2
+    JOIN documents d ON dc.document_id = d.id
+) r ON true
+ORDER BY r.fusion_score DESC
+"""
+
+HYBRID_SEARCH_SQL = _HYBRID_SEARCH_TEMPLATE.format(order="dc.embedding <=> $1")
+
+BINARY_HYBRID_SEARCH_SQL = _HYBRID_SEARCH_TEMPLATE.format(
+    order=(
+        f"binary_quantize(dc.embedding)::bit({settings.embedding_dimension}) "
+        f"<~> binary_quantize($1::{settings.embedding_storage})"
+    )
+)
+
+# Exact vector leg: not the index's operator order, so the tenant's chunks are scanned
+EXACT_HYBRID_SEARCH_SQL = _HYBRID_SEARCH_TEMPLATE.format(order="1 - (dc.embedding <=> $1) DESC")
+
+# Exact fallback over the tenant's chunks
+EXACT_SEARCH_SQL = """
+SELECT
+    dc.id as chunk_id,
+    dc.document_id,
+    dc.content,
+    dc.metadata as chunk_metadata,
+    d.filename,
+    d.metadata as document_metadata,
+    1 - (dc.embedding <=> $1) as similarity_score
+FROM document_chunks dc
+JOIN documents d ON dc.document_id = d.id
+WHERE dc.user_id = $2
+AND dc.searchable
+AND ($4::text[] IS NULL OR dc.document_id = ANY($4::text[]))
+AND (dc.embedding <=> $1) <= 1 - $3
+ORDER BY similarity_score DESC  -- not the index's operator order, so this stays an exact scan
+LIMIT $5
+"""
+
+# Columns GET /documents/list may project; the default keeps the previous response shape
+DOCUMENT_LIST_FIELDS = (
+    "id", "filename", "file_type", "status", "created_at", "updated_at",
+    "chunk_count", "content_chars", "metadata"
+)
+DOCUMENT_LIST_DEFAULT_FIELDS = ("id", "filename", "file_type", "status", "created_at", "updated_at", "chunk_count")
+
+def vector_to_list(value) -> Optional[List[float]]:
+    """Convert a decoded pgvector value (Vector, ndarray or list) to a plain list"""
+    if value is None:
+        return None
+    if hasattr(value, 'to_list'):
+        return value.to_list()
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return list(value)
+
+def vector_to_numpy(value) -> np.ndarray:
+    """Convert a decoded pgvector value (Vector, HalfVector, ndarray or list) to a float32 array"""
+    if hasattr(value, 'to_numpy'):
+        value = value.to_numpy()
+    return np.asarray(value, dtype=np.float32)
+
+class AsyncDatabaseManager:
+    """
+    asyncpg-backed data access layer used by the API routes.
+
+    Mirrors the queries of the synchronous DatabaseManager so that request
+    handlers never block the event loop on database I/O. The synchronous
+    manager remains the entry point for scripts and schema setup.
+    """
+
+    def __init__(self):
+        self.connection_string = settings.database_url
+        self._pool = None
+        self._pool_lock = asyncio.Lock()
+
+    @staticmethod
+    async def _init_connection(conn):
+        """Register codecs for pgvector and JSONB on each new connection"""
+        await register_vector(conn)
+        await conn.set_type_codec(
+            'jsonb',
+            encoder=json.dumps,
+            decoder=json.loads,
+            schema='pg_catalog'
+        )
+
+    async def connect(self):
+        """Create the connection pool if it does not exist yet"""
+        if self._pool is not None:
+            return self._pool
+
+        async with self._pool_lock:
+            if self._pool is None:
+                self._pool = await asyncpg.create_pool(
+                    self.connection_string,
+                    min_size=settings.db_async_pool_min_size,
+                    max_size=settings.db_async_pool_max_size,
+                    max_inactive_connection_lifetime=settings.db_async_pool_max_idle_seconds,
+                    command_timeout=settings.db_command_timeout,
+                    statement_cache_size=settings.db_statement_cache_size,
+                    init=self._init_connection
+                )
+                logger.info(
+                    f"Async database pool created "
+                    f"(min={settings.db_async_pool_min_size}, max={settings.db_async_pool_max_size})"
+                )
+        return self._pool
+
+    async def connect_listener(self) -> asyncpg.Connection:
+        """A dedicated connection outside the pool, for LISTEN (needs a session, not PgBouncer transaction mode)"""
+        return await asyncpg.connect(self.connection_string, timeout=settings.db_command_timeout)
+
+    async def close(self):
+        """Close the connection pool"""
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    @asynccontextmanager
+    async def get_connection(self, transaction: bool = True):
+        """
+        Async context manager yielding a pooled connection inside a transaction.
+        Pass transaction=False for statements that cannot run in a transaction
+        block, such as CREATE INDEX CONCURRENTLY.
+        """
+        pool = await self.connect()
+        try:
+            async with pool.acquire(timeout=settings.db_pool_timeout) as conn:
+                if not transaction:
+                    yield conn
+                    return
+                async with conn.transaction():
+                    yield conn
+        except Exception as e:
+            logger.error(f"Database error: {e}")
+            raise
+
+    def get_pool_stats(self) -> dict:
+        """Connection pool metrics (in-use, idle)"""
+        if self._pool is None:
+            return {"initialized": False}
+        size = self._pool.get_size()
+        idle = self._pool.get_idle_size()
+        return {
+            "initialized": True,
+            "min_size": self._pool.get_min_size(),
+            "max_size": self._pool.get_max_size(),
+            "size": size,
+            "in_use": size - idle,
+            "idle": idle
+        }
+
+    async def ping(self) -> bool:
+        """Run a trivial query to verify connectivity"""
+        async with self.get_connection(transaction=False) as conn:
+            return await conn.fetchval("SELECT 1") == 1
+
+    async def insert_document(self, document_id: str, user_id: str, filename: str,
+                              file_type: str, file_url: str, metadata: dict = None):
+        """Insert a new document record"""
+        sql = """
+        INSERT INTO documents (id, user_id, filename, file_type, file_url, metadata)
+        VALUES ($1, $2, $3, $4, $5, $6)
+        ON CONFLICT (id) DO UPDATE SET
+            status = 'processing',
+            updated_at = NOW()
+        """
+        async with self.get_connection() as conn:
+            await conn.execute(sql, document_id, user_id, filename, file_type, file_url, metadata)
+
+    async def update_document_status(self, document_id: str, status: str):
+        """Update document processing status"""
+        sql = """
+        UPDATE documents
+        SET status = $1, updated_at = NOW()
+        WHERE id = $2
+        """
+        async with self.get_connection() as conn:
+            await conn.execute(sql, status, document_id)
+
+    async def insert_chunks(self, chunks_data: list):
+        """Batch insert document chunks with embeddings"""
+        if not chunks_data:
+            return
+        if settings.db_bulk_insert_method == "copy":
+            await self._insert_chunks_copy(chunks_data)
+        else:
+            await self._insert_chunks_executemany(chunks_data)
+
+    async def _insert_chunks_executemany(self, chunks_data: list):
+        """Row-by-row upsert (one statement per chunk)"""
+        sql = """
+        INSERT INTO document_chunks (id, document_id, content, chunk_index, embedding, content_hash, metadata,
+                                     user_id, searchable)
+        SELECT $1::text, d.id, $3::text, $4::integer, $5::vector, $6::text, $7::jsonb,
+               d.user_id, d.status = 'completed'
+        FROM documents d
+        WHERE d.id = $2
+        """ + CHUNK_UPSERT_SQL
+        # chunk is a tuple of (id, document_id, content, chunk_index, embedding, content_hash, metadata)
+        prepared_data = [
+            (*other_fields, metadata or None)
+            for *other_fields, metadata in chunks_data
+        ]
+
+        async with self.get_connection() as conn:
+            await conn.executemany(sql, prepared_data)
+
+    async def _insert_chunks_copy(self, chunks_data: list):
+        """Stream chunks into a staging table with binary COPY, then upsert in one statement"""
+        records = [
+            (chunk_id, document_id, content, chunk_index, embedding, chunk_hash,
+             json.dumps(metadata) if metadata else None)
+            for chunk_id, document_id, content, chunk_index, embedding, chunk_hash, metadata in chunks_data
+        ]
+
+        async with self.get_connection() as conn:
+            await conn.execute(CHUNK_STAGING_TABLE_SQL)
+            await conn.copy_records_to_table(
+                'chunk_staging',
+                records=records,
+                columns=['id', 'document_id', 'content', 'chunk_index', 'embedding', 'content_hash', 'metadata']
+            )
+            await conn.execute(CHUNK_STAGING_MERGE_SQL)
+
+    async def get_document_embeddings(self, document_id: str) -> Dict[str, object]:
+        """Stored embeddings of a document keyed by chunk content hash"""
+        sql = """
+        SELECT DISTINCT ON (content_hash) content_hash, embedding::vector AS embedding  -- reinserted via vector staging
+        FROM document_chunks
+        WHERE document_id = $1 AND content_hash IS NOT NULL AND embedding IS NOT NULL
+        """
+        async with self.get_connection() as conn:
+            rows = await conn.fetch(sql, document_id)
+            return {row['content_hash']: row['embedding'] for row in rows}
+
+    async def delete_chunks_from(self, document_id: str, chunk_index: int) -> int:
+        """Delete a document's chunks at or beyond chunk_index; returns the number removed"""
+        sql = "DELETE FROM document_chunks WHERE document_id = $1 AND chunk_index >= $2"
+        async with self.get_connection() as conn:
+            result = await conn.execute(sql, document_id, chunk_index)
+            return int(result.split()[-1])
+
+    async def record_ingestion_stats(self, document_id: str, stats: dict):
+        """Store the latest ingestion run's stats under the document's metadata"""
+        sql = """
+        UPDATE documents
+        SET metadata = COALESCE(metadata, '{}'::jsonb) || jsonb_build_object('ingestion', $2::jsonb)
+        WHERE id = $1
+        """
+        async with self.get_connection() as conn:
+            await conn.execute(sql, document_id, stats)
+
+    @staticmethod
+    async def _apply_search_settings(conn, probes: Optional[int] = None, ef_search: Optional[int] = None):
+        """Set ANN recall/speed knobs for the current transaction only"""
+        knobs = {
+            'ivfflat.probes': probes or settings.search_ivfflat_probes,
+            'hnsw.ef_search': ef_search or settings.search_hnsw_ef_search
+        }
+        knobs = {name: str(value) for name, value in knobs.items() if value}
+        if not knobs:
+            return
+        # One round trip; SET LOCAL does not accept bind parameters, set_config(..., true) does
+        calls = ", ".join(f"set_config('{name}', ${i}, true)" for i, name in enumerate(knobs, start=1))
+        await conn.execute(f"SELECT {calls}", *knobs.values())
+
+    async def semantic_search(self, query_embedding: list, user_id: str,
+                              document_ids: list = None, top_k: int = 5,
+                              similarity_threshold: float = 0.3,
+                              probes: Optional[int] = None,
+                              ef_search: Optional[int] = None) -> List[dict]:
+        """
+        Perform semantic search using cosine similarity.
+
+        The tenant's nearest neighbours are fetched first with ORDER BY distance
+        LIMIT n, which the ANN index can serve (with VECTOR_QUANTIZATION=binary,
+        a Hamming-distance shortlist re-scored exactly), and only then filtered
+        by threshold. If the filters leave fewer than top_k rows the
+        candidate set is widened, and as a last resort the tenant's chunks are
+        scanned exactly. In binary mode a shortlist already at
+        SEARCH_MAX_CANDIDATES returns what it found instead, so the quantized
+        path never ends in a full-precision scan of a large tenant.
+        """
+        async with self.get_connection() as conn:
+            return await self._search(
+                conn, query_embedding, user_id, document_ids or None, top_k, similarity_threshold,
+                probes, ef_search, initial_candidate_limit(top_k)
+            )
+
+    async def _search(self, conn, query_embedding, user_id: str, document_ids: Optional[list],
+                      top_k: int, similarity_threshold: float, probes: Optional[int],
+                      ef_search: Optional[int], candidate_limit: int) -> List[dict]:
+        """Candidate scan starting at candidate_limit, widening and falling back to an exact scan"""
+        while candidate_limit != EXACT_SCAN:
+            await self._apply_search_settings(conn, probes, self._pass_ef_search(ef_search, candidate_limit))
+            rows = await conn.fetch(
+                BINARY_SEARCH_SQL if settings.vector_quantization == "binary" else SEMANTIC_SEARCH_SQL,
+                query_embedding, user_id, similarity_threshold, document_ids, candidate_limit, top_k
+            )
+            results = [
+                {key: value for key, value in row.items() if key not in ('candidate_count', 'max_distance')}
+                for row in rows if row['chunk_id'] is not None
+            ]
+            step = next_search_step(
+                len(results), rows[0]['candidate_count'], rows[0]['max_distance'],
+                candidate_limit, top_k, similarity_threshold,
+                exact_fallback=settings.vector_quantization != "binary"
+            )
+            if step is None:
+                return results
+            candidate_limit = step
+
+        return await self._exact_search(conn, query_embedding, user_id, document_ids, top_k, similarity_threshold)
+
+    @staticmethod
+    def _pass_ef_search(ef_search: Optional[int], candidate_limit: int) -> int:
+        """HNSW returns at most ef_search rows, so keep it at least as large as the candidate limit"""
+        return max(ef_search or settings.search_hnsw_ef_search or 0, min(candidate_limit, HNSW_MAX_EF_SEARCH))
+
+    async def batch_semantic_search(self, query_embeddings: list, user_id: str, top_ks: List[int],
+                                    similarity_thresholds: List[float], document_ids: list = None,
+                                    probes: Optional[int] = None,
+                                    ef_search: Optional[int] = None) -> List[List[dict]]:
+        """
+        Run several semantic searches for one user in a single statement.
+
+        Every query's candidate scan runs in one round trip (a LATERAL scan per
+        query vector, a Hamming shortlist with VECTOR_QUANTIZATION=binary); the rare query whose filters leave too few rows is then
+        widened on its own, exactly as semantic_search would. Returns one result
+        list per query, in order.
+        """
+        if not query_embeddings:
+            return []
+        document_ids = document_ids or None
+        candidate_limit = initial_candidate_limit(max(top_ks))
+
+        async with self.get_connection() as conn:
+            await self._apply_search_settings(conn, probes, self._pass_ef_search(ef_search, candidate_limit))
+            rows = await conn.fetch(
+                BINARY_BATCH_SEARCH_SQL if settings.vector_quantization == "binary" else BATCH_SEARCH_SQL,
+                query_embeddings, user_id, top_ks, similarity_thresholds,
+                document_ids, candidate_limit
+            )
+
+            results = [[] for _ in query_embeddings]
+            scanned = [(0, None)] * len(query_embeddings)
+            for row in rows:
+                position = row['query_index'] - 1
+                scanned[position] = (row['candidate_count'], row['max_distance'])
+                if row['matched']:
+                    results[position].append({
+                        key: value for key, value in row.items()
+                        if key not in ('query_index', 'candidate_count', 'max_distance', 'matched')
+                    })
+
+            for position, (candidate_count, max_distance) in enumerate(scanned):
+                step = next_search_step(
+                    len(results[position]), candidate_count, max_distance,
+                    candidate_limit, top_ks[position], similarity_thresholds[position],
+                    exact_fallback=settings.vector_quantization != "binary"
+                )
+                if step is not None:
+                    results[position] = await self._search(
+                        conn, query_embeddings[position], user_id, document_ids, top_ks[position],
+                        similarity_thresholds[position], probes, ef_search, step
+                    )
+
+            return results
+
+    async def hybrid_search(self, query_embedding: list, query_text: str, user_id: str,
+                            document_ids: list = None, top_k: int = 5,
+                            similarity_threshold: float = 0.3,
+                            vector_weight: Optional[float] = None,
+                            lexical_weight: Optional[float] = None,
+                            probes: Optional[int] = None,
+                            ef_search: Optional[int] = None) -> Tuple[List[dict], dict]:
+        """
+        Fuse vector and full-text retrieval with reciprocal-rank fusion in one
+        round trip. Returns the fused rows and how many candidates each leg
+        contributed; full-text matches are kept even below the similarity
+        threshold, which is what lets exact identifiers surface.
+        VECTOR_QUANTIZATION=binary gives the vector leg the same Hamming first
+        pass as semantic_search. A vector leg with fewer than top_k matches is
+        widened and, as a last resort, scanned exactly, as semantic_search
+        does, so a small tenant in a large table does not end up lexical-only.
+        """
+        candidates = max(settings.hybrid_candidates, top_k)
+        vector_weight = settings.hybrid_vector_weight if vector_weight is None else vector_weight
+        lexical_weight = settings.hybrid_lexical_weight if lexical_weight is None else lexical_weight
+        binary = settings.vector_quantization == "binary"
+        sql = BINARY_HYBRID_SEARCH_SQL if binary else HYBRID_SEARCH_SQL
+        candidate_limit = candidates
+
+        async with self.get_connection() as conn:
+            while True:
+                await self._apply_search_settings(conn, probes, self._pass_ef_search(ef_search, candidate_limit))
+                rows = await conn.fetch(
+                    sql, query_embedding, user_id, similarity_threshold, document_ids or None,
+                    candidates, query_text, vector_weight, lexical_weight, settings.hybrid_rrf_k, top_k,
+                    settings.text_search_config, candidate_limit
+                )
+                if sql is EXACT_HYBRID_SEARCH_SQL:
+                    break
+                step = next_search_step(
+                    rows[0]['vector_candidates'], rows[0]['candidate_count'], rows[0]['max_distance'],
+                    candidate_limit, top_k, similarity_threshold, exact_fallback=not binary
+                )
+                if step is None:
+                    break
+                if step == EXACT_SCAN:
+                    sql, candidate_limit = EXACT_HYBRID_SEARCH_SQL, candidates
+                else:
+                    candidate_limit = step
+
+        legs = {
+            "vector_candidates": rows[0]['vector_candidates'],
+            "lexical_candidates": rows[0]['lexical_candidates']
+        }
+        results = [
+            {key: value for key, value in row.items() if key not in (*legs, 'candidate_count', 'max_distance')}
+            for row in rows if row['chunk_id'] is not None
+        ]
+        return results, legs
+
+    @staticmethod
+    async def _exact_search(conn, query_embedding, user_id: str, document_ids: Optional[list],
+                            top_k: int, similarity_threshold: float) -> List[dict]:
+        """Exact scan of the tenant's chunks (driven by the user/document indexes, not the ANN index)"""
+        rows = await conn.fetch(EXACT_SEARCH_SQL, query_embedding, user_id, similarity_threshold, document_ids, top_k)
+        return [dict(row) for row in rows]
+
+    async def get_document_chunks_count(self, document_id: str) -> int:
+        """Get the number of chunks for a document (trigger-maintained counter)"""
+        sql = "SELECT chunk_count FROM documents WHERE id = $1"
+        async with self.get_connection() as conn:
+            return await conn.fetchval(sql, document_id) or 0
+
+    async def get_document_status(self, document_id: str, user_id: str) -> Optional[dict]:
+        """Get a document's status and chunk count, or None if it does not exist"""
+        sql = """
+        SELECT status, filename, file_type, metadata, created_at, updated_at,
+               chunk_count, content_chars
+        FROM documents
+        WHERE id = $1 AND user_id = $2
+        """
+        async with self.get_connection() as conn:
+            row = await conn.fetchrow(sql, document_id, user_id)
+            return dict(row) if row else None
+
+    async def list_documents(self, user_id: str, status: str = None, limit: int = 50,
+                             after: Optional[Tuple[datetime, str]] = None,
+                             fields: Optional[List[str]] = None) -> List[dict]:
+        """
+        One page of a user's documents, newest first, ordered by (created_at, id).
+
+        ``after`` is the (created_at, id) of the previous page's last row; the
+        page starts strictly after it, so it is stable under concurrent inserts.
+        Only ``fields`` (from DOCUMENT_LIST_FIELDS) are returned, plus the two
+        keyset columns. The status and cursor conditions are only added when
+        given so each query shape matches idx_documents_user_created or
+        idx_documents_user_status_created.
+        """
+        columns = list(dict.fromkeys(["id", "created_at", *(fields or DOCUMENT_LIST_DEFAULT_FIELDS)]))
+        unknown = set(columns) - set(DOCUMENT_LIST_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown document fields: {', '.join(sorted(unknown))}")
+
+        params = [user_id]
+        conditions = ["user_id = $1"]
+        if status is not None:
+            params.append(status)
+            conditions.append(f"status = ${len(params)}")
+        if after is not None:
+            params.extend(after)
+            conditions.append(f"(created_at, id) < (${len(params) - 1}, ${len(params)})")
+        params.append(limit)
+
+        sql = f"""
+        SELECT {', '.join(columns)}
+        FROM documents
+        WHERE {' AND '.join(conditions)}
+        ORDER BY created_at DESC, id DESC
+        LIMIT ${len(params)}
+        """
+        async with self.get_connection() as conn:
+            rows = await conn.fetch(sql, *params)
+            return [dict(row) for row in rows]
+
+    async def count_documents(self, user_id: str, status: str = None) -> int:
+        """
+        Number of a user's documents, optionally in one status. All and
+        completed documents come from the user_stats counters; other statuses
+        are an index-only count over idx_documents_user_status_created,
+        bounded by the user's own documents.
+        """
+        if status in (None, 'completed'):
+            stats = await self.get_user_statistics(user_id)
+            return stats.get('completed_documents' if status else 'total_documents') or 0
+
+        sql = "SELECT COUNT(*) FROM documents WHERE user_id = $1 AND status = $2"
+        async with self.get_connection() as conn:
+            return await conn.fetchval(sql, user_id, status)
+
+    async def get_documents_by_status(self, status: str) -> List[dict]:
+        """All documents in a given status, across users (used for job recovery)"""
+        sql = """
+        SELECT id, user_id, filename, file_type, file_url, metadata, updated_at
+        FROM documents
+        WHERE status = $1
+        ORDER BY updated_at
+        """
+        async with self.get_connection() as conn:
+            rows = await conn.fetch(sql, status)
+            return [dict(row) for row in rows]
+
+    async def delete_document(self, document_id: str, user_id: str) -> bool:
+        """Delete a document and its chunks; returns False if it does not exist"""
+        sql = "DELETE FROM documents WHERE id = $1 AND user_id = $2 RETURNING id"
+        async with self.get_connection() as conn:
+            return await conn.fetchval(sql, document_id, user_id) is not None
+
+    async def get_chunk(self, chunk_id: str, user_id: str) -> Optional[dict]:
+        """Get a chunk's content and embedding if it belongs to the user"""
+        sql = """
+        SELECT content, embedding, user_id
+        FROM document_chunks
+        WHERE id = $1 AND user_id = $2
+        """
+        async with self.get_connection() as conn:
+            row = await conn.fetchrow(sql, chunk_id, user_id)
+            if not row:
+                return None
+            result = dict(row)
+            result['embedding'] = vector_to_list(result['embedding'])
+            return result
+
+    async def get_user_embeddings(self, user_id: str, limit: int) -> List[dict]:
+        """Ids and embeddings of a user's searchable chunks (at most limit rows)"""
+        sql = """
+        SELECT id, document_id, embedding
+        FROM document_chunks
+        WHERE user_id = $1 AND searchable AND embedding IS NOT NULL
+        LIMIT $2
+        """
+        async with self.get_connection() as conn:
+            return [dict(row) for row in await conn.fetch(sql, user_id, limit)]
+
+    async def get_chunks_by_ids(self, user_id: str, chunk_ids: List[str]) -> Dict[str, dict]:
+        """Content and display fields of a user's searchable chunks, keyed by chunk id"""
+        sql = """
+        SELECT
+            dc.id as chunk_id,
+            dc.document_id,
+            dc.content,
+            dc.metadata as chunk_metadata,
+            d.filename,
+            d.metadata as document_metadata
+        FROM document_chunks dc
+        JOIN documents d ON dc.document_id = d.id
+        WHERE dc.user_id = $1 AND dc.id = ANY($2::text[]) AND dc.searchable
+        """
+        async with self.get_connection() as conn:
+            rows = await conn.fetch(sql, user_id, chunk_ids)
+            return {row['chunk_id']: dict(row) for row in rows}
+
+    async def get_user_statistics(self, user_id: str) -> dict:
+        """Get document and chunk counts for a user (one trigger-maintained row)"""
+        sql = """
+        SELECT total_documents, completed_documents, total_chunks, content_chars, content_bytes,
+               searchable_chunks::float / NULLIF(completed_documents, 0) as avg_chunks_per_document
+        FROM user_stats
+        WHERE user_id = $1
+        """
+        async with self.get_connection() as conn:
+            row = await conn.fetchrow(sql, user_id)
+            return dict(row) if row else {}
+
+# Global async database manager instance
+async_db_manager = AsyncDatabaseManager()
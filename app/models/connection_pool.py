@@ -0,0 +1,225 @@
+import psycopg2
+from psycopg2.extras import RealDictCursor
+from collections import deque
+import threading
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+class PoolTimeoutError(RuntimeError):
+    """Raised when no connection becomes available within the checkout timeout"""
+
+class _PooledConnection:
+    """A raw connection plus the bookkeeping the pool needs to recycle it"""
+
+    __slots__ = ("conn", "created_at", "last_used_at")
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.created_at = time.monotonic()
+        self.last_used_at = self.created_at
+
+class ConnectionPool:
+    """
+    Bounded, thread-safe psycopg2 connection pool.
+
+    Connections are validated on checkout (closed or stale connections are
+    replaced), recycled once they exceed ``max_lifetime`` seconds, and the pool
+    never holds more than ``max_size`` connections. Callers block for up to
+    ``timeout`` seconds when every connection is checked out.
+    """
+
+    def __init__(self, dsn: str, min_size: int = 1, max_size: int = 10,
+                 timeout: float = 30.0, max_lifetime: float = 1800.0,
+                 health_check: bool = True, health_check_idle_seconds: float = 30.0):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Invalid pool size: require 0 <= min_size <= max_size and max_size >= 1")
+
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.health_check = health_check
+        self.health_check_idle_seconds = health_check_idle_seconds
+
+        self._idle = deque()
+        self._in_use = {}
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+        # Metrics
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+        self._timeouts = 0
+        self._connections_created = 0
+        self._connections_recycled = 0
+        self._health_check_failures = 0
+
+        for _ in range(min_size):
+            with self._cond:
+                self._size += 1
+            try:
+                self._idle.append(self._connect())
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                raise
+
+    def _connect(self) -> _PooledConnection:
+        """Open a new physical connection"""
+        conn = psycopg2.connect(self.dsn, cursor_factory=RealDictCursor)
+        with self._cond:
+            self._connections_created += 1
+        return _PooledConnection(conn)
+
+    def _discard(self, pooled: _PooledConnection):
+        """Close a physical connection without returning it to the pool"""
+        try:
+            if not pooled.conn.closed:
+                pooled.conn.close()
+        except Exception as e:
+            logger.warning(f"Error closing pooled connection: {e}")
+
+    def _is_usable(self, pooled: _PooledConnection) -> bool:
+        """Check an idle connection before handing it out"""
+        now = time.monotonic()
+
+        if pooled.conn.closed:
+            return False
+
+        if self.max_lifetime and now - pooled.created_at > self.max_lifetime:
+            with self._cond:
+                self._connections_recycled += 1
+            return False
+
+        if self.health_check and now - pooled.last_used_at > self.health_check_idle_seconds:
+            try:
+                with pooled.conn.cursor() as cur:
+                    cur.execute("SELECT 1")
+                pooled.conn.rollback()
+            except Exception as e:
+                logger.warning(f"Pooled connection failed health check: {e}")
+                with self._cond:
+                    self._health_check_failures += 1
+                return False
+
+        return True
+
+    def getconn(self):
+        """Check out a connection, blocking up to ``timeout`` seconds"""
+        start = time.monotonic()
+        waited = False
+
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError("Connection pool is closed")
+
+                pooled = None
+                must_connect = False
+
+                if self._idle:
+                    pooled = self._idle.pop()
+                elif self._size < self.max_size:
+                    self._size += 1
+                    must_connect = True
+                else:
+                    remaining = self.timeout - (time.monotonic() - start)
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeoutError(
+                            f"Timed out after {self.timeout}s waiting for a database connection "
+                            f"(pool max_size={self.max_size})"
+                        )
+                    waited = True
+                    self._cond.wait(remaining)
+                    continue
+
+            # Connect and health-check outside the lock so other threads are not blocked
+            if must_connect:
+                try:
+                    pooled = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+            elif not self._is_usable(pooled):
+                self._discard(pooled)
+                with self._cond:
+                    self._size -= 1
+                continue
+
+            wait_time = time.monotonic() - start
+            with self._cond:
+                self._in_use[id(pooled.conn)] = pooled
+                self._checkouts += 1
+                if waited:
+                    self._waits += 1
+                self._wait_time_total += wait_time
+                self._wait_time_max = max(self._wait_time_max, wait_time)
+
+            return pooled.conn
+
+    def putconn(self, conn, discard: bool = False):
+        """Return a connection to the pool, closing it if it is broken or expired"""
+        with self._cond:
+            pooled = self._in_use.pop(id(conn), None)
+
+        if pooled is None:
+            logger.warning("Attempted to return a connection that does not belong to this pool")
+            return
+
+        expired = self.max_lifetime and time.monotonic() - pooled.created_at > self.max_lifetime
+        broken = conn.closed or conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+        if discard or broken or expired or self._closed:
+            self._discard(pooled)
+            with self._cond:
+                if expired:
+                    self._connections_recycled += 1
+                self._size -= 1
+                self._cond.notify()
+            return
+
+        pooled.last_used_at = time.monotonic()
+        with self._cond:
+            self._idle.append(pooled)
+            self._cond.notify()
+
+    def closeall(self):
+        """Close every idle connection and refuse further checkouts"""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+
+        for pooled in idle:
+            self._discard(pooled)
+
+    def get_stats(self) -> dict:
+        """Snapshot of pool usage for sizing and monitoring"""
+        with self._cond:
+            checkouts = self._checkouts
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self._size,
+                "in_use": len(self._in_use),
+                "idle": len(self._idle),
+                "checkouts": checkouts,
+                "waits": self._waits,
+                "timeouts": self._timeouts,
+                "avg_wait_ms": round(self._wait_time_total / checkouts * 1000, 3) if checkouts else 0.0,
+                "max_wait_ms": round(self._wait_time_max * 1000, 3),
+                "connections_created": self._connections_created,
+                "connections_recycled": self._connections_recycled,
+                "health_check_failures": self._health_check_failures,
+            }
@@ -1,81 +1,149 @@
 import psycopg2
-from psycopg2.extras import RealDictCursor
 from contextlib import contextmanager
+from typing import Optional
+import threading
 import logging
 from app.config import settings
+from app.models.connection_pool import ConnectionPool
+from app.models.migrations import run_migrations
+from app.utils.pgcopy import write_binary_copy, encode_text, encode_int4, encode_vector
 import json
 
 logger = logging.getLogger(__name__)
 
+# Per-transaction staging table used by the COPY-based bulk chunk insert
+CHUNK_STAGING_TABLE_SQL = """
+CREATE TEMP TABLE chunk_staging (
+    id TEXT NOT NULL,
+    document_id TEXT NOT NULL,
+    content TEXT NOT NULL,
+    chunk_index INTEGER NOT NULL,
+    embedding vector({embedding_dim}),
+    content_hash TEXT,
+    metadata TEXT
+) ON COMMIT DROP
+""".format(embedding_dim=settings.embedding_dimension)
+
+# Upsert clause shared by the chunk insert paths; rows whose content and
+# metadata are unchanged are left alone instead of being rewritten
+CHUNK_UPSERT_SQL = """
+ON CONFLICT (user_id, document_id, chunk_index) DO UPDATE SET
+    id = EXCLUDED.id,
+    content = EXCLUDED.content,
+    embedding = EXCLUDED.embedding,
+    content_hash = EXCLUDED.content_hash,
+    metadata = EXCLUDED.metadata
+WHERE document_chunks.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+   OR document_chunks.metadata IS DISTINCT FROM EXCLUDED.metadata
+"""
+
+# Set-based merge of the staged rows into document_chunks; the tenant and
+# searchable flag are copied from the owning document
+CHUNK_STAGING_MERGE_SQL = """
+INSERT INTO document_chunks (id, document_id, content, chunk_index, embedding, content_hash, metadata,
+                             user_id, searchable)
+SELECT s.id, s.document_id, s.content, s.chunk_index, s.embedding, s.content_hash, s.metadata::jsonb,
+       d.user_id, d.status = 'completed'
+FROM chunk_staging s
+JOIN documents d ON d.id = s.document_id
+""" + CHUNK_UPSERT_SQL
+
+# Search pass outcome: fall back to an exact scan of the tenant's chunks
+EXACT_SCAN = -1
+
+# Largest hnsw.ef_search pgvector accepts; HNSW scans return at most ef_search rows
+HNSW_MAX_EF_SEARCH = 1000
+
+def initial_candidate_limit(top_k: int) -> int:
+    """Nearest-neighbour candidates fetched on the first search pass"""
+    return min(max(top_k * settings.search_candidate_multiplier, top_k), settings.search_max_candidates)
+
+def next_search_step(found: int, candidate_count: int, max_distance: Optional[float],
+                     candidate_limit: int, top_k: int, similarity_threshold: float,
+                     exact_fallback: bool = True) -> Optional[int]:
+    """
+    Decide what an index-driven search does after a pass over ``candidate_limit``
+    nearest neighbours: None when the results are final, a larger candidate
+    limit to widen the scan, or EXACT_SCAN when the index cannot reach enough
+    of the tenant's rows (e.g. a small tenant in a large table). Without
+    ``exact_fallback``, a pass that reached ``search_max_candidates`` is final.
+    """
+    if found >= top_k:
+        return None
+    if candidate_count == candidate_limit:
+        if max_distance is not None and max_distance > 1 - similarity_threshold:
+            # Every further candidate is below the similarity threshold
+            return None
+        if candidate_limit < settings.search_max_candidates:
+            return min(candidate_limit * settings.search_widen_factor, settings.search_max_candidates)
+        if not exact_fallback:
+            return None
+    return EXACT_SCAN
+
 class DatabaseManager:
     def __init__(self):
         self.connection_string = settings.database_url
-        # print(settings.database_url)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    @property
+    def pool(self) -> ConnectionPool:
+        """Connection pool, created lazily on first use"""
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ConnectionPool(
+                        self.connection_string,
+                        min_size=settings.db_pool_min_size,
+                        max_size=settings.db_pool_max_size,
+                        timeout=settings.db_pool_timeout,
+                        max_lifetime=settings.db_pool_max_lifetime,
+                        health_check=settings.db_pool_health_check,
+                        health_check_idle_seconds=settings.db_pool_health_check_idle_seconds
+                    )
+                    logger.info(
+                        f"Database connection pool created "
+                        f"(min={settings.db_pool_min_size}, max={settings.db_pool_max_size})"
+                    )
+        return self._pool
 
-        
     @contextmanager
     def get_connection(self):
-        """Context manager for database connections"""
+        """Context manager for pooled database connections"""
         conn = None
+        discard = False
         try:
-            conn = psycopg2.connect(
-                self.connection_string,
-                cursor_factory=RealDictCursor
-            )
+            conn = self.pool.getconn()
             yield conn
             conn.commit()
         except Exception as e:
             if conn:
-                conn.rollback()
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    discard = True
             logger.error(f"Database error: {e}")
             raise
         finally:
             if conn:
-                conn.close()
+                self.pool.putconn(conn, discard=discard or conn.closed)
+
+    def get_pool_stats(self) -> dict:
+        """Connection pool metrics (in-use, idle, wait time)"""
+        if self._pool is None:
+            return {"initialized": False}
+        return {"initialized": True, **self._pool.get_stats()}
+
+    def close(self):
+        """Close all pooled connections"""
+        if self._pool is not None:
+            self._pool.closeall()
+            self._pool = None
     
     def initialize_tables(self):
-        """Create necessary tables and extensions"""
-        create_tables_sql = """
-        -- Enable pgvector extension
-        CREATE EXTENSION IF NOT EXISTS vector;
-        
-        -- Create documents table
-        CREATE TABLE IF NOT EXISTS documents (
-            id TEXT PRIMARY KEY,
-            user_id TEXT NOT NULL,
-            filename TEXT NOT NULL,
-            file_type TEXT NOT NULL,
-            file_url TEXT NOT NULL,
-            status TEXT DEFAULT 'processing',
-            metadata JSONB DEFAULT '{{}}',
-            created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-            updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
-        );
-        
-        -- Create document_chunks table
-        CREATE TABLE IF NOT EXISTS document_chunks (
-            id TEXT PRIMARY KEY,
-            document_id TEXT NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
-            content TEXT NOT NULL,
-            chunk_index INTEGER NOT NULL,
-            embedding vector({embedding_dim}),
-            metadata JSONB DEFAULT '{{}}',
-            created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-            UNIQUE(document_id, chunk_index)
-        );
-        
-        -- Create indexes for better performance
-        CREATE INDEX IF NOT EXISTS idx_documents_user_id ON documents(user_id);
-        CREATE INDEX IF NOT EXISTS idx_documents_status ON documents(status);
-        CREATE INDEX IF NOT EXISTS idx_chunks_document_id ON document_chunks(document_id);
-        CREATE INDEX IF NOT EXISTS idx_chunks_embedding_cosine ON document_chunks 
-        USING ivfflat (embedding vector_cosine_ops) WITH (lists = 100);
-        """.format(embedding_dim=settings.embedding_dimension)
-        
-        with self.get_connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute(create_tables_sql)
-                logger.info("Database tables initialized successfully")
+        """Create or upgrade the schema by applying pending migrations"""
+        version = run_migrations(self)
+        logger.info(f"Database tables initialized successfully (schema version {version})")
     
     def insert_document(self, document_id: str, user_id: str, filename: str, 
                     file_type: str, file_url: str, metadata: dict = None):
@@ -107,34 +175,102 @@ class DatabaseManager:
 
     def insert_chunks(self, chunks_data: list):
         """Batch insert document chunks with embeddings"""
+        if not chunks_data:
+            return
+        if settings.db_bulk_insert_method == "copy":
+            self._insert_chunks_copy(chunks_data)
+        else:
+            self._insert_chunks_executemany(chunks_data)
+
+    def _insert_chunks_executemany(self, chunks_data: list):
+        """Row-by-row upsert (one statement per chunk)"""
         sql = """
-        INSERT INTO document_chunks (id, document_id, content, chunk_index, embedding, metadata)
-        VALUES (%s, %s, %s, %s, %s, %s)
-        ON CONFLICT (document_id, chunk_index) DO UPDATE SET
-            content = EXCLUDED.content,
-            embedding = EXCLUDED.embedding,
-            metadata = EXCLUDED.metadata
-        """
+        INSERT INTO document_chunks (id, document_id, content, chunk_index, embedding, content_hash, metadata,
+                                     user_id, searchable)
+        SELECT %(id)s, d.id, %(content)s, %(chunk_index)s, %(embedding)s::vector, %(content_hash)s,
+               %(metadata)s::jsonb, d.user_id, d.status = 'completed'
+        FROM documents d
+        WHERE d.id = %(document_id)s
+        """ + CHUNK_UPSERT_SQL
         # Prepare data, convert metadata dict to JSON string
         prepared_data = []
-        for chunk in chunks_data:
-            # chunk is expected to be a tuple or list of values corresponding to columns
-            # Assuming chunk[-1] is metadata dict, adjust if needed
-            *other_fields, metadata = chunk
-            metadata_json = json.dumps(metadata) if metadata else None
-            prepared_data.append((*other_fields, metadata_json))
+        for chunk_id, document_id, content, chunk_index, embedding, chunk_hash, metadata in chunks_data:
+            prepared_data.append({
+                'id': chunk_id,
+                'document_id': document_id,
+                'content': content,
+                'chunk_index': chunk_index,
+                'embedding': list(embedding),
+                'content_hash': chunk_hash,
+                'metadata': json.dumps(metadata) if metadata else None
+            })
         
         with self.get_connection() as conn:
             with conn.cursor() as cur:
                 cur.executemany(sql, prepared_data)
+
+    def _insert_chunks_copy(self, chunks_data: list):
+        """Stream chunks into a staging table with binary COPY, then upsert in one statement"""
+        rows = (
+            (chunk_id, document_id, content, chunk_index, embedding, chunk_hash,
+             json.dumps(metadata) if metadata else None)
+            for chunk_id, document_id, content, chunk_index, embedding, chunk_hash, metadata in chunks_data
+        )
+        buffer = write_binary_copy(
+            rows,
+            (encode_text, encode_text, encode_text, encode_int4, encode_vector, encode_text, encode_text)
+        )
+
+        with self.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(CHUNK_STAGING_TABLE_SQL)
+                cur.copy_expert(
+                    "COPY chunk_staging (id, document_id, content, chunk_index, embedding, content_hash, metadata) "
+                    "FROM STDIN WITH (FORMAT binary)",
+                    buffer
+                )
+                cur.execute(CHUNK_STAGING_MERGE_SQL)
     
     def semantic_search(self, query_embedding: list, user_id: str, 
                        document_ids: list = None, top_k: int = 5, 
                        similarity_threshold: float = 0.3):
-        """Perform semantic search using cosine similarity"""
-        
-        # Base query
-        base_sql = """
+        """
+        Perform semantic search using cosine similarity (same index-driven
+        candidate scan and widening as AsyncDatabaseManager.semantic_search)
+        """
+        sql = """
+        WITH candidates AS MATERIALIZED (
+            SELECT dc.id, dc.document_id, dc.content, dc.metadata,
+                   dc.embedding <=> %(embedding)s::vector AS distance
+            FROM document_chunks dc
+            WHERE dc.user_id = %(user_id)s
+            AND dc.searchable
+            AND (%(document_ids)s::text[] IS NULL OR dc.document_id = ANY(%(document_ids)s::text[]))
+            ORDER BY dc.embedding <=> %(embedding)s::vector
+            LIMIT %(candidate_limit)s
+        ),
+        scanned AS (
+            SELECT COUNT(*) AS candidate_count, MAX(distance) AS max_distance FROM candidates
+        )
+        SELECT s.candidate_count, s.max_distance, r.*
+        FROM scanned s
+        LEFT JOIN LATERAL (
+            SELECT 
+                c.id as chunk_id,
+                c.document_id,
+                c.content,
+                c.metadata as chunk_metadata,
+                d.filename,
+                d.metadata as document_metadata,
+                1 - c.distance as similarity_score
+            FROM candidates c
+            JOIN documents d ON c.document_id = d.id
+            WHERE c.distance <= 1 - %(threshold)s
+            ORDER BY c.distance
+            LIMIT %(top_k)s
+        ) r ON true
+        """
+        exact_sql = """
         SELECT 
             dc.id as chunk_id,
             dc.document_id,
@@ -142,34 +278,55 @@ class DatabaseManager:
             dc.metadata as chunk_metadata,
             d.filename,
             d.metadata as document_metadata,
-            1 - (dc.embedding <=> %s::vector) as similarity_score
+            1 - (dc.embedding <=> %(embedding)s::vector) as similarity_score
         FROM document_chunks dc
         JOIN documents d ON dc.document_id = d.id
-        WHERE d.user_id = %s 
-        AND d.status = 'completed'
-        AND 1 - (dc.embedding <=> %s::vector) >= %s
+        WHERE dc.user_id = %(user_id)s
+        AND dc.searchable
+        AND (%(document_ids)s::text[] IS NULL OR dc.document_id = ANY(%(document_ids)s::text[]))
+        AND (dc.embedding <=> %(embedding)s::vector) <= 1 - %(threshold)s
+        ORDER BY similarity_score DESC
+        LIMIT %(top_k)s
         """
-        
-        params = [query_embedding, user_id, query_embedding, similarity_threshold]
-        
-        # Add document filter if specified
-        if document_ids:
-            placeholders = ','.join(['%s'] * len(document_ids))
-            base_sql += f" AND d.id IN ({placeholders})"
-            params.extend(document_ids)
-        
-        # Order by similarity and limit results
-        base_sql += " ORDER BY similarity_score DESC LIMIT %s"
-        params.append(top_k)
+        params = {
+            'embedding': [float(value) for value in query_embedding],
+            'user_id': user_id,
+            'threshold': similarity_threshold,
+            'document_ids': document_ids or None,
+            'top_k': top_k,
+            'candidate_limit': initial_candidate_limit(top_k)
+        }
         
         with self.get_connection() as conn:
             with conn.cursor() as cur:
-                cur.execute(base_sql, params)
+                while True:
+                    cur.execute(
+                        "SELECT set_config('hnsw.ef_search', %s, true)",
+                        (str(max(settings.search_hnsw_ef_search or 0,
+                                 min(params['candidate_limit'], HNSW_MAX_EF_SEARCH))),)
+                    )
+                    cur.execute(sql, params)
+                    rows = cur.fetchall()
+                    results = [
+                        {key: value for key, value in row.items() if key not in ('candidate_count', 'max_distance')}
+                        for row in rows if row['chunk_id'] is not None
+                    ]
+                    step = next_search_step(
+                        len(results), rows[0]['candidate_count'], rows[0]['max_distance'],
+                        params['candidate_limit'], top_k, similarity_threshold
+                    )
+                    if step is None:
+                        return results
+                    if step == EXACT_SCAN:
+                        break
+                    params['candidate_limit'] = step
+                
+                cur.execute(exact_sql, params)
                 return cur.fetchall()
     
     def get_document_chunks_count(self, document_id: str):
-        """Get the number of chunks for a document"""
-        sql = "SELECT COUNT(*) as count FROM document_chunks WHERE document_id = %s"
+        """Get the number of chunks for a document (trigger-maintained counter)"""
+        sql = "SELECT chunk_count as count FROM documents WHERE id = %s"
         with self.get_connection() as conn:
             with conn.cursor() as cur:
                 cur.execute(sql, (document_id,))
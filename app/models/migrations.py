@@ -0,0 +1,528 @@
+import logging
+from typing import Optional
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Transaction-level advisory lock key so concurrent workers apply migrations once
+MIGRATION_LOCK_KEY = 0x5C4E_3A01
+
+SCHEMA_MIGRATIONS_SQL = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    applied_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+)
+"""
+
+# Version 1: the schema as created by initialize_tables before migrations
+# existed. Every statement is idempotent, so it is safe on existing databases.
+BASELINE_SQL = """
+-- Enable pgvector extension
+CREATE EXTENSION IF NOT EXISTS vector;
+
+-- Create documents table
+CREATE TABLE IF NOT EXISTS documents (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    file_type TEXT NOT NULL,
+    file_url TEXT NOT NULL,
+    status TEXT DEFAULT 'processing',
+    metadata JSONB DEFAULT '{{}}',
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Create document_chunks table
+CREATE TABLE IF NOT EXISTS document_chunks (
+    id TEXT PRIMARY KEY,
+    document_id TEXT NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    content TEXT NOT NULL,
+    chunk_index INTEGER NOT NULL,
+    embedding vector({embedding_dim}),
+    content_hash TEXT,
+    metadata JSONB DEFAULT '{{}}',
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    UNIQUE(document_id, chunk_index)
+);
+ALTER TABLE document_chunks ADD COLUMN IF NOT EXISTS content_hash TEXT;
+
+-- Create ingestion_jobs table (durable processing queue)
+CREATE TABLE IF NOT EXISTS ingestion_jobs (
+    id TEXT PRIMARY KEY,
+    document_id TEXT NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    payload JSONB NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    run_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    lease_expires_at TIMESTAMP WITH TIME ZONE,
+    locked_by TEXT,
+    last_error TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    started_at TIMESTAMP WITH TIME ZONE,
+    finished_at TIMESTAMP WITH TIME ZONE
+);
+
+-- Create indexes for better performance
+CREATE INDEX IF NOT EXISTS idx_documents_user_id ON documents(user_id);
+CREATE INDEX IF NOT EXISTS idx_documents_status ON documents(status);
+CREATE INDEX IF NOT EXISTS idx_chunks_document_id ON document_chunks(document_id);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_ingestion_jobs_active_document ON ingestion_jobs(document_id)
+WHERE status IN ('queued', 'running');
+CREATE INDEX IF NOT EXISTS idx_ingestion_jobs_runnable ON ingestion_jobs(status, run_at);
+CREATE INDEX IF NOT EXISTS idx_ingestion_jobs_document_id ON ingestion_jobs(document_id, created_at);
+
+-- The vector index is managed by IndexManager (built once there is data to cluster)
+"""
+
+# Version 2: tenant id and searchable flag on chunks, so searches and stats
+# filter document_chunks directly instead of joining documents
+TENANT_COLUMNS_SQL = """
+ALTER TABLE document_chunks ADD COLUMN IF NOT EXISTS user_id TEXT;
+ALTER TABLE document_chunks ADD COLUMN IF NOT EXISTS searchable BOOLEAN NOT NULL DEFAULT false;
+
+UPDATE document_chunks dc
+SET user_id = d.user_id, searchable = (d.status = 'completed')
+FROM documents d
+WHERE d.id = dc.document_id;
+
+ALTER TABLE document_chunks ALTER COLUMN user_id SET NOT NULL;
+
+-- Upserts now conflict on (user_id, document_id, chunk_index), which also
+-- serves tenant-scoped scans and works as a unique key on partitioned tables
+CREATE UNIQUE INDEX IF NOT EXISTS idx_chunks_user_document_chunk
+ON document_chunks(user_id, document_id, chunk_index);
+ALTER TABLE document_chunks DROP CONSTRAINT IF EXISTS document_chunks_document_id_chunk_index_key;
+
+-- Keep chunks' searchable flag in step with their document's status
+CREATE OR REPLACE FUNCTION sync_chunks_searchable() RETURNS trigger AS $$
+BEGIN
+    UPDATE document_chunks
+    SET searchable = (NEW.status = 'completed')
+    WHERE document_id = NEW.id
+    AND user_id = NEW.user_id
+    AND searchable IS DISTINCT FROM (NEW.status = 'completed');
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_documents_sync_chunks_searchable ON documents;
+CREATE TRIGGER trg_documents_sync_chunks_searchable
+AFTER UPDATE OF status ON documents
+FOR EACH ROW
+WHEN (OLD.status IS DISTINCT FROM NEW.status)
+EXECUTE FUNCTION sync_chunks_searchable();
+"""
+
+# Version 3: full-text search vector for hybrid retrieval, generated from the
+# content so every insert path maintains it. Adding the column rewrites the
+# table once; changing TEXT_SEARCH_CONFIG later needs a new migration.
+FULL_TEXT_SQL = """
+ALTER TABLE document_chunks ADD COLUMN IF NOT EXISTS content_tsv tsvector
+GENERATED ALWAYS AS (to_tsvector('{text_search_config}'::regconfig, content)) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_chunks_content_tsv ON document_chunks USING gin (content_tsv);
+"""
+
+# Statement-level triggers keeping the counters in step with document_chunks.
+# Kept separate because converting the table to partitions drops its triggers.
+CHUNK_COUNTER_TRIGGERS_SQL = """
+DROP TRIGGER IF EXISTS trg_chunks_count_insert ON document_chunks;
+CREATE TRIGGER trg_chunks_count_insert
+AFTER INSERT ON document_chunks
+REFERENCING NEW TABLE AS new_chunks
+FOR EACH STATEMENT EXECUTE FUNCTION count_chunk_changes();
+
+DROP TRIGGER IF EXISTS trg_chunks_count_update ON document_chunks;
+CREATE TRIGGER trg_chunks_count_update
+AFTER UPDATE ON document_chunks
+REFERENCING OLD TABLE AS old_chunks NEW TABLE AS new_chunks
+FOR EACH STATEMENT EXECUTE FUNCTION count_chunk_changes();
+
+DROP TRIGGER IF EXISTS trg_chunks_count_delete ON document_chunks;
+CREATE TRIGGER trg_chunks_count_delete
+AFTER DELETE ON document_chunks
+REFERENCING OLD TABLE AS old_chunks
+FOR EACH STATEMENT EXECUTE FUNCTION count_chunk_changes();
+"""
+
+# Version 4: per-document and per-user counters maintained by triggers, so
+# status, listing and stats endpoints read one row instead of counting chunks.
+# Chunk triggers are statement-level and aggregate their transition tables, so
+# a batched insert updates each document and user row once.
+COUNTERS_SQL = """
+-- Block writes while the counters are backfilled
+LOCK TABLE documents, document_chunks IN SHARE ROW EXCLUSIVE MODE;
+
+ALTER TABLE documents
+    ADD COLUMN IF NOT EXISTS chunk_count INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS content_chars BIGINT NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS content_bytes BIGINT NOT NULL DEFAULT 0;
+
+CREATE TABLE IF NOT EXISTS user_stats (
+    user_id TEXT PRIMARY KEY,
+    total_documents INTEGER NOT NULL DEFAULT 0,
+    completed_documents INTEGER NOT NULL DEFAULT 0,
+    total_chunks BIGINT NOT NULL DEFAULT 0,
+    searchable_chunks BIGINT NOT NULL DEFAULT 0,
+    content_chars BIGINT NOT NULL DEFAULT 0,
+    content_bytes BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE TYPE chunk_count_delta AS (
+    user_id TEXT,
+    document_id TEXT,
+    chunks INTEGER,
+    searchable_chunks INTEGER,
+    content_chars BIGINT,
+    content_bytes BIGINT
+);
+
+CREATE OR REPLACE FUNCTION apply_chunk_count_deltas(deltas chunk_count_delta[]) RETURNS void AS $$
+    WITH per_document AS (
+        SELECT user_id, document_id,
+               SUM(chunks) AS chunks,
+               SUM(searchable_chunks) AS searchable_chunks,
+               SUM(content_chars) AS content_chars,
+               SUM(content_bytes) AS content_bytes
+        FROM unnest(deltas)
+        GROUP BY user_id, document_id
+    ),
+    updated_documents AS (
+        UPDATE documents d
+        SET chunk_count = d.chunk_count + p.chunks,
+            content_chars = d.content_chars + p.content_chars,
+            content_bytes = d.content_bytes + p.content_bytes
+        FROM per_document p
+        WHERE d.id = p.document_id
+        AND (p.chunks <> 0 OR p.content_chars <> 0 OR p.content_bytes <> 0)
+    )
+    INSERT INTO user_stats AS s (user_id, total_chunks, searchable_chunks, content_chars, content_bytes)
+    SELECT user_id, SUM(chunks), SUM(searchable_chunks), SUM(content_chars), SUM(content_bytes)
+    FROM per_document
+    GROUP BY user_id
+    ON CONFLICT (user_id) DO UPDATE SET
+        total_chunks = s.total_chunks + EXCLUDED.total_chunks,
+        searchable_chunks = s.searchable_chunks + EXCLUDED.searchable_chunks,
+        content_chars = s.content_chars + EXCLUDED.content_chars,
+        content_bytes = s.content_bytes + EXCLUDED.content_bytes,
+        updated_at = NOW();
+$$ LANGUAGE sql;
+
+-- Updates count as removing the old rows and adding the new ones
+CREATE OR REPLACE FUNCTION count_chunk_changes() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM apply_chunk_count_deltas(ARRAY(
+            SELECT ROW(user_id, document_id, 1, searchable::int,
+                       char_length(content), octet_length(content))::chunk_count_delta
+            FROM new_chunks
+        ));
+    END IF;
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        PERFORM apply_chunk_count_deltas(ARRAY(
+            SELECT ROW(user_id, document_id, -1, -(searchable::int),
+                       -char_length(content), -octet_length(content))::chunk_count_delta
+            FROM old_chunks
+        ));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION count_document_changes() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO user_stats AS s (user_id, total_documents, completed_documents)
+        VALUES (NEW.user_id, 1, (NEW.status = 'completed')::int)
+        ON CONFLICT (user_id) DO UPDATE SET
+            total_documents = s.total_documents + 1,
+            completed_documents = s.completed_documents + EXCLUDED.completed_documents,
+            updated_at = NOW();
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE user_stats
+        SET total_documents = total_documents - 1,
+            completed_documents = completed_documents - (OLD.status = 'completed')::int,
+            updated_at = NOW()
+        WHERE user_id = OLD.user_id;
+    ELSIF (OLD.status = 'completed') IS DISTINCT FROM (NEW.status = 'completed') THEN
+        UPDATE user_stats
+        SET completed_documents = completed_documents + (NEW.status = 'completed')::int
+                                                      - (OLD.status = 'completed')::int,
+            updated_at = NOW()
+        WHERE user_id = NEW.user_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_documents_count ON documents;
+CREATE TRIGGER trg_documents_count
+AFTER INSERT OR DELETE OR UPDATE OF status ON documents
+FOR EACH ROW EXECUTE FUNCTION count_document_changes();
+""" + CHUNK_COUNTER_TRIGGERS_SQL + """
+-- Backfill from the existing rows
+WITH counts AS (
+    SELECT document_id,
+           COUNT(*) AS chunks,
+           SUM(char_length(content)) AS content_chars,
+           SUM(octet_length(content)) AS content_bytes
+    FROM document_chunks
+    GROUP BY document_id
+)
+UPDATE documents d
+SET chunk_count = counts.chunks,
+    content_chars = counts.content_chars,
+    content_bytes = counts.content_bytes
+FROM counts
+WHERE d.id = counts.document_id;
+
+INSERT INTO user_stats (user_id, total_documents, completed_documents, total_chunks, searchable_chunks,
+                        content_chars, content_bytes)
+SELECT docs.user_id, docs.total_documents, docs.completed_documents,
+       COALESCE(chunks.total_chunks, 0), COALESCE(chunks.searchable_chunks, 0),
+       COALESCE(chunks.content_chars, 0), COALESCE(chunks.content_bytes, 0)
+FROM (
+    SELECT user_id, COUNT(*) AS total_documents,
+           COUNT(*) FILTER (WHERE status = 'completed') AS completed_documents
+    FROM documents
+    GROUP BY user_id
+) docs
+LEFT JOIN (
+    SELECT user_id, COUNT(*) AS total_chunks,
+           COUNT(*) FILTER (WHERE searchable) AS searchable_chunks,
+           SUM(char_length(content)) AS content_chars,
+           SUM(octet_length(content)) AS content_bytes
+    FROM document_chunks
+    GROUP BY user_id
+) chunks ON chunks.user_id = docs.user_id
+ON CONFLICT (user_id) DO UPDATE SET
+    total_documents = EXCLUDED.total_documents,
+    completed_documents = EXCLUDED.completed_documents,
+    total_chunks = EXCLUDED.total_chunks,
+    searchable_chunks = EXCLUDED.searchable_chunks,
+    content_chars = EXCLUDED.content_chars,
+    content_bytes = EXCLUDED.content_bytes,
+    updated_at = NOW();
+"""
+
+# Version 5: keyset pagination of a user's documents, newest first, with and
+# without a status filter; the first also covers every user_id lookup the
+# single-column index served
+DOCUMENT_LISTING_INDEXES_SQL = """
+CREATE INDEX IF NOT EXISTS idx_documents_user_created ON documents(user_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_documents_user_status_created ON documents(user_id, status, created_at, id);
+DROP INDEX IF EXISTS idx_documents_user_id;
+"""
+
+# NOTIFY channel carrying the user_id whose searchable chunks changed
+TENANT_VECTORS_CHANNEL = "tenant_vectors_changed"
+
+# Version 6: tell every process (API workers, standalone ingestion workers)
+# when a tenant's searchable vectors change, so in-process tenant caches can
+# drop the tenant. Notifications are delivered on commit.
+TENANT_NOTIFY_SQL = """
+CREATE OR REPLACE FUNCTION notify_tenant_vectors_changed() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM pg_notify('tenant_vectors_changed', OLD.user_id);
+    ELSE
+        PERFORM pg_notify('tenant_vectors_changed', NEW.user_id);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_documents_notify_status ON documents;
+CREATE TRIGGER trg_documents_notify_status
+AFTER UPDATE OF status ON documents
+FOR EACH ROW
+WHEN (OLD.status IS DISTINCT FROM NEW.status)
+EXECUTE FUNCTION notify_tenant_vectors_changed();
+
+DROP TRIGGER IF EXISTS trg_documents_notify_delete ON documents;
+CREATE TRIGGER trg_documents_notify_delete
+AFTER DELETE ON documents
+FOR EACH ROW
+EXECUTE FUNCTION notify_tenant_vectors_changed();
+"""
+
+# (version, name, sql) in application order; never edit an applied entry, add a new one
+MIGRATIONS = [
+    (1, "baseline schema", BASELINE_SQL),
+    (2, "tenant columns on document_chunks", TENANT_COLUMNS_SQL),
+    (3, "full-text search on document_chunks", FULL_TEXT_SQL),
+    (4, "document and user counters", COUNTERS_SQL),
+    (5, "document listing indexes", DOCUMENT_LISTING_INDEXES_SQL),
+    (6, "tenant vector change notifications", TENANT_NOTIFY_SQL),
+]
+
+def get_chunk_partition_count(cur) -> int:
+    """Number of hash partitions of document_chunks (0 when it is a plain table)"""
+    cur.execute("""
+        SELECT COUNT(i.inhrelid) AS partitions
+        FROM pg_partitioned_table p
+        LEFT JOIN pg_inherits i ON i.inhparent = p.partrelid
+        WHERE p.partrelid = 'document_chunks'::regclass
+    """)
+    return cur.fetchone()['partitions']
+
+def partition_chunks_table(cur, partitions: int):
+    """
+    Convert document_chunks into a table hash-partitioned by user_id.
+
+    Rows are copied into a new partitioned table under an exclusive lock and
+    the tables are swapped, so run this in a maintenance window on large
+    tables. Each partition gets its own vector index when IndexManager next
+    builds it, and tenant-scoped queries are pruned to a single partition.
+    """
+    logger.warning(f"Converting document_chunks to {partitions} hash partitions by user_id")
+    cur.execute("LOCK TABLE document_chunks IN ACCESS EXCLUSIVE MODE")
+    cur.execute(
+        "CREATE TABLE document_chunks_partitioned (LIKE document_chunks INCLUDING DEFAULTS INCLUDING GENERATED) "
+        "PARTITION BY HASH (user_id)"
+    )
+    for remainder in range(partitions):
+        cur.execute(
+            f"CREATE TABLE document_chunks_p{remainder} PARTITION OF document_chunks_partitioned "
+            f"FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder})"
+        )
+    # Generated columns are recomputed on insert and cannot be copied
+    cur.execute("""
+        SELECT string_agg(quote_ident(column_name), ', ' ORDER BY ordinal_position) AS columns
+        FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = 'document_chunks' AND is_generated = 'NEVER'
+    """)
+    columns = cur.fetchone()['columns']
+    cur.execute(f"INSERT INTO document_chunks_partitioned ({columns}) SELECT {columns} FROM document_chunks")
+    cur.execute("DROP TABLE document_chunks")
+    cur.execute("ALTER TABLE document_chunks_partitioned RENAME TO document_chunks")
+    cur.execute("""
+        ALTER TABLE document_chunks
+            ADD PRIMARY KEY (user_id, id),
+            ADD FOREIGN KEY (document_id) REFERENCES documents(id) ON DELETE CASCADE;
+        CREATE UNIQUE INDEX idx_chunks_user_document_chunk ON document_chunks(user_id, document_id, chunk_index);
+        CREATE INDEX idx_chunks_document_id ON document_chunks(document_id);
+        CREATE INDEX idx_chunks_content_tsv ON document_chunks USING gin (content_tsv);
+    """)
+    # The copied rows are already counted; only new changes need the triggers
+    cur.execute(CHUNK_COUNTER_TRIGGERS_SQL)
+    logger.warning("document_chunks partitioned; the vector index will be rebuilt per partition")
+
+def get_embedding_storage(cur) -> str:
+    """Type of document_chunks.embedding without its dimension ('vector' or 'halfvec')"""
+    cur.execute("""
+        SELECT t.typname AS storage
+        FROM pg_attribute a
+        JOIN pg_type t ON t.oid = a.atttypid
+        WHERE a.attrelid = 'document_chunks'::regclass AND a.attname = 'embedding'
+    """)
+    return cur.fetchone()['storage']
+
+def convert_embedding_storage(cur, storage: str):
+    """
+    Rewrite document_chunks.embedding as ``storage`` ('vector' or 'halfvec').
+
+    The ANN indexes are dropped first because their operator classes are
+    type-specific; IndexManager rebuilds them concurrently at startup. The
+    rewrite holds an exclusive lock on the table for its duration.
+    """
+    if storage not in ('vector', 'halfvec'):
+        raise ValueError(f"Unsupported embedding storage: {storage}")
+
+    logger.warning(f"Converting document_chunks.embedding to {storage}({settings.embedding_dimension})")
+    cur.execute("""
+        SELECT c.relname AS name
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        JOIN pg_am am ON am.oid = c.relam
+        WHERE i.indrelid = 'document_chunks'::regclass AND am.amname IN ('hnsw', 'ivfflat')
+    """)
+    for row in cur.fetchall():
+        cur.execute(f"DROP INDEX IF EXISTS {row['name']}")
+    cur.execute(
+        f"ALTER TABLE document_chunks ALTER COLUMN embedding TYPE {storage}({settings.embedding_dimension}) "
+        f"USING embedding::{storage}({settings.embedding_dimension})"
+    )
+    logger.warning("Embedding storage converted; vector indexes will be rebuilt")
+
+def needs_partitioning(cur) -> bool:
+    """
+    Whether document_chunks still has to be partitioned for CHUNK_PARTITIONS.
+    A table already partitioned with a different count is left as it is
+    (repartitioning is not automatic), with a warning.
+    """
+    if settings.chunk_partitions <= 0:
+        return False
+    existing = get_chunk_partition_count(cur)
+    if existing and existing != settings.chunk_partitions:
+        logger.warning(
+            f"document_chunks has {existing} partitions but CHUNK_PARTITIONS is "
+            f"{settings.chunk_partitions}; repartitioning is not automatic"
+        )
+    return existing == 0
+
+def get_current_schema_version(cur) -> Optional[int]:
+    """
+    The applied schema version if nothing is left to do (no pending migration,
+    no partitioning to apply, embedding storage as configured), otherwise
+    None. Only reads the catalog: no DDL and no advisory lock.
+    """
+    cur.execute("SELECT to_regclass('schema_migrations') IS NOT NULL AS exists")
+    if not cur.fetchone()['exists']:
+        return None
+    cur.execute("SELECT COALESCE(MAX(version), 0) AS version FROM schema_migrations")
+    version = cur.fetchone()['version']
+    if version < MIGRATIONS[-1][0]:
+        return None
+    if needs_partitioning(cur):
+        return None
+    if get_embedding_storage(cur) != settings.embedding_storage:
+        return None
+    return version
+
+def run_migrations(db_manager) -> int:
+    """
+    Apply pending schema migrations, then the configured partitioning and
+    embedding storage; returns the schema version
+    """
+    with db_manager.get_connection() as conn:
+        with conn.cursor() as cur:
+            # Already current (the usual restart): skip the lock and the idempotent DDL
+            version = get_current_schema_version(cur)
+            if version is not None:
+                logger.info(f"Schema is current (version {version}); skipping migrations")
+                return version
+
+    with db_manager.get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_KEY,))
+            cur.execute(SCHEMA_MIGRATIONS_SQL)
+            cur.execute("SELECT COALESCE(MAX(version), 0) AS version FROM schema_migrations")
+            current_version = cur.fetchone()['version']
+
+            for version, name, sql in MIGRATIONS:
+                if version <= current_version:
+                    continue
+                logger.info(f"Applying schema migration {version}: {name}")
+                cur.execute(sql.format(
+                    embedding_dim=settings.embedding_dimension,
+                    text_search_config=settings.text_search_config
+                ))
+                cur.execute(
+                    "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                    (version, name)
+                )
+                current_version = version
+
+            if needs_partitioning(cur):
+                partition_chunks_table(cur, settings.chunk_partitions)
+
+            if get_embedding_storage(cur) != settings.embedding_storage:
+                convert_embedding_storage(cur, settings.embedding_storage)
+
+            return current_version
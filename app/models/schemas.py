@@ -25,6 +25,14 @@ class QueryRequest(BaseModel):
     document_ids: Optional[List[str]] = None  # Filter by specific documents
     top_k: int = 5
     similarity_threshold: float = 0.3
+    probes: Optional[int] = None  # IVFFlat lists to scan (higher = better recall, slower)
+    ef_search: Optional[int] = None  # HNSW candidate list size (higher = better recall, slower)
+    mode: Optional[str] = None  # 'vector' or 'hybrid' (vector + full-text); defaults to SEARCH_DEFAULT_MODE
+    vector_weight: Optional[float] = None  # Hybrid fusion weights; default to HYBRID_*_WEIGHT
+    lexical_weight: Optional[float] = None
+    rerank: bool = False  # Rescore candidates with a cross-encoder and return the best top_k
+    rerank_candidates: Optional[int] = None  # Candidates to rerank; defaults to RERANKER_CANDIDATES
+    rerank_budget_ms: Optional[float] = None  # Latency budget; defaults to RERANKER_BUDGET_MS
     
     @validator('query')
     def query_must_not_be_empty(cls, v):
@@ -39,6 +47,95 @@ class QueryRequest(BaseModel):
         if v > 20:
             raise ValueError('top_k cannot exceed 20')
         return v
+    
+    @validator('probes', 'ef_search')
+    def search_knobs_in_range(cls, v):
+        if v is not None and not 1 <= v <= 1000:
+            raise ValueError('probes and ef_search must be between 1 and 1000')
+        return v
+    
+    @validator('mode')
+    def mode_must_be_supported(cls, v):
+        if v is not None and v not in ('vector', 'hybrid'):
+            raise ValueError("mode must be 'vector' or 'hybrid'")
+        return v
+    
+    @validator('vector_weight', 'lexical_weight')
+    def weights_must_not_be_negative(cls, v):
+        if v is not None and v < 0:
+            raise ValueError('Fusion weights cannot be negative')
+        return v
+    
+    @validator('rerank_candidates')
+    def rerank_candidates_in_range(cls, v):
+        if v is not None and not 1 <= v <= 200:
+            raise ValueError('rerank_candidates must be between 1 and 200')
+        return v
+    
+    @validator('rerank_budget_ms')
+    def rerank_budget_must_be_positive(cls, v):
+        if v is not None and v <= 0:
+            raise ValueError('rerank_budget_ms must be positive')
+        return v
+
+class BatchQuery(BaseModel):
+    query: str
+    top_k: Optional[int] = None  # Defaults to the batch's top_k
+    similarity_threshold: Optional[float] = None  # Defaults to the batch's similarity_threshold
+    
+    @validator('query')
+    def strip_query(cls, v):
+        return v.strip() if v else ''
+    
+    @validator('top_k')
+    def top_k_must_be_positive(cls, v):
+        if v is not None and not 1 <= v <= 20:
+            raise ValueError('top_k must be between 1 and 20')
+        return v
+
+class BatchSearchRequest(BaseModel):
+    queries: List[BatchQuery]  # Blank queries are skipped
+    user_id: str
+    document_ids: Optional[List[str]] = None  # Filter by specific documents
+    top_k: int = 3
+    similarity_threshold: float = 0.3
+    probes: Optional[int] = None
+    ef_search: Optional[int] = None
+    
+    @validator('queries', pre=True, each_item=True)
+    def plain_strings_are_queries(cls, v):
+        return {'query': v} if isinstance(v, str) else v
+    
+    @validator('top_k')
+    def top_k_must_be_positive(cls, v):
+        if not 1 <= v <= 20:
+            raise ValueError('top_k must be between 1 and 20')
+        return v
+    
+    @validator('probes', 'ef_search')
+    def search_knobs_in_range(cls, v):
+        if v is not None and not 1 <= v <= 1000:
+            raise ValueError('probes and ef_search must be between 1 and 1000')
+        return v
+
+class IndexRebuildRequest(BaseModel):
+    index_type: Optional[str] = None  # 'hnsw' or 'ivfflat'; defaults to VECTOR_INDEX_TYPE
+    lists: Optional[int] = None  # IVFFlat; derived from the row count when omitted
+    m: Optional[int] = None  # HNSW
+    ef_construction: Optional[int] = None  # HNSW
+    binary: bool = False  # Rebuild the binary-quantized (Hamming) index instead of the main one
+    
+    @validator('index_type')
+    def index_type_must_be_supported(cls, v):
+        if v is not None and v not in ('hnsw', 'ivfflat'):
+            raise ValueError("index_type must be 'hnsw' or 'ivfflat'")
+        return v
+    
+    @validator('lists', 'm', 'ef_construction')
+    def build_parameters_must_be_positive(cls, v):
+        if v is not None and v <= 0:
+            raise ValueError('Index build parameters must be positive')
+        return v
 
 # Response Models
 class DocumentChunk(BaseModel):
@@ -58,6 +155,7 @@ class DocumentProcessResponse(BaseModel):
     success: bool
     document_id: str
     processing_status: ProcessingStatus
+    job_id: Optional[str] = None
     chunks_created: Optional[int] = None
 
 class RelevantChunk(BaseModel):
@@ -74,6 +172,19 @@ class QueryResponse(BaseModel):
     relevant_chunks: List[RelevantChunk]
     total_chunks_found: int
     search_time: Optional[float] = None
+    mode: Optional[str] = None
+    timings: Optional[Dict[str, Any]] = None  # Per-leg timings and candidate counts (hybrid mode)
+    rerank: Optional[Dict[str, Any]] = None  # Rerank outcome when requested (fallback reason, timing)
+
+class BatchQueryResult(BaseModel):
+    query: str
+    relevant_chunks: List[RelevantChunk]
+    chunks_found: int
+
+class BatchSearchResponse(BaseModel):
+    batch_results: List[BatchQueryResult]
+    total_queries: int
+    search_time: Optional[float] = None
 
 # Error Models
 class ErrorDetail(BaseModel):
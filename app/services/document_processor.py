@@ -1,15 +1,20 @@
 import httpx
 import logging
-from typing import List, Tuple
-import PyPDF2
-from docx import Document
-import io
+from typing import Iterator, List, Optional, Tuple, Union
 import uuid
 from app.config import settings
-from app.utils.text_processing import TextChunker
+from app.utils.file_utils import SpooledFile, open_binary_stream
+from app.utils.text_processing import TextChunker, content_hash
+from app.services.pdf_extractor import pdf_extractor
 
 logger = logging.getLogger(__name__)
 
+# Raw bytes or a downloaded body spooled to memory/disk
+FileContent = Union[bytes, SpooledFile]
+
+# Namespace for deterministic chunk ids
+CHUNK_ID_NAMESPACE = uuid.UUID("6f1c2a64-3b5e-5d8a-9c7f-2e4b1d0a8c35")
+
 class DocumentProcessor:
     def __init__(self):
         self.text_chunker = TextChunker(
@@ -17,93 +22,185 @@ class DocumentProcessor:
             chunk_overlap=settings.chunk_overlap
         )
         self.max_file_size = settings.max_file_size_mb * 1024 * 1024  # Convert to bytes
+        self.spool_threshold = settings.download_spool_threshold_mb * 1024 * 1024
+        self.download_chunk_size = settings.download_chunk_size_kb * 1024
+        self.pdf_extractor = pdf_extractor
     
-    async def download_file(self, file_url: str) -> bytes:
-        """Download file from URL"""
+    async def download_file(self, file_url: str, suffix: str = "") -> SpooledFile:
+        """
+        Stream a file from a URL, aborting as soon as it exceeds the size limit.
+        Bodies larger than the spool threshold are written to a temporary file;
+        the caller must close the returned SpooledFile.
+        """
+        spooled = SpooledFile(
+            spool_threshold=self.spool_threshold,
+            max_size=self.max_file_size,
+            directory=settings.download_temp_dir,
+            suffix=suffix
+        )
         try:
             async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(file_url)
-                response.raise_for_status()
-                
-                # Check file size
-                content_length = response.headers.get('content-length')
-                if content_length and int(content_length) > self.max_file_size:
-                    raise ValueError(f"File size exceeds maximum allowed size of {settings.max_file_size_mb}MB")
-                
-                file_content = response.content
-                
-                # Double-check actual file size
-                if len(file_content) > self.max_file_size:
-                    raise ValueError(f"File size exceeds maximum allowed size of {settings.max_file_size_mb}MB")
-                
-                return file_content
-                
+                async with client.stream("GET", file_url) as response:
+                    response.raise_for_status()
+                    
+                    # Reject early when the server announces an oversized body
+                    content_length = response.headers.get('content-length')
+                    if content_length and int(content_length) > self.max_file_size:
+                        raise ValueError(f"File size exceeds maximum allowed size of {settings.max_file_size_mb}MB")
+                    
+                    # Enforce the limit incrementally in case Content-Length is missing or wrong
+                    async for data in response.aiter_bytes(self.download_chunk_size):
+                        spooled.write(data)
+            
+            return spooled
+            
         except httpx.RequestError as e:
+            spooled.close()
             logger.error(f"Failed to download file from {file_url}: {e}")
             raise ValueError(f"Failed to download file: {str(e)}")
         except httpx.HTTPStatusError as e:
+            spooled.close()
             logger.error(f"HTTP error downloading file from {file_url}: {e}")
             raise ValueError(f"HTTP error: {e.response.status_code}")
+        except Exception:
+            spooled.close()
+            raise
     
-    def extract_text_from_pdf(self, file_content: bytes) -> str:
-        """Extract text from PDF file"""
+    def iter_pdf_page_texts(self, file_content: FileContent) -> Iterator[Tuple[int, str]]:
+        """
+        Yield (page_number, text) for each PDF page with text, in page order.
+        Large spooled documents are extracted in parallel across worker processes.
+        """
+        import PyPDF2
+        
         try:
-            pdf_file = io.BytesIO(file_content)
+            pdf_file = open_binary_stream(file_content)
             pdf_reader = PyPDF2.PdfReader(pdf_file)
-            
-            text_content = []
+            page_count = len(pdf_reader.pages)
+        except Exception as e:
+            logger.error(f"PDF text extraction failed: {e}")
+            raise ValueError(f"Failed to extract text from PDF: {str(e)}")
+        
+        found_text = False
+        if isinstance(file_content, SpooledFile) and self.pdf_extractor.should_parallelize(page_count):
+            # Worker processes open the document from disk
+            file_content.rollover()
+            for page_number, page_text in self.pdf_extractor.iter_pages(file_content.path, page_count):
+                found_text = True
+                yield page_number, page_text
+        else:
             for page_num, page in enumerate(pdf_reader.pages):
                 try:
                     page_text = page.extract_text()
-                    if page_text.strip():
-                        text_content.append(page_text)
                 except Exception as e:
                     logger.warning(f"Failed to extract text from page {page_num}: {e}")
                     continue
-            
-            full_text = "\n\n".join(text_content)
-            
-            if not full_text.strip():
-                raise ValueError("No text could be extracted from the PDF")
-            
-            return full_text
-            
+                if page_text.strip():
+                    found_text = True
+                    yield page_num + 1, page_text
+        
+        if not found_text:
+            raise ValueError("Failed to extract text from PDF: No text could be extracted from the PDF")
+    
+    def iter_pdf_pages(self, file_content: FileContent) -> Iterator[str]:
+        """Yield the text of each PDF page as it is extracted"""
+        for _, page_text in self.iter_pdf_page_texts(file_content):
+            yield page_text
+    
+    def extract_text_from_pdf(self, file_content: FileContent) -> str:
+        """Extract text from PDF file"""
+        try:
+            return "\n\n".join(self.iter_pdf_pages(file_content))
+        except ValueError:
+            raise
         except Exception as e:
             logger.error(f"PDF text extraction failed: {e}")
             raise ValueError(f"Failed to extract text from PDF: {str(e)}")
     
-    def extract_text_from_docx(self, file_content: bytes) -> str:
-        """Extract text from DOCX file"""
+    def iter_docx_blocks(self, file_content: FileContent) -> Iterator[str]:
+        """Yield the text of each DOCX paragraph and table row"""
+        from docx import Document
+        
         try:
-            docx_file = io.BytesIO(file_content)
+            docx_file = open_binary_stream(file_content)
             document = Document(docx_file)
-            
-            text_content = []
-            for paragraph in document.paragraphs:
-                if paragraph.text.strip():
-                    text_content.append(paragraph.text)
-            
-            # Also extract text from tables
-            for table in document.tables:
-                for row in table.rows:
-                    row_text = []
-                    for cell in row.cells:
-                        if cell.text.strip():
-                            row_text.append(cell.text.strip())
-                    if row_text:
-                        text_content.append(" | ".join(row_text))
-            
-            full_text = "\n\n".join(text_content)
-            
-            if not full_text.strip():
-                raise ValueError("No text could be extracted from the DOCX")
-            
-            return full_text
-            
+        except Exception as e:
+            logger.error(f"DOCX text extraction failed: {e}")
+            raise ValueError(f"Failed to extract text from DOCX: {str(e)}")
+        
+        found_text = False
+        for paragraph in document.paragraphs:
+            if paragraph.text.strip():
+                found_text = True
+                yield paragraph.text
+        
+        # Also extract text from tables
+        for table in document.tables:
+            for row in table.rows:
+                row_text = []
+                for cell in row.cells:
+                    if cell.text.strip():
+                        row_text.append(cell.text.strip())
+                if row_text:
+                    found_text = True
+                    yield " | ".join(row_text)
+        
+        if not found_text:
+            raise ValueError("Failed to extract text from DOCX: No text could be extracted from the DOCX")
+    
+    def extract_text_from_docx(self, file_content: FileContent) -> str:
+        """Extract text from DOCX file"""
+        try:
+            return "\n\n".join(self.iter_docx_blocks(file_content))
+        except ValueError:
+            raise
         except Exception as e:
             logger.error(f"DOCX text extraction failed: {e}")
             raise ValueError(f"Failed to extract text from DOCX: {str(e)}")
     
+    def iter_text(self, file_content: FileContent, file_type: str) -> Iterator[str]:
+        """Yield extracted text pieces (pages, paragraphs) for a supported file type"""
+        for _, text in self.iter_pages(file_content, file_type):
+            yield text
+    
+    def iter_pages(self, file_content: FileContent, file_type: str) -> Iterator[Tuple[Optional[int], str]]:
+        """
+        Yield (page_number, text) pieces for a supported file type;
+        page_number is None for formats without pages (DOCX)
+        """
+        if file_type.lower() == 'pdf':
+            return self.iter_pdf_page_texts(file_content)
+        elif file_type.lower() == 'docx':
+            return ((None, block) for block in self.iter_docx_blocks(file_content))
+        else:
+            raise ValueError(f"Unsupported file type: {file_type}")
+    
+    def build_chunk_data(self, document_id: str, chunk_index: int, chunk: str,
+                         page_start: Optional[int] = None, page_end: Optional[int] = None) -> dict:
+        """
+        Prepare a chunk record for embedding and storage. The chunk is content-addressed:
+        its hash covers the normalized text and embedding model, and its id is derived
+        from the document, position and hash, so reprocessing unchanged text yields the
+        same id and lets the stored embedding be reused.
+        """
+        chunk_hash = content_hash(chunk, settings.embedding_model_name)
+        metadata = {
+            'char_count': len(chunk),
+            'word_count': len(chunk.split())
+        }
+        if page_start is not None:
+            metadata['page_start'] = page_start
+            metadata['page_end'] = page_end
+        
+        return {
+            'chunk_id': str(uuid.uuid5(CHUNK_ID_NAMESPACE, f"{document_id}:{chunk_index}:{chunk_hash}")),
+            'document_id': document_id,
+            'content': chunk,
+            'chunk_index': chunk_index,
+            'content_hash': chunk_hash,
+            'metadata': metadata
+        }
+    
     async def process_document(self, file_url: str, file_type: str, 
                               document_id: str) -> Tuple[str, List[dict]]:
         """
@@ -113,15 +210,14 @@ class DocumentProcessor:
         try:
             # Download file
             logger.info(f"Downloading file from: {file_url}")
-            file_content = await self.download_file(file_url)
-            
-            # Extract text based on file type
-            if file_type.lower() == 'pdf':
-                text = self.extract_text_from_pdf(file_content)
-            elif file_type.lower() == 'docx':
-                text = self.extract_text_from_docx(file_content)
-            else:
-                raise ValueError(f"Unsupported file type: {file_type}")
+            with await self.download_file(file_url) as file_content:
+                # Extract text based on file type
+                if file_type.lower() == 'pdf':
+                    text = self.extract_text_from_pdf(file_content)
+                elif file_type.lower() == 'docx':
+                    text = self.extract_text_from_docx(file_content)
+                else:
+                    raise ValueError(f"Unsupported file type: {file_type}")
             
             logger.info(f"Extracted {len(text)} characters from {file_type} file")
             
@@ -130,19 +226,10 @@ class DocumentProcessor:
             logger.info(f"Created {len(chunks)} chunks from document")
             
             # Prepare chunks data for database
-            chunks_data = []
-            for i, chunk in enumerate(chunks):
-                chunk_data = {
-                    'chunk_id': str(uuid.uuid4()),
-                    'document_id': document_id,
-                    'content': chunk,
-                    'chunk_index': i,
-                    'metadata': {
-                        'char_count': len(chunk),
-                        'word_count': len(chunk.split())
-                    }
-                }
-                chunks_data.append(chunk_data)
+            chunks_data = [
+                self.build_chunk_data(document_id, i, chunk)
+                for i, chunk in enumerate(chunks)
+            ]
             
             return text, chunks_data
             
@@ -0,0 +1,188 @@
+import numpy as np
+from abc import ABC, abstractmethod
+import json
+import logging
+from pathlib import Path
+from typing import List, Union
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
+
+# Files written by scripts/export_onnx_model.py into EMBEDDING_ONNX_DIR
+ONNX_MODEL_FILE = "model.onnx"
+ONNX_INT8_MODEL_FILE = "model_int8.onnx"
+ONNX_MANIFEST_FILE = "manifest.json"
+TOKENIZER_FILE = "tokenizer.json"
+
+def pool_embeddings(token_embeddings: np.ndarray, attention_mask: np.ndarray,
+                    mode: str = "mean", normalize: bool = True) -> np.ndarray:
+    """
+    Sentence embeddings from token embeddings (batch, tokens, dim), the same
+    way sentence-transformers' Pooling and Normalize modules compute them
+    """
+    mask = attention_mask[..., None].astype(np.float32)
+    if mode == "mean":
+        summed = (token_embeddings * mask).sum(axis=1)
+        embeddings = summed / np.clip(mask.sum(axis=1), 1e-9, None)
+    elif mode == "cls":
+        embeddings = token_embeddings[:, 0]
+    elif mode == "max":
+        embeddings = np.where(mask > 0, token_embeddings, -1e9).max(axis=1)
+    else:
+        raise ValueError(f"Unsupported pooling mode: {mode}")
+
+    embeddings = embeddings.astype(np.float32)
+    if normalize:
+        embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+    return embeddings
+
+def sentence_transformer_config(model) -> dict:
+    """Tokenizer/pooling settings of a loaded SentenceTransformer, shared by every backend"""
+    pooling = next(module for module in model if type(module).__name__ == "Pooling")
+    if pooling.pooling_mode_cls_token:
+        mode = "cls"
+    elif pooling.pooling_mode_max_tokens:
+        mode = "max"
+    else:
+        mode = "mean"
+    return {
+        "pooling": mode,
+        "normalize": any(type(module).__name__ == "Normalize" for module in model),
+        "max_seq_length": model.max_seq_length,
+        "dimension": model.get_sentence_embedding_dimension(),
+        "pad_token_id": model.tokenizer.pad_token_id or 0
+    }
+
+class _TokenizedBackend(ABC):
+    """
+    Shared tokenization, batching and pooling around a transformer forward
+    pass; subclasses only provide ``_forward`` (token embeddings as numpy)
+    """
+
+    name = None
+
+    def _configure(self, tokenizer, config: dict):
+        self.tokenizer = tokenizer
+        self.pooling = config["pooling"]
+        self.normalize = config["normalize"]
+        self.max_seq_length = config["max_seq_length"]
+        self.dimension = config["dimension"]
+        self.tokenizer.enable_truncation(max_length=self.max_seq_length)
+        self.tokenizer.enable_padding(pad_id=config["pad_token_id"])
+
+    @abstractmethod
+    def _forward(self, inputs: dict) -> np.ndarray:
+        """Token embeddings (batch, tokens, dimension) for tokenized inputs"""
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        inputs = {
+            "input_ids": np.array([encoding.ids for encoding in encodings], dtype=np.int64),
+            "attention_mask": np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64),
+            "token_type_ids": np.array([encoding.type_ids for encoding in encodings], dtype=np.int64)
+        }
+        token_embeddings = self._forward(inputs)
+        return pool_embeddings(token_embeddings, inputs["attention_mask"], self.pooling, self.normalize)
+
+    def encode(self, texts: Union[str, List[str]], batch_size: int = 32,
+               normalize_embeddings: bool = False, **kwargs) -> np.ndarray:
+        """Same contract as SentenceTransformer.encode (numpy output; display and device options are ignored)"""
+        single = isinstance(texts, str)
+        if single:
+            texts = [texts]
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+
+        # Batch similar lengths together so padding stays short, then restore order
+        order = np.argsort([-len(text) for text in texts], kind="stable")
+        embeddings = np.empty((len(texts), self.dimension), dtype=np.float32)
+        for start in range(0, len(texts), batch_size):
+            batch = order[start:start + batch_size]
+            embeddings[batch] = self._encode_batch([texts[i] for i in batch])
+
+        if normalize_embeddings and not self.normalize:
+            embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return embeddings[0] if single else embeddings
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+class TorchEmbeddingBackend:
+    """
+    SentenceTransformer.encode itself, so vectors match those already stored;
+    the reference the ONNX exports are verified against
+    """
+
+    name = "torch"
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+
+        self.sentence_model = SentenceTransformer(model_name)
+        self.max_seq_length = self.sentence_model.max_seq_length
+
+    def encode(self, texts: Union[str, List[str]], lane: str = None, **kwargs) -> np.ndarray:
+        """SentenceTransformer.encode with all its options; ``lane`` only matters for the embedding server"""
+        return self.sentence_model.encode(texts, **kwargs)
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.sentence_model.get_sentence_embedding_dimension()
+
+class OnnxEmbeddingBackend(_TokenizedBackend):
+    """
+    An exported ONNX graph of the transformer run with onnxruntime; neither
+    torch nor transformers is imported. ``quantized`` selects the dynamically
+    int8-quantized graph. scripts/export_onnx_model.py writes the graphs, the
+    tokenizer and the pooling settings, and records how closely each graph's
+    vectors match the torch backend.
+    """
+
+    def __init__(self, model_dir: str, model_name: str, quantized: bool = False, threads: int = 0):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        model_dir = Path(model_dir)
+        manifest_path = model_dir / ONNX_MANIFEST_FILE
+        if not manifest_path.exists():
+            raise RuntimeError(
+                f"No exported ONNX model in {model_dir}; run python -m scripts.export_onnx_model first"
+            )
+        self.manifest = json.loads(manifest_path.read_text())
+        if self.manifest["model_name"] != model_name:
+            raise RuntimeError(
+                f"ONNX export in {model_dir} is for {self.manifest['model_name']}, not {model_name}"
+            )
+
+        self.name = "onnx-int8" if quantized else "onnx"
+        self._configure(Tokenizer.from_file(str(model_dir / TOKENIZER_FILE)), self.manifest)
+
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        model_file = ONNX_INT8_MODEL_FILE if quantized else ONNX_MODEL_FILE
+        self.session = onnxruntime.InferenceSession(
+            str(model_dir / model_file), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+        verification = self.manifest.get("verification", {}).get(self.name)
+        if verification:
+            logger.info(f"{self.name} export verified against torch: min cosine {verification['min_cosine']:.6f}")
+
+    def _forward(self, inputs: dict) -> np.ndarray:
+        return self.session.run(None, {name: value for name, value in inputs.items() if name in self.input_names})[0]
+
+def create_embedding_backend(backend: str, model_name: str):
+    """Instantiate the configured embedding backend"""
+    if backend == "torch":
+        return TorchEmbeddingBackend(model_name)
+    if backend in ("onnx", "onnx-int8"):
+        return OnnxEmbeddingBackend(
+            settings.embedding_onnx_dir,
+            model_name,
+            quantized=backend == "onnx-int8",
+            threads=settings.embedding_onnx_threads
+        )
+    raise ValueError(f"Unsupported embedding backend: {backend} (expected one of {', '.join(EMBEDDING_BACKENDS)})")
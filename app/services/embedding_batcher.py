@@ -0,0 +1,208 @@
+import asyncio
+import logging
+import time
+from typing import List
+from app.config import settings
+from app.services.embedding_executor import embedding_executor
+from app.services.embedding_cache import embedding_cache
+
+logger = logging.getLogger(__name__)
+
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent query-embedding requests into batched encode calls.
+
+    Texts that arrive within ``window_ms`` of the first queued text (up to
+    ``max_batch_size``) are encoded together and each caller receives its own
+    vector. While batches are being encoded in the executor's query lane (at
+    most ``max_concurrent_batches`` at a time), new requests keep queueing and
+    form the next batch.
+    """
+
+    def __init__(self, embedding_executor, embedding_cache, window_ms: float = 5.0,
+                 max_batch_size: int = 32, max_concurrent_batches: int = 1,
+                 enabled: bool = True):
+        self.embedding_executor = embedding_executor
+        self.embedding_cache = embedding_cache
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self.max_concurrent_batches = max_concurrent_batches
+        self.enabled = enabled
+
+        self._queue = None
+        self._batch_full = None
+        self._inflight = None
+        self._worker = None
+        self._loop = None
+
+        # Metrics
+        self._batches = 0
+        self._items = 0
+        self._max_batch = 0
+        self._queue_wait_total = 0.0
+        self._queue_wait_max = 0.0
+        self._encode_time_total = 0.0
+
+    def _ensure_worker(self):
+        """Start the batching task on the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._batch_full = asyncio.Event()
+            self._inflight = asyncio.Semaphore(self.max_concurrent_batches)
+            self._worker = loop.create_task(self._run())
+
+    async def _encode(self, texts: List[str]) -> List[List[float]]:
+        """Run one batched encode in the executor's query lane"""
+        return await self.embedding_executor.encode_queries(texts)
+
+    async def embed(self, text: str) -> List[float]:
+        """Get the embedding for a single query text"""
+        if not text or not text.strip():
+            raise ValueError("Text cannot be empty")
+
+        cached = await self.embedding_cache.aget(text)
+        if cached is not None:
+            return cached
+
+        if not self.enabled:
+            embedding = (await self._encode([text]))[0]
+        else:
+            self._ensure_worker()
+            future = self._loop.create_future()
+            await self._queue.put((text, future, time.monotonic()))
+            if self._queue.qsize() >= self.max_batch_size - 1:
+                self._batch_full.set()
+            embedding = await future
+
+        await self.embedding_cache.aput(text, embedding)
+        return embedding
+
+    async def embed_many(self, texts: List[str]) -> List[List[float]]:
+        """
+        Get embeddings for a list of query texts, encoding every cache miss in
+        a single call (duplicates once) instead of one queued request per text
+        """
+        if any(not text or not text.strip() for text in texts):
+            raise ValueError("Text cannot be empty")
+
+        embeddings = [await self.embedding_cache.aget(text) for text in texts]
+        missing = list(dict.fromkeys(text for text, embedding in zip(texts, embeddings) if embedding is None))
+
+        if missing:
+            encoded = dict(zip(missing, await self._encode(missing)))
+            for text, embedding in encoded.items():
+                await self.embedding_cache.aput(text, embedding)
+            embeddings = [
+                embedding if embedding is not None else encoded[text]
+                for text, embedding in zip(texts, embeddings)
+            ]
+
+        return embeddings
+
+    async def _collect_batch(self) -> list:
+        """Wait for the first request, then gather more until the window closes"""
+        batch = [await self._queue.get()]
+
+        # Hold the batch open for the window unless enough requests are already queued
+        if self.window > 0 and self._queue.qsize() < self.max_batch_size - 1:
+            self._batch_full.clear()
+            try:
+                await asyncio.wait_for(self._batch_full.wait(), self.window)
+            except asyncio.TimeoutError:
+                pass
+
+        while len(batch) < self.max_batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+
+        return batch
+
+    async def _run(self):
+        """Batching loop"""
+        while True:
+            # Wait for a free slot first so requests keep accumulating meanwhile
+            await self._inflight.acquire()
+            try:
+                batch = await self._collect_batch()
+            except BaseException:
+                self._inflight.release()
+                raise
+
+            batch = [item for item in batch if not item[1].done()]
+            if not batch:
+                self._inflight.release()
+                continue
+
+            self._loop.create_task(self._process_batch(batch))
+
+    async def _process_batch(self, batch: list):
+        """Encode one batch and resolve its callers"""
+        try:
+            started = time.monotonic()
+            for _, _, enqueued_at in batch:
+                wait = started - enqueued_at
+                self._queue_wait_total += wait
+                self._queue_wait_max = max(self._queue_wait_max, wait)
+
+            # Identical texts in one batch are encoded once
+            unique_texts = list(dict.fromkeys(text for text, _, _ in batch))
+            try:
+                unique_embeddings = await self._encode(unique_texts)
+            except Exception as e:
+                logger.error(f"Batched query embedding failed: {e}")
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+
+            self._encode_time_total += time.monotonic() - started
+            embeddings_by_text = dict(zip(unique_texts, unique_embeddings))
+            embeddings = [embeddings_by_text[text] for text, _, _ in batch]
+            self._batches += 1
+            self._items += len(batch)
+            self._max_batch = max(self._max_batch, len(batch))
+
+            for (_, future, _), embedding in zip(batch, embeddings):
+                if not future.done():
+                    future.set_result(embedding)
+        finally:
+            self._inflight.release()
+
+    async def stop(self):
+        """Cancel the batching task"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    def get_stats(self) -> dict:
+        """Batch-size and queue-wait metrics"""
+        return {
+            "enabled": self.enabled,
+            "window_ms": self.window * 1000,
+            "max_batch_size": self.max_batch_size,
+            "max_concurrent_batches": self.max_concurrent_batches,
+            "batches": self._batches,
+            "items": self._items,
+            "avg_batch_size": round(self._items / self._batches, 2) if self._batches else 0.0,
+            "max_observed_batch_size": self._max_batch,
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "avg_queue_wait_ms": round(self._queue_wait_total / self._items * 1000, 3) if self._items else 0.0,
+            "max_queue_wait_ms": round(self._queue_wait_max * 1000, 3),
+            "avg_encode_ms": round(self._encode_time_total / self._batches * 1000, 3) if self._batches else 0.0
+        }
+
+# Global embedding batcher instance
+embedding_batcher = EmbeddingBatcher(
+    embedding_executor,
+    embedding_cache,
+    window_ms=settings.embedding_batch_window_ms,
+    max_batch_size=settings.embedding_batch_max_size,
+    max_concurrent_batches=settings.embedding_query_workers,
+    # With a shared embedding server the server batches across workers; a second window here only adds latency
+    enabled=settings.embedding_batching_enabled and settings.embedding_mode == "local"
+)
@@ -0,0 +1,144 @@
+import numpy as np
+import asyncio
+import logging
+from typing import List, Optional
+from app.config import settings
+from app.utils.lru_cache import BoundedLRUCache
+from app.utils.text_processing import content_hash
+
+logger = logging.getLogger(__name__)
+
+class EmbeddingCache:
+    """
+    Query-embedding cache keyed on normalized text and model name.
+
+    A bounded in-process LRU (entry cap, memory cap, TTL) sits in front of an
+    optional shared Redis backend so several workers can reuse each other's
+    results. Vectors are stored as float32 to keep the memory footprint small.
+    """
+
+    def __init__(self, model_name: str, max_entries: int = 10000, max_mb: float = 64,
+                 ttl_seconds: float = 3600, enabled: bool = True, redis_url: Optional[str] = None):
+        self.model_name = model_name
+        self.enabled = enabled
+        self.ttl_seconds = ttl_seconds
+        self._local = BoundedLRUCache(
+            max_entries=max_entries,
+            max_bytes=int(max_mb * 1024 * 1024),
+            ttl_seconds=ttl_seconds,
+            sizeof=lambda vector: vector.nbytes
+        )
+
+        self._shared = None
+        self.shared_hits = 0
+        self.shared_errors = 0
+        if enabled and redis_url:
+            self._shared = self._connect_shared(redis_url)
+
+    @staticmethod
+    def _connect_shared(redis_url: str):
+        """Connect to the shared Redis backend, if the client library is installed"""
+        try:
+            import redis
+        except ImportError:
+            logger.warning("EMBEDDING_CACHE_REDIS_URL is set but the redis package is not installed; "
+                           "using the in-process cache only")
+            return None
+
+        return redis.Redis.from_url(redis_url, socket_timeout=0.1, socket_connect_timeout=0.5)
+
+    def make_key(self, text: str) -> str:
+        """Cache key for a text under the current model"""
+        return f"emb:{content_hash(text, self.model_name)}"
+
+    def get_local(self, key: str) -> Optional[List[float]]:
+        """Look up the in-process cache only"""
+        if not self.enabled:
+            return None
+        vector = self._local.get(key)
+        return vector.tolist() if vector is not None else None
+
+    def get_shared(self, key: str) -> Optional[List[float]]:
+        """Look up the shared backend and promote hits into the local cache"""
+        if self._shared is None:
+            return None
+        try:
+            payload = self._shared.get(key)
+        except Exception as e:
+            self.shared_errors += 1
+            logger.warning(f"Shared embedding cache lookup failed: {e}")
+            return None
+
+        if payload is None:
+            return None
+
+        vector = np.frombuffer(payload, dtype=np.float32)
+        self._local.put(key, vector)
+        self.shared_hits += 1
+        return vector.tolist()
+
+    def get(self, text: str) -> Optional[List[float]]:
+        """Look up an embedding, local cache first"""
+        if not self.enabled:
+            return None
+        key = self.make_key(text)
+        return self.get_local(key) or self.get_shared(key)
+
+    def put(self, text: str, embedding: List[float]):
+        """Store an embedding locally and in the shared backend"""
+        if not self.enabled:
+            return
+        key = self.make_key(text)
+        vector = np.asarray(embedding, dtype=np.float32)
+        self._local.put(key, vector)
+
+        if self._shared is not None:
+            try:
+                self._shared.set(key, vector.tobytes(), ex=int(self.ttl_seconds) or None)
+            except Exception as e:
+                self.shared_errors += 1
+                logger.warning(f"Shared embedding cache write failed: {e}")
+
+    async def aget(self, text: str) -> Optional[List[float]]:
+        """Async lookup; shared backend I/O runs off the event loop"""
+        if not self.enabled:
+            return None
+        key = self.make_key(text)
+        embedding = self.get_local(key)
+        if embedding is None and self._shared is not None:
+            embedding = await asyncio.get_running_loop().run_in_executor(None, self.get_shared, key)
+        return embedding
+
+    async def aput(self, text: str, embedding: List[float]):
+        """Async store; shared backend I/O runs off the event loop"""
+        if not self.enabled:
+            return
+        if self._shared is None:
+            self.put(text, embedding)
+        else:
+            await asyncio.get_running_loop().run_in_executor(None, self.put, text, embedding)
+
+    def clear(self):
+        """Drop all locally cached embeddings"""
+        self._local.clear()
+
+    def get_stats(self) -> dict:
+        """Hit/miss, eviction and occupancy metrics"""
+        return {
+            "enabled": self.enabled,
+            "model_name": self.model_name,
+            **self._local.get_stats(),
+            "shared_backend": "redis" if self._shared is not None else None,
+            "shared_hits": self.shared_hits,
+            "shared_errors": self.shared_errors
+        }
+
+# Global embedding cache instance
+embedding_cache = EmbeddingCache(
+    settings.embedding_model_name,
+    max_entries=settings.embedding_cache_max_entries,
+    max_mb=settings.embedding_cache_max_mb,
+    ttl_seconds=settings.embedding_cache_ttl_seconds,
+    enabled=settings.embedding_cache_enabled,
+    redis_url=settings.embedding_cache_redis_url
+)
@@ -0,0 +1,125 @@
+import numpy as np
+import json
+import logging
+import socket
+import struct
+import threading
+import time
+from typing import List, Union
+
+logger = logging.getLogger(__name__)
+
+# Messages between API workers and the embedding server: a 4-byte big-endian
+# length followed by the payload. Requests and response headers are JSON;
+# encode responses are followed by one more frame holding the float32 matrix.
+FRAME_HEADER = struct.Struct("!I")
+MAX_FRAME_BYTES = 256 * 1024 * 1024
+
+def pack_frame(payload: bytes) -> bytes:
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+def pack_json(message: dict) -> bytes:
+    return pack_frame(json.dumps(message).encode())
+
+class EmbeddingServerError(RuntimeError):
+    """The embedding server is unreachable or rejected a request"""
+
+class RemoteEmbeddingModel:
+    """
+    Stand-in for a local embedding model that forwards encode calls to the
+    shared embedding server (python -m app.services.embedding_server) over a
+    Unix socket. Each calling thread keeps its own connection; requests carry
+    the executor lane so the server can batch query texts across workers
+    while document chunks go to its bulk lane.
+    """
+
+    def __init__(self, socket_path: str, timeout_seconds: float = 30.0,
+                 connect_timeout_seconds: float = 30.0):
+        self.socket_path = socket_path
+        self.timeout = timeout_seconds
+        self.connect_timeout = connect_timeout_seconds
+        self._local = threading.local()
+        self._info = None
+
+    def _connect(self) -> socket.socket:
+        """Connect to the server, waiting for it to come up (it may start after the workers)"""
+        deadline = time.monotonic() + self.connect_timeout
+        while True:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.socket_path)
+                return sock
+            except (FileNotFoundError, ConnectionRefusedError) as e:
+                sock.close()
+                if time.monotonic() >= deadline:
+                    raise EmbeddingServerError(f"Embedding server not reachable at {self.socket_path}: {e}")
+                time.sleep(0.2)
+
+    def _recv_exact(self, sock: socket.socket, size: int) -> bytes:
+        data = bytearray()
+        while len(data) < size:
+            chunk = sock.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("Embedding server closed the connection")
+            data.extend(chunk)
+        return bytes(data)
+
+    def _recv_frame(self, sock: socket.socket) -> bytes:
+        (size,) = FRAME_HEADER.unpack(self._recv_exact(sock, FRAME_HEADER.size))
+        if size > MAX_FRAME_BYTES:
+            raise EmbeddingServerError(f"Embedding server frame too large: {size} bytes")
+        return self._recv_exact(sock, size)
+
+    def _request(self, message: dict):
+        """Send one request on this thread's connection; returns (header, payload)"""
+        for attempt in range(2):
+            sock = getattr(self._local, "sock", None)
+            if sock is None:
+                sock = self._local.sock = self._connect()
+            try:
+                sock.sendall(pack_json(message))
+                header = json.loads(self._recv_frame(sock))
+                payload = self._recv_frame(sock) if header.get("ok") and "count" in header else None
+                break
+            except (ConnectionError, OSError) as e:
+                # A server restart drops pooled connections; reconnect once
+                sock.close()
+                self._local.sock = None
+                if attempt or isinstance(e, socket.timeout):
+                    raise EmbeddingServerError(f"Embedding server request failed: {e}")
+
+        if not header.get("ok"):
+            raise EmbeddingServerError(header.get("error", "Embedding server error"))
+        return header, payload
+
+    def encode(self, texts: Union[str, List[str]], lane: str = "query", **kwargs) -> np.ndarray:
+        """Same contract as SentenceTransformer.encode (numpy output)"""
+        single = isinstance(texts, str)
+        if single:
+            texts = [texts]
+
+        header, payload = self._request({"op": "encode", "lane": lane or "query", "texts": texts})
+        embeddings = np.frombuffer(payload, dtype=np.float32).reshape(header["count"], header["dimension"])
+        return embeddings[0] if single else embeddings
+
+    def info(self) -> dict:
+        """Model information and batching metrics reported by the server"""
+        header, _ = self._request({"op": "info"})
+        self._info = header["info"]
+        return self._info
+
+    @property
+    def max_seq_length(self):
+        # Only what an earlier request reported; model info must not block on the server
+        return (self._info or {}).get("max_sequence_length", "unknown")
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return (self._info or self.info())["embedding_dimension"]
+
+    def close(self):
+        """Close the calling thread's connection"""
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+            self._local.sock = None
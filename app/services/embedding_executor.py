@@ -0,0 +1,162 @@
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import multiprocessing
+import asyncio
+import logging
+import time
+from typing import List
+from app.config import settings
+from app.services.embedding_service import embedding_service
+
+logger = logging.getLogger(__name__)
+
+QUERY_LANE = "query"
+BULK_LANE = "bulk"
+
+def _process_encode(texts: List[str], lane: str) -> List[List[float]]:
+    """Encode inside a worker process (the worker builds its own model on import)"""
+    return embedding_service.encode_batch(texts, lane)
+
+class _LaneStats:
+    """Counters for one executor lane"""
+
+    def __init__(self):
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.active = 0
+        self.texts = 0
+        self.wait_time_total = 0.0
+        self.run_time_total = 0.0
+
+    def as_dict(self) -> dict:
+        finished = self.completed + self.failed
+        return {
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "pending": self.submitted - finished,
+            "active": self.active,
+            "texts": self.texts,
+            "avg_wait_ms": round(self.wait_time_total / finished * 1000, 3) if finished else 0.0,
+            "avg_run_ms": round(self.run_time_total / finished * 1000, 3) if finished else 0.0
+        }
+
+class EmbeddingExecutor:
+    """
+    Runs model inference off the event loop in dedicated worker pools.
+
+    Interactive query embeddings and bulk ingestion embeddings use separate
+    pools ("lanes") so a large document never sits in front of a search
+    request. Bulk work is additionally split into sub-batches so that no single
+    call holds a worker for the whole document.
+    """
+
+    def __init__(self, embedding_service, kind: str = "thread", query_workers: int = 2,
+                 bulk_workers: int = 1, bulk_batch_size: int = 64):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unsupported embedding executor kind: {kind}")
+
+        self.embedding_service = embedding_service
+        self.kind = kind
+        self.workers = {QUERY_LANE: query_workers, BULK_LANE: bulk_workers}
+        self.bulk_batch_size = bulk_batch_size
+
+        self._pools = {}
+        self._stats = {QUERY_LANE: _LaneStats(), BULK_LANE: _LaneStats()}
+
+    def _get_pool(self, lane: str):
+        """Create the pool for a lane on first use"""
+        pool = self._pools.get(lane)
+        if pool is None:
+            if self.kind == "process":
+                pool = ProcessPoolExecutor(
+                    max_workers=self.workers[lane],
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                pool = ThreadPoolExecutor(
+                    max_workers=self.workers[lane],
+                    thread_name_prefix=f"embedding-{lane}"
+                )
+            self._pools[lane] = pool
+            logger.info(f"Started {self.kind} pool for {lane} embeddings ({self.workers[lane]} workers)")
+        return pool
+
+    async def _submit(self, lane: str, texts: List[str]) -> List[List[float]]:
+        """Run one encode call in the given lane"""
+        stats = self._stats[lane]
+        stats.submitted += 1
+        stats.texts += len(texts)
+        submitted_at = time.monotonic()
+        started_at = None
+
+        if self.kind == "process":
+            func = _process_encode
+        else:
+            encode = self.embedding_service.encode_batch
+
+            def func(batch, lane):
+                nonlocal started_at
+                started_at = time.monotonic()
+                return encode(batch, lane)
+
+        loop = asyncio.get_running_loop()
+        stats.active += 1
+        try:
+            result = await loop.run_in_executor(self._get_pool(lane), func, texts, lane)
+            stats.completed += 1
+            return result
+        except Exception:
+            stats.failed += 1
+            raise
+        finally:
+            stats.active -= 1
+            finished_at = time.monotonic()
+            started_at = started_at or submitted_at
+            stats.wait_time_total += started_at - submitted_at
+            stats.run_time_total += finished_at - started_at
+
+    async def encode_queries(self, texts: List[str]) -> List[List[float]]:
+        """Encode interactive query texts in the query lane"""
+        if not texts:
+            return []
+        return await self._submit(QUERY_LANE, texts)
+
+    async def encode_documents(self, texts: List[str]) -> List[List[float]]:
+        """Encode document chunks in the bulk lane, one sub-batch at a time"""
+        if not texts:
+            return []
+
+        embeddings = []
+        for start in range(0, len(texts), self.bulk_batch_size):
+            batch = texts[start:start + self.bulk_batch_size]
+            embeddings.extend(await self._submit(BULK_LANE, batch))
+            logger.debug(f"Embedded {len(embeddings)}/{len(texts)} document chunks")
+
+        return embeddings
+
+    def shutdown(self):
+        """Shut down all worker pools"""
+        for pool in self._pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        self._pools = {}
+
+    def get_stats(self) -> dict:
+        """Per-lane executor metrics"""
+        return {
+            "kind": self.kind,
+            "bulk_batch_size": self.bulk_batch_size,
+            "lanes": {
+                lane: {"workers": self.workers[lane], **stats.as_dict()}
+                for lane, stats in self._stats.items()
+            }
+        }
+
+# Global embedding executor instance
+embedding_executor = EmbeddingExecutor(
+    embedding_service,
+    kind=settings.embedding_executor_kind,
+    query_workers=settings.embedding_query_workers,
+    bulk_workers=settings.embedding_bulk_workers,
+    bulk_batch_size=settings.embedding_bulk_batch_size
+)
@@ -0,0 +1,178 @@
+import numpy as np
+import asyncio
+import json
+import logging
+import os
+import signal
+import time
+from app.config import settings
+from app.services.embedding_cache import embedding_cache
+from app.services.embedding_client import FRAME_HEADER, MAX_FRAME_BYTES, pack_frame, pack_json
+from app.services.embedding_executor import EmbeddingExecutor, embedding_executor, QUERY_LANE, BULK_LANE
+from app.services.embedding_batcher import EmbeddingBatcher, embedding_batcher
+from app.services.embedding_service import EmbeddingService, embedding_service
+
+logger = logging.getLogger(__name__)
+
+class EmbeddingServer:
+    """
+    One process that owns the embedding model for every API worker on the host.
+
+    Workers started with EMBEDDING_MODE=server send encode requests over a Unix
+    socket. Query texts from all connections go through one micro-batcher, so
+    concurrent searches in different workers share a forward pass; document
+    chunks run in the bulk lane of the server's executor, as they would in
+    process. The weights are loaded once instead of once per worker.
+    """
+
+    def __init__(self, socket_path: str, embedding_service, embedding_executor, embedding_batcher):
+        self.socket_path = socket_path
+        self.embedding_service = embedding_service
+        self.embedding_executor = embedding_executor
+        self.embedding_batcher = embedding_batcher
+        self.dimension = embedding_service.model.get_sentence_embedding_dimension()
+        self._server = None
+
+        # Metrics
+        self.started_at = None
+        self.connections = 0
+        self.requests = 0
+        self.failed_requests = 0
+
+    async def start(self):
+        """Listen on the socket, replacing a stale socket file from an earlier run"""
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self._server = await asyncio.start_unix_server(self._handle_connection, path=self.socket_path)
+        os.chmod(self.socket_path, 0o660)
+        self.started_at = time.time()
+        logger.info(f"Embedding server listening on {self.socket_path} ({self.embedding_service.model_name})")
+
+    async def stop(self):
+        """Stop accepting connections and release the model's worker pools"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        await self.embedding_batcher.stop()
+        self.embedding_executor.shutdown()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    async def _read_frame(self, reader: asyncio.StreamReader) -> bytes:
+        (size,) = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+        if size > MAX_FRAME_BYTES:
+            raise ValueError(f"Request frame too large: {size} bytes")
+        return await reader.readexactly(size)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve requests from one client connection until it closes"""
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    request = json.loads(await self._read_frame(reader))
+                except asyncio.IncompleteReadError:
+                    break
+
+                self.requests += 1
+                try:
+                    writer.write(await self._dispatch(request))
+                except Exception as e:
+                    self.failed_requests += 1
+                    logger.error(f"Embedding server request failed: {e}")
+                    writer.write(pack_json({"ok": False, "error": str(e)}))
+                await writer.drain()
+        except Exception as e:
+            logger.error(f"Embedding server connection error: {e}")
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def _dispatch(self, request: dict) -> bytes:
+        """Run one request; returns the response frames"""
+        op = request.get("op")
+        if op == "info":
+            return pack_json({"ok": True, "info": self.get_info()})
+        if op != "encode":
+            raise ValueError(f"Unsupported embedding server operation: {op}")
+
+        texts = request["texts"]
+        if request.get("lane", QUERY_LANE) == BULK_LANE:
+            embeddings = await self.embedding_executor.encode_documents(texts)
+        else:
+            # Each text joins the shared batch queue alongside other workers' queries
+            embeddings = await asyncio.gather(*(self.embedding_batcher.embed(text) for text in texts))
+
+        matrix = np.asarray(embeddings, dtype=np.float32).reshape(len(texts), self.dimension)
+        return (
+            pack_json({"ok": True, "count": len(texts), "dimension": self.dimension})
+            + pack_frame(matrix.tobytes())
+        )
+
+    def get_info(self) -> dict:
+        """Model information and batching metrics, for clients' health checks"""
+        return {
+            **self.embedding_service.get_model_info(),
+            "embedding_dimension": self.dimension,
+            "server": {
+                "pid": os.getpid(),
+                "uptime_seconds": round(time.time() - self.started_at, 1) if self.started_at else 0.0,
+                "connections": self.connections,
+                "requests": self.requests,
+                "failed_requests": self.failed_requests
+            },
+            "embedding_batcher": self.embedding_batcher.get_stats(),
+            "embedding_executor": self.embedding_executor.get_stats(),
+            "embedding_cache": self.embedding_service.cache.get_stats()
+        }
+
+def create_embedding_server() -> EmbeddingServer:
+    """
+    Build the server around this process's local model. When the shared
+    config says EMBEDDING_MODE=server, the process-wide service is a client
+    (no model loaded), so a local service with its own pools is built instead.
+    """
+    if embedding_service.mode == "local":
+        return EmbeddingServer(settings.embedding_server_socket, embedding_service, embedding_executor, embedding_batcher)
+
+    local_service = EmbeddingService(mode="local")
+    local_executor = EmbeddingExecutor(
+        local_service,
+        kind="thread",
+        query_workers=settings.embedding_query_workers,
+        bulk_workers=settings.embedding_bulk_workers,
+        bulk_batch_size=settings.embedding_bulk_batch_size
+    )
+    local_batcher = EmbeddingBatcher(
+        local_executor,
+        embedding_cache,
+        window_ms=settings.embedding_batch_window_ms,
+        max_batch_size=settings.embedding_batch_max_size,
+        max_concurrent_batches=settings.embedding_query_workers,
+        enabled=settings.embedding_batching_enabled
+    )
+    return EmbeddingServer(settings.embedding_server_socket, local_service, local_executor, local_batcher)
+
+async def run_server():
+    """Run the embedding server until SIGINT/SIGTERM"""
+    server = create_embedding_server()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    await server.start()
+    try:
+        await stop.wait()
+    finally:
+        logger.info("Shutting down embedding server...")
+        await server.stop()
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=getattr(logging, settings.log_level.upper()),
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    asyncio.run(run_server())
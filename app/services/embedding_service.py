@@ -1,22 +1,68 @@
-from sentence_transformers import SentenceTransformer
 import numpy as np
 from typing import List, Union
 import logging
+import threading
+import time
 from app.config import settings
+from app.services.embedding_cache import embedding_cache
+from app.services.embedding_backends import create_embedding_backend
+from app.services.embedding_client import RemoteEmbeddingModel
 
 logger = logging.getLogger(__name__)
 
 class EmbeddingService:
-    def __init__(self):
+    def __init__(self, mode: str = None):
         self.model_name = settings.embedding_model_name
-        self.model = None
-        self._load_model()
+        self.backend = settings.embedding_backend
+        self.mode = mode or settings.embedding_mode
+        self._model = None
+        self._load_lock = threading.Lock()
+        self.load_seconds = None
+        self.cache = embedding_cache
+    
+    @property
+    def model(self):
+        """The embedding model, loaded on first use"""
+        if self._model is None:
+            self.load()
+        return self._model
+    
+    @property
+    def is_loaded(self) -> bool:
+        return self._model is not None
+    
+    def load(self):
+        """Load the model unless already loaded; concurrent callers wait for one load"""
+        with self._load_lock:
+            if self._model is None:
+                start = time.perf_counter()
+                self._load_model()
+                self.load_seconds = time.perf_counter() - start
+    
+    def warmup(self) -> int:
+        """Load the model and run one encode so the first request is not charged for it; returns the dimension"""
+        self.load()
+        embedding = self.model.encode("warmup", convert_to_tensor=False)
+        logger.info(f"Embedding model ready. Dimension: {len(embedding)}")
+        return len(embedding)
     
     def _load_model(self):
-        """Load the sentence transformer model"""
+        """Load the embedding model with the configured backend (torch, onnx or onnx-int8)"""
+        if self.mode == "server":
+            # The model lives in the shared embedding server process
+            self._model = RemoteEmbeddingModel(
+                settings.embedding_server_socket,
+                timeout_seconds=settings.embedding_server_timeout_seconds,
+                connect_timeout_seconds=settings.embedding_server_connect_timeout_seconds
+            )
+            logger.info(f"Using embedding server at {settings.embedding_server_socket}")
+            return
+        if self.mode != "local":
+            raise ValueError(f"Unsupported embedding mode: {self.mode}")
+        
         try:
-            logger.info(f"Loading embedding model: {self.model_name}")
-            self.model = SentenceTransformer(self.model_name)
+            logger.info(f"Loading embedding model: {self.model_name} ({self.backend} backend)")
+            self._model = create_embedding_backend(self.backend, self.model_name)
             logger.info("Embedding model loaded successfully")
         except Exception as e:
             logger.error(f"Failed to load embedding model: {e}")
@@ -28,6 +74,10 @@ class EmbeddingService:
             if not text or not text.strip():
                 raise ValueError("Text cannot be empty")
             
+            cached = self.cache.get(text)
+            if cached is not None:
+                return cached
+            
             # Generate embedding
             embedding = self.model.encode(text.strip(), convert_to_tensor=False)
             
@@ -37,6 +87,7 @@ class EmbeddingService:
             if len(embedding_list) != settings.embedding_dimension:
                 logger.warning(f"Embedding dimension mismatch: expected {settings.embedding_dimension}, got {len(embedding_list)}")
             
+            self.cache.put(text, embedding_list)
             return embedding_list
             
         except Exception as e:
@@ -58,7 +109,7 @@ class EmbeddingService:
             logger.info(f"Generating embeddings for {len(valid_texts)} texts")
             
             # Generate embeddings in batch (more efficient)
-            embeddings = self.model.encode(valid_texts, convert_to_tensor=False, show_progress_bar=True)
+            embeddings = self.model.encode(valid_texts, convert_to_tensor=False, show_progress_bar=True, lane="bulk")
             
             # Convert to list of lists
             embeddings_list = [embedding.tolist() for embedding in embeddings]
@@ -71,6 +122,28 @@ class EmbeddingService:
             logger.error(f"Failed to generate batch embeddings: {e}")
             raise RuntimeError(f"Batch embedding generation failed: {str(e)}")
     
+    def encode_batch(self, texts: List[str], lane: str = None) -> List[List[float]]:
+        """
+        Encode already-validated texts in one forward pass, preserving order;
+        ``lane`` ("query" or "bulk") only matters for the embedding server
+        """
+        try:
+            if not texts:
+                return []
+            
+            embeddings = self.model.encode(
+                [text.strip() for text in texts],
+                convert_to_tensor=False,
+                show_progress_bar=False,
+                lane=lane
+            )
+            
+            return [embedding.tolist() for embedding in embeddings]
+            
+        except Exception as e:
+            logger.error(f"Failed to encode batch: {e}")
+            raise RuntimeError(f"Batch embedding generation failed: {str(e)}")
+    
     def compute_similarity(self, embedding1: List[float], embedding2: List[float]) -> float:
         """Compute cosine similarity between two embeddings"""
         try:
@@ -97,9 +170,11 @@ class EmbeddingService:
         """Get information about the loaded model"""
         return {
             "model_name": self.model_name,
+            "backend": self.backend,
+            "mode": self.mode,
             "embedding_dimension": settings.embedding_dimension,
-            "max_sequence_length": getattr(self.model, 'max_seq_length', 'unknown'),
-            "model_loaded": self.model is not None
+            "max_sequence_length": getattr(self._model, 'max_seq_length', 'unknown'),
+            "model_loaded": self._model is not None
         }
 
 # Global embedding service instance
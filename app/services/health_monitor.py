@@ -0,0 +1,148 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+from app.config import settings
+from app.models.async_database import async_db_manager
+from app.services.vector_store import vector_store
+
+logger = logging.getLogger(__name__)
+
+DEEP_CHECK_TEXT = "health check"
+
+class HealthMonitor:
+    """
+    Cached component health for the health endpoints.
+
+    Probes read the last results; once they are older than
+    ``refresh_seconds`` one probe starts a refresh in the background and
+    still answers from the cache, so probes never wait on the database or
+    pile up checks. Routine checks are cheap: a database ping with a timeout,
+    and whether the embedding model is loaded with the configured dimension.
+    Deep checks (an actual query encode through the query lane) only run on
+    demand.
+    """
+
+    def __init__(self, db_manager, vector_store, refresh_seconds: float = 10.0,
+                 timeout_seconds: float = 2.0):
+        self.db_manager = db_manager
+        self.vector_store = vector_store
+        self.refresh_seconds = refresh_seconds
+        self.timeout = timeout_seconds
+
+        self._components: Dict[str, dict] = {}
+        self._checked_at: Optional[float] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.refreshes = 0
+        self.deep_checks = 0
+
+    async def _timed(self, check) -> dict:
+        """Run one check under the timeout; never raises"""
+        start = time.monotonic()
+        try:
+            detail = await asyncio.wait_for(check(), self.timeout)
+            healthy, error = True, None
+        except asyncio.TimeoutError:
+            detail, healthy, error = None, False, f"timed out after {self.timeout}s"
+        except Exception as e:
+            detail, healthy, error = None, False, str(e)
+        if isinstance(detail, dict):
+            healthy = detail.pop("healthy", healthy)
+            error = detail.pop("error", error)
+        return {
+            "healthy": healthy,
+            "latency_ms": round((time.monotonic() - start) * 1000, 3),
+            "checked_at": time.time(),
+            "error": error,
+            **(detail or {})
+        }
+
+    async def _check_database(self) -> dict:
+        if not await self.db_manager.ping():
+            return {"healthy": False, "error": "unexpected ping result"}
+        return {}
+
+    async def _check_embedding_model(self) -> dict:
+        """Loaded with the configured dimension; no inference"""
+        embedding_service = self.vector_store.embedding_service
+        if not embedding_service.is_loaded:
+            return {"healthy": False, "error": "model not loaded yet"}
+        dimension = await asyncio.get_running_loop().run_in_executor(
+            None, embedding_service.model.get_sentence_embedding_dimension
+        )
+        if dimension != settings.embedding_dimension:
+            return {"healthy": False, "error": f"model dimension {dimension} != EMBEDDING_DIMENSION {settings.embedding_dimension}"}
+        return {}
+
+    async def _check_embedding_inference(self) -> dict:
+        """Deep check: encode one text through the query lane, bypassing the cache"""
+        embeddings = await self.vector_store.embedding_executor.encode_queries([DEEP_CHECK_TEXT])
+        if len(embeddings[0]) != settings.embedding_dimension:
+            return {"healthy": False, "error": f"embedding has {len(embeddings[0])} dimensions"}
+        return {}
+
+    async def refresh(self):
+        """Re-run the routine checks"""
+        database, embedding_model = await asyncio.gather(
+            self._timed(self._check_database),
+            self._timed(self._check_embedding_model)
+        )
+        self._components = {"database": database, "embedding_model": embedding_model}
+        self._checked_at = time.monotonic()
+        self.refreshes += 1
+        for name, component in self._components.items():
+            if not component["healthy"]:
+                logger.warning(f"Health check for {name} failed: {component['error']}")
+
+    def _start_refresh(self) -> asyncio.Task:
+        """Start a refresh unless one is already running (then join that one)"""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.get_running_loop().create_task(self.refresh())
+        return self._refresh_task
+
+    async def get_components(self) -> Dict[str, dict]:
+        """Cached component results, refreshed in the background once stale"""
+        if self._checked_at is None:
+            # Nothing cached yet: the first probe waits for the (cheap, time-limited) checks
+            await asyncio.shield(self._start_refresh())
+        elif time.monotonic() - self._checked_at >= self.refresh_seconds:
+            self._start_refresh()
+        return self._components
+
+    async def deep_check(self) -> Dict[str, dict]:
+        """Fresh routine checks plus model inference"""
+        self.deep_checks += 1
+        await asyncio.shield(self._start_refresh())
+        return {
+            **self._components,
+            "embedding_inference": await self._timed(self._check_embedding_inference)
+        }
+
+    def is_healthy(self, components: Dict[str, dict]) -> bool:
+        return all(component["healthy"] for component in components.values())
+
+    async def stop(self):
+        """Cancel a refresh in progress"""
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+
+    def get_stats(self) -> dict:
+        """Cache age and check counters"""
+        return {
+            "refresh_seconds": self.refresh_seconds,
+            "timeout_seconds": self.timeout,
+            "age_seconds": round(time.monotonic() - self._checked_at, 3) if self._checked_at is not None else None,
+            "refreshes": self.refreshes,
+            "deep_checks": self.deep_checks
+        }
+
+# Global health monitor instance
+health_monitor = HealthMonitor(
+    async_db_manager,
+    vector_store,
+    refresh_seconds=settings.health_refresh_seconds,
+    timeout_seconds=settings.health_check_timeout_seconds
+)
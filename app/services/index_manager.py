@@ -0,0 +1,295 @@
+import asyncio
+import logging
+import math
+import time
+from typing import Optional
+from app.config import settings
+from app.models.async_database import async_db_manager
+
+logger = logging.getLogger(__name__)
+
+# Name of the live ANN index on document_chunks.embedding
+VECTOR_INDEX_NAME = "idx_chunks_embedding_cosine"
+
+# Hamming-distance index on the sign bits of the embedding (VECTOR_QUANTIZATION=binary)
+BINARY_INDEX_NAME = "idx_chunks_embedding_binary"
+
+# IVFFlat centroids are computed from existing rows, so building on a nearly
+# empty table gives poor clusters; below this many rows a sequential scan is fine
+IVFFLAT_MIN_ROWS = 1000
+
+# Session-level advisory lock key so only one process rebuilds at a time
+INDEX_BUILD_LOCK_KEY = 0x5EC7_1DE8
+
+# Client-side timeout for the build statement (the pool's command timeout is far too short)
+INDEX_BUILD_TIMEOUT = 24 * 3600
+
+# document_chunks and, when it is hash-partitioned by user_id, its partitions
+CHUNK_TABLES_SQL = """
+SELECT 'document_chunks'::regclass::oid AS oid
+UNION ALL
+SELECT inhrelid FROM pg_inherits WHERE inhparent = 'document_chunks'::regclass
+"""
+
+CHUNK_PARTITIONS_SQL = """
+SELECT c.relname AS name
+FROM pg_inherits i
+JOIN pg_class c ON c.oid = i.inhrelid
+WHERE i.inhparent = 'document_chunks'::regclass
+ORDER BY c.relname
+"""
+
+VECTOR_INDEXES_SQL = f"""
+SELECT c.relname AS name, t.relname AS table_name, am.amname AS method, i.indisvalid AS valid,
+       pg_relation_size(c.oid) AS size_bytes, pg_get_indexdef(c.oid) AS definition
+FROM pg_index i
+JOIN pg_class c ON c.oid = i.indexrelid
+JOIN pg_class t ON t.oid = i.indrelid
+JOIN pg_am am ON am.oid = c.relam
+WHERE i.indrelid IN ({CHUNK_TABLES_SQL})
+AND am.amname IN ('hnsw', 'ivfflat')
+ORDER BY c.relname
+"""
+
+BUILD_PROGRESS_SQL = f"""
+SELECT c.relname AS index_name, p.phase, p.blocks_done, p.blocks_total,
+       p.tuples_done, p.tuples_total
+FROM pg_stat_progress_create_index p
+LEFT JOIN pg_class c ON c.oid = p.index_relid
+WHERE p.relid IN ({CHUNK_TABLES_SQL})
+"""
+
+ESTIMATED_ROWS_SQL = f"""
+SELECT COALESCE(SUM(GREATEST(reltuples, 0)), 0)::bigint FROM pg_class WHERE oid IN ({CHUNK_TABLES_SQL})
+"""
+
+class IndexBuildInProgressError(RuntimeError):
+    """Raised when a rebuild is requested while another one is running"""
+
+class IndexManager:
+    """
+    Manages the ANN index on document_chunks.embedding.
+
+    The index type (HNSW or IVFFlat) comes from settings. Rebuilds run with
+    CREATE INDEX CONCURRENTLY under a temporary name and are swapped in with
+    a drop-and-rename, so searches keep using the old index until the new one
+    is ready. IVFFlat ``lists`` is derived from the row count at build time
+    (rows / 1000 up to 1M rows, sqrt(rows) beyond), following pgvector's
+    guidance; HNSW uses the configured ``m`` and ``ef_construction``.
+
+    With VECTOR_QUANTIZATION=binary a second index over
+    ``binary_quantize(embedding)`` (bit_hamming_ops) serves the first search
+    pass; it is an expression index, so no extra column needs backfilling.
+
+    When document_chunks is hash-partitioned by user_id, the index is created
+    on the parent only and each partition's index is built concurrently and
+    attached, with IVFFlat ``lists`` sized for the average partition.
+    """
+
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+        self._task: Optional[asyncio.Task] = None
+        self.last_build = None
+
+    @staticmethod
+    def plan_parameters(index_type: str, row_count: int, lists: Optional[int] = None,
+                        m: Optional[int] = None, ef_construction: Optional[int] = None) -> dict:
+        """Index build parameters for a table of ``row_count`` rows"""
+        if index_type == "ivfflat":
+            if not lists:
+                lists = settings.ivfflat_lists
+            if not lists:
+                lists = row_count // 1000 if row_count <= 1_000_000 else int(math.sqrt(row_count))
+            lists = max(lists, 1)
+            return {
+                "index_type": "ivfflat",
+                "lists": lists,
+                # Starting point for per-query probes suggested by pgvector
+                "recommended_probes": max(int(math.sqrt(lists)), 1)
+            }
+        if index_type == "hnsw":
+            return {
+                "index_type": "hnsw",
+                "m": m or settings.hnsw_m,
+                "ef_construction": ef_construction or settings.hnsw_ef_construction
+            }
+        raise ValueError(f"Unsupported vector index type: {index_type}")
+
+    @staticmethod
+    def build_index_sql(name: str, params: dict, table: str = "document_chunks",
+                        concurrently: bool = True, binary: bool = False) -> str:
+        """CREATE INDEX statement for planned parameters (ON ONLY for a partitioned parent)"""
+        if params["index_type"] == "ivfflat":
+            method, options = "ivfflat", f"lists = {int(params['lists'])}"
+        else:
+            method, options = "hnsw", f"m = {int(params['m'])}, ef_construction = {int(params['ef_construction'])}"
+        if binary:
+            column = f"(binary_quantize(embedding)::bit({settings.embedding_dimension})) bit_hamming_ops"
+        else:
+            column = f"embedding {settings.embedding_storage}_cosine_ops"
+        target = f"CONCURRENTLY {name} ON {table}" if concurrently else f"{name} ON ONLY {table}"
+        return f"CREATE INDEX {target} USING {method} ({column}) WITH ({options})"
+
+    async def count_rows(self) -> int:
+        async with self.db_manager.get_connection() as conn:
+            return await conn.fetchval("SELECT COUNT(*) FROM document_chunks")
+
+    async def list_indexes(self) -> list:
+        async with self.db_manager.get_connection() as conn:
+            return [dict(row) for row in await conn.fetch(VECTOR_INDEXES_SQL)]
+
+    async def ensure_index(self):
+        """
+        Called at startup: build missing indexes in the background (IVFFlat
+        only once the table has enough rows), and warn if an existing index
+        does not match the configured type.
+        """
+        indexes = {index['name']: index for index in await self.list_indexes()}
+        wanted = [(VECTOR_INDEX_NAME, False)]
+        if settings.vector_quantization == "binary":
+            wanted.append((BINARY_INDEX_NAME, True))
+
+        missing = []
+        for name, binary in wanted:
+            current = indexes.get(name)
+            if current is None:
+                missing.append(binary)
+            elif current['method'] != settings.vector_index_type:
+                logger.warning(
+                    f"Vector index {name} is {current['method']} but VECTOR_INDEX_TYPE is "
+                    f"{settings.vector_index_type}; rebuild it via POST /admin/index/rebuild"
+                )
+        if not missing:
+            return
+
+        row_count = await self.count_rows()
+        if settings.vector_index_type == "ivfflat" and row_count < IVFFLAT_MIN_ROWS:
+            logger.info(f"Deferring IVFFlat index build until document_chunks has {IVFFLAT_MIN_ROWS} rows")
+            return
+
+        logger.info(f"Building {len(missing)} missing vector index(es) in the background")
+        self._task = asyncio.create_task(self._build_missing(missing))
+        self._task.add_done_callback(lambda task: task.cancelled() or task.exception())
+
+    async def _build_missing(self, missing: list):
+        for binary in missing:
+            await self.rebuild(settings.vector_index_type, binary=binary)
+
+    @property
+    def building(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start_rebuild(self, index_type: Optional[str] = None, lists: Optional[int] = None,
+                      m: Optional[int] = None, ef_construction: Optional[int] = None,
+                      binary: bool = False) -> asyncio.Task:
+        """Start a concurrent rebuild in the background"""
+        if self.building:
+            raise IndexBuildInProgressError("A vector index rebuild is already running")
+        self._task = asyncio.create_task(
+            self.rebuild(index_type or settings.vector_index_type, lists, m, ef_construction, binary)
+        )
+        # Failures are logged and recorded in last_build; don't warn about unretrieved exceptions
+        self._task.add_done_callback(lambda task: task.cancelled() or task.exception())
+        return self._task
+
+    async def rebuild(self, index_type: str, lists: Optional[int] = None,
+                      m: Optional[int] = None, ef_construction: Optional[int] = None,
+                      binary: bool = False) -> dict:
+        """Build a new index concurrently and swap it in for the live one"""
+        live_name = BINARY_INDEX_NAME if binary else VECTOR_INDEX_NAME
+        new_name = f"{live_name}_new"
+        start_time = time.time()
+        self.last_build = {"status": "running", "index": live_name, "started_at": start_time}
+
+        try:
+            async with self.db_manager.get_connection(transaction=False) as conn:
+                if not await conn.fetchval("SELECT pg_try_advisory_lock($1)", INDEX_BUILD_LOCK_KEY):
+                    raise IndexBuildInProgressError("Another process is rebuilding the vector index")
+                try:
+                    partitions = [row['name'] for row in await conn.fetch(CHUNK_PARTITIONS_SQL)]
+                    row_count = await conn.fetchval("SELECT COUNT(*) FROM document_chunks")
+                    # Each partition gets its own index, so size IVFFlat lists per partition
+                    rows_per_index = row_count // len(partitions) if partitions else row_count
+                    params = self.plan_parameters(index_type, rows_per_index, lists, m, ef_construction)
+                    self.last_build.update(params=params, row_count=row_count, partitions=len(partitions))
+                    logger.info(
+                        f"Building vector index with {params} over {row_count} rows"
+                        + (f" in {len(partitions)} partitions" if partitions else "")
+                    )
+
+                    # Leftovers from an interrupted build (CONCURRENTLY leaves invalid indexes behind)
+                    for partition in partitions:
+                        await conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {new_name}_{partition}")
+                    await conn.execute(
+                        f"DROP INDEX {'' if partitions else 'CONCURRENTLY '}IF EXISTS {new_name}"
+                    )
+                    await conn.execute(
+                        "SELECT set_config('maintenance_work_mem', $1, false), "
+                        "set_config('statement_timeout', '0', false)",
+                        settings.vector_index_build_memory
+                    )
+
+                    if partitions:
+                        # CONCURRENTLY is not supported on a partitioned table: create the
+                        # parent index ON ONLY (invalid until every partition is attached)
+                        await conn.execute(self.build_index_sql(new_name, params, concurrently=False, binary=binary))
+                        for partition in partitions:
+                            await conn.execute(
+                                self.build_index_sql(f"{new_name}_{partition}", params, table=partition, binary=binary),
+                                timeout=INDEX_BUILD_TIMEOUT
+                            )
+                            await conn.execute(f"ALTER INDEX {new_name} ATTACH PARTITION {new_name}_{partition}")
+                    else:
+                        await conn.execute(self.build_index_sql(new_name, params, binary=binary), timeout=INDEX_BUILD_TIMEOUT)
+
+                    async with conn.transaction():
+                        await conn.execute(f"DROP INDEX IF EXISTS {live_name}")
+                        await conn.execute(f"ALTER INDEX {new_name} RENAME TO {live_name}")
+                        for partition in partitions:
+                            await conn.execute(
+                                f"ALTER INDEX {new_name}_{partition} RENAME TO {live_name}_{partition}"
+                            )
+                finally:
+                    await conn.execute("RESET maintenance_work_mem; RESET statement_timeout")
+                    await conn.execute("SELECT pg_advisory_unlock($1)", INDEX_BUILD_LOCK_KEY)
+
+            duration = time.time() - start_time
+            self.last_build.update(status="completed", duration_seconds=round(duration, 2))
+            logger.info(f"Vector index {live_name} rebuilt in {duration:.1f}s")
+            return self.last_build
+
+        except Exception as e:
+            self.last_build.update(status="failed", error=str(e))
+            logger.error(f"Vector index rebuild failed: {e}")
+            raise
+
+    async def get_status(self) -> dict:
+        """Index definitions and sizes, build progress and the last rebuild's outcome"""
+        async with self.db_manager.get_connection() as conn:
+            indexes = [dict(row) for row in await conn.fetch(VECTOR_INDEXES_SQL)]
+            progress = [dict(row) for row in await conn.fetch(BUILD_PROGRESS_SQL)]
+            estimated_rows = await conn.fetchval(ESTIMATED_ROWS_SQL)
+
+        for index in indexes:
+            index['size_mb'] = round(index['size_bytes'] / (1024 * 1024), 2)
+        for build in progress:
+            total = build['blocks_total'] or build['tuples_total']
+            done = build['blocks_done'] if build['blocks_total'] else build['tuples_done']
+            build['percent_done'] = round(100.0 * done / total, 1) if total else None
+
+        return {
+            "configured_type": settings.vector_index_type,
+            "estimated_rows": max(estimated_rows or 0, 0),
+            "indexes": indexes,
+            "build_in_progress": progress,
+            "last_build": self.last_build
+        }
+
+    async def stop(self):
+        """Cancel a running rebuild (the leftover index is dropped by the next rebuild)"""
+        if self.building:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+# Global index manager instance
+index_manager = IndexManager(async_db_manager)
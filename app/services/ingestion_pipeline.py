@@ -0,0 +1,156 @@
+import asyncio
+import threading
+import logging
+import time
+from app.config import settings
+from app.models.async_database import async_db_manager
+from app.services.document_processor import document_processor
+from app.services.vector_store import vector_store
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stage's output
+_END = object()
+
+class IngestionPipeline:
+    """
+    Streaming document ingestion: extract -> chunk -> embed -> insert.
+
+    Text is extracted and chunked page by page in a worker thread (large PDFs
+    are sharded across extraction processes); chunks keep their page span and flow
+    in batches of ``batch_size`` through bounded queues into the embedding
+    stage and then the database writer, so all three stages run at the same
+    time. A full queue blocks the stage feeding it (backpressure), which keeps
+    at most ``queue_size`` batches in flight between any two stages.
+
+    Chunks are content-addressed, so on reprocessing the embeddings already
+    stored for the document are reused and only new or changed chunks are
+    encoded; chunks beyond the new end of the document are removed.
+    """
+
+    def __init__(self, document_processor, vector_store, db_manager,
+                 batch_size: int = 64, queue_size: int = 4):
+        self.document_processor = document_processor
+        self.vector_store = vector_store
+        self.db_manager = db_manager
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+
+    def _produce(self, file_content, file_type: str, document_id: str,
+                 queue: asyncio.Queue, loop, stop: threading.Event):
+        """Extract and chunk in a worker thread, pushing chunk batches onto the queue"""
+
+        def put(item) -> bool:
+            # Blocks this thread while the queue is full
+            asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+            return not stop.is_set()
+
+        pages = self.document_processor.iter_pages(file_content, file_type)
+        chunks = self.document_processor.text_chunker.chunk_pages(pages)
+
+        batch = []
+        for chunk_index, (chunk, page_start, page_end) in enumerate(chunks):
+            if stop.is_set():
+                return
+            batch.append(self.document_processor.build_chunk_data(
+                document_id, chunk_index, chunk, page_start, page_end
+            ))
+            if len(batch) >= self.batch_size:
+                if not put(batch):
+                    return
+                batch = []
+
+        if batch and not put(batch):
+            return
+        put(_END)
+
+    async def _embed(self, chunk_queue: asyncio.Queue, row_queue: asyncio.Queue,
+                     known_embeddings: dict, stats: dict):
+        """Embed chunk batches as they arrive, reusing known embeddings"""
+        while True:
+            batch = await chunk_queue.get()
+            if batch is _END:
+                await row_queue.put(_END)
+                return
+            reused = sum(1 for chunk in batch if chunk['content_hash'] in known_embeddings)
+            stats['chunks_reused'] += reused
+            stats['chunks_embedded'] += len(batch) - reused
+            await row_queue.put(await self.vector_store.embed_chunks(batch, known_embeddings))
+
+    async def _write(self, row_queue: asyncio.Queue) -> int:
+        """Insert embedded batches as they arrive"""
+        stored = 0
+        while True:
+            rows = await row_queue.get()
+            if rows is _END:
+                return stored
+            await self.db_manager.insert_chunks(rows)
+            stored += len(rows)
+
+    async def run(self, file_url: str, file_type: str, document_id: str) -> int:
+        """Ingest a document end to end; returns the number of chunks stored"""
+        start_time = time.time()
+        loop = asyncio.get_running_loop()
+
+        logger.info(f"Downloading file from: {file_url}")
+        file_content = await self.document_processor.download_file(file_url, suffix=f".{file_type.lower()}")
+        logger.info(
+            f"Downloaded {file_content.size} bytes for document {document_id}"
+            f"{' (spooled to disk)' if file_content.on_disk else ''}"
+        )
+
+        # Embeddings stored by a previous run, keyed by content hash
+        known_embeddings = await self.db_manager.get_document_embeddings(document_id)
+        stats = {'chunks_reused': 0, 'chunks_embedded': 0}
+
+        chunk_queue = asyncio.Queue(maxsize=self.queue_size)
+        row_queue = asyncio.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+
+        producer = loop.run_in_executor(
+            None, self._produce, file_content, file_type, document_id, chunk_queue, loop, stop
+        )
+        embedder = asyncio.ensure_future(self._embed(chunk_queue, row_queue, known_embeddings, stats))
+        writer = asyncio.ensure_future(self._write(row_queue))
+        stages = [producer, embedder, writer]
+
+        try:
+            done, _ = await asyncio.wait(stages, return_when=asyncio.FIRST_EXCEPTION)
+            for stage in done:
+                if stage.exception() is not None:
+                    raise stage.exception()
+            stored = writer.result()
+
+            # Drop chunks left over from a longer previous version of the document
+            stats['chunks_removed'] = await self.db_manager.delete_chunks_from(document_id, stored)
+            stats['chunks_total'] = stored
+            await self.db_manager.record_ingestion_stats(document_id, stats)
+        except BaseException:
+            # Stop the producer thread, unblocking it if it is waiting on a full queue
+            stop.set()
+            embedder.cancel()
+            writer.cancel()
+            while not producer.done():
+                while not chunk_queue.empty():
+                    chunk_queue.get_nowait()
+                await asyncio.sleep(0.05)
+            await asyncio.gather(*stages, return_exceptions=True)
+            raise
+        finally:
+            file_content.close()
+
+        logger.info(
+            f"Ingested document {document_id}: {stored} chunks ({stats['chunks_reused']} reused, "
+            f"{stats['chunks_embedded']} embedded, {stats['chunks_removed']} removed) "
+            f"in {time.time() - start_time:.2f}s"
+        )
+        return stored
+
+# Global ingestion pipeline instance
+ingestion_pipeline = IngestionPipeline(
+    document_processor,
+    vector_store,
+    async_db_manager,
+    batch_size=settings.ingestion_batch_size,
+    queue_size=settings.ingestion_queue_size
+)
@@ -0,0 +1,260 @@
+import asyncio
+import logging
+import os
+import random
+import signal
+import socket
+import uuid
+from typing import List
+from app.config import settings
+from app.models.async_database import async_db_manager
+from app.services.ingestion_pipeline import ingestion_pipeline
+from app.services.job_queue import job_queue, JobAlreadyRunningError
+
+logger = logging.getLogger(__name__)
+
+class IngestionWorkerPool:
+    """
+    Runs ingestion jobs from the durable job queue.
+
+    ``concurrency`` workers each claim one job at a time under a lease and
+    renew it with heartbeats while the pipeline runs. Failed jobs are retried
+    with exponential backoff until ``max_attempts``, after which the document
+    is marked failed. On start, documents left in 'processing' without an
+    active job (e.g. from a crash before they were queued) are re-queued.
+    """
+
+    def __init__(self, job_queue, pipeline, db_manager, concurrency: int = 2,
+                 lease_seconds: float = 300.0, heartbeat_seconds: float = 30.0,
+                 poll_interval: float = 1.0, max_attempts: int = 3,
+                 retry_base_seconds: float = 10.0, retry_max_seconds: float = 600.0):
+        self.job_queue = job_queue
+        self.pipeline = pipeline
+        self.db_manager = db_manager
+        self.concurrency = concurrency
+        self.lease_seconds = lease_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+
+        self.worker_prefix = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = asyncio.Event()
+
+        # Metrics
+        self.jobs_succeeded = 0
+        self.jobs_retried = 0
+        self.jobs_failed = 0
+        self.jobs_recovered = 0
+
+    async def enqueue(self, document_request) -> str:
+        """Queue a document for processing; returns the job id"""
+        payload = {
+            "file_url": str(document_request.file_url),
+            "file_type": document_request.file_type,
+            "user_id": document_request.user_id,
+            "filename": document_request.filename
+        }
+        return await self.job_queue.enqueue(document_request.document_id, payload, self.max_attempts)
+
+    async def recover_orphaned_documents(self) -> int:
+        """Queue jobs for 'processing' documents that have no active job"""
+        recovered = 0
+        for document in await self.db_manager.get_documents_by_status("processing"):
+            if await self.job_queue.has_active_job(document['id']):
+                continue
+            try:
+                await self.job_queue.enqueue(document['id'], {
+                    "file_url": document['file_url'],
+                    "file_type": document['file_type'],
+                    "user_id": document['user_id'],
+                    "filename": document['filename']
+                }, self.max_attempts)
+            except JobAlreadyRunningError:
+                # Another worker picked it up in the meantime
+                continue
+            recovered += 1
+
+        if recovered:
+            logger.warning(f"Re-queued {recovered} orphaned documents stuck in 'processing'")
+        self.jobs_recovered += recovered
+        return recovered
+
+    async def start(self):
+        """Recover orphaned documents and start the workers"""
+        if self._tasks:
+            return
+        self._stopping.clear()
+        await self.recover_orphaned_documents()
+        self._tasks = [
+            asyncio.create_task(self._worker_loop(f"{self.worker_prefix}:{i}"))
+            for i in range(self.concurrency)
+        ]
+        logger.info(f"Started {self.concurrency} ingestion workers ({self.worker_prefix})")
+
+    async def stop(self):
+        """Stop the workers; in-flight jobs are left to be reclaimed after their lease expires"""
+        self._stopping.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def retry_delay(self, attempts: int) -> float:
+        """Exponential backoff with jitter for the given attempt number"""
+        delay = min(self.retry_base_seconds * (2 ** max(attempts - 1, 0)), self.retry_max_seconds)
+        return delay * random.uniform(0.8, 1.2)
+
+    async def _worker_loop(self, worker_id: str):
+        while not self._stopping.is_set():
+            try:
+                job = await self.job_queue.claim(worker_id, self.lease_seconds)
+            except Exception as e:
+                logger.error(f"Worker {worker_id} failed to claim a job: {e}")
+                job = None
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._run_job(job, worker_id)
+
+    async def _heartbeat(self, job: dict, worker_id: str, job_task: asyncio.Task):
+        """Renew the job lease; cancel the job if the lease was lost to another worker"""
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            try:
+                held = await self.job_queue.heartbeat(job['id'], worker_id, self.lease_seconds)
+            except Exception as e:
+                logger.warning(f"Heartbeat failed for job {job['id']}: {e}")
+                continue
+            if not held:
+                logger.warning(f"Lost lease on job {job['id']}; abandoning it")
+                job_task.cancel()
+                return
+
+    async def _run_job(self, job: dict, worker_id: str):
+        document_id = job['document_id']
+        payload = job['payload']
+
+        if job['attempts'] > job['max_attempts']:
+            # Lease expired on the final attempt (e.g. the worker crashed)
+            await self._fail_permanently(job, worker_id, "Exceeded maximum attempts")
+            return
+
+        logger.info(f"Processing document {document_id} (job {job['id']}, attempt {job['attempts']}/{job['max_attempts']})")
+        job_task = asyncio.ensure_future(self.pipeline.run(
+            file_url=payload['file_url'],
+            file_type=payload['file_type'],
+            document_id=document_id
+        ))
+        heartbeat = asyncio.create_task(self._heartbeat(job, worker_id, job_task))
+
+        try:
+            chunks_stored = await job_task
+        except asyncio.CancelledError:
+            if self._stopping.is_set():
+                raise
+            # Lease lost; another worker owns the job now
+            return
+        except Exception as e:
+            await self._handle_failure(job, worker_id, e)
+            return
+        finally:
+            heartbeat.cancel()
+
+        try:
+            await self.db_manager.update_document_status(document_id, "completed")
+            self.pipeline.vector_store.invalidate_tenant(payload['user_id'])
+            await self.job_queue.complete(job['id'], worker_id)
+            self.jobs_succeeded += 1
+            logger.info(f"Successfully processed document {document_id} with {chunks_stored} chunks")
+        except Exception as e:
+            logger.error(f"Failed to record completion of document {document_id}: {e}")
+
+    async def _handle_failure(self, job: dict, worker_id: str, error: Exception):
+        document_id = job['document_id']
+        if job['attempts'] >= job['max_attempts']:
+            await self._fail_permanently(job, worker_id, str(error))
+            return
+
+        delay = self.retry_delay(job['attempts'])
+        logger.warning(
+            f"Processing failed for document {document_id} (attempt {job['attempts']}/{job['max_attempts']}): "
+            f"{error}; retrying in {delay:.0f}s"
+        )
+        try:
+            await self.job_queue.fail(job['id'], worker_id, str(error), retry_delay=delay)
+            self.jobs_retried += 1
+        except Exception as e:
+            logger.error(f"Failed to reschedule job {job['id']}: {e}")
+
+    async def _fail_permanently(self, job: dict, worker_id: str, error: str):
+        document_id = job['document_id']
+        logger.error(f"Processing failed for document {document_id} after {job['max_attempts']} attempts: {error}")
+        try:
+            await self.job_queue.fail(job['id'], worker_id, error)
+            await self.db_manager.update_document_status(document_id, "failed")
+            self.jobs_failed += 1
+        except Exception as e:
+            logger.error(f"Failed to update document status: {e}")
+
+    def get_stats(self) -> dict:
+        """Worker pool metrics"""
+        return {
+            "running": bool(self._tasks),
+            "concurrency": self.concurrency,
+            "jobs_succeeded": self.jobs_succeeded,
+            "jobs_retried": self.jobs_retried,
+            "jobs_failed": self.jobs_failed,
+            "jobs_recovered": self.jobs_recovered
+        }
+
+# Global ingestion worker pool instance
+ingestion_worker_pool = IngestionWorkerPool(
+    job_queue,
+    ingestion_pipeline,
+    async_db_manager,
+    concurrency=settings.ingestion_concurrency,
+    lease_seconds=settings.job_lease_seconds,
+    heartbeat_seconds=settings.job_heartbeat_seconds,
+    poll_interval=settings.job_poll_interval_seconds,
+    max_attempts=settings.job_max_attempts,
+    retry_base_seconds=settings.job_retry_base_seconds,
+    retry_max_seconds=settings.job_retry_max_seconds
+)
+
+async def run_worker():
+    """Run the worker pool as a standalone process until SIGINT/SIGTERM"""
+    from app.services.pdf_extractor import pdf_extractor
+    from app.services.vector_store import vector_store
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    await async_db_manager.connect()
+    await job_queue.initialize()
+    await ingestion_worker_pool.start()
+    try:
+        await stop.wait()
+    finally:
+        logger.info("Shutting down ingestion workers...")
+        await ingestion_worker_pool.stop()
+        await job_queue.close()
+        vector_store.embedding_executor.shutdown()
+        pdf_extractor.shutdown()
+        await async_db_manager.close()
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=getattr(logging, settings.log_level.upper()),
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    asyncio.run(run_worker())
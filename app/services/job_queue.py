@@ -0,0 +1,385 @@
+import abc
+import asyncio
+import sqlite3
+import threading
+import logging
+import json
+import time
+import uuid
+from typing import Optional
+from app.config import settings
+from app.models.async_database import async_db_manager
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+# Attempts at queueing a job while a running job finishes under our feet
+ENQUEUE_ATTEMPTS = 3
+
+class JobAlreadyRunningError(RuntimeError):
+    """The document's job is running; a new one can be queued once it finishes"""
+
+class BaseJobQueue(abc.ABC):
+    """
+    Durable ingestion job queue.
+
+    Jobs are claimed under a time-limited lease that the worker renews with
+    heartbeats; a job whose lease expires (worker crash, restart) becomes
+    claimable again. At most one queued/running job exists per document.
+    """
+
+    async def initialize(self):
+        """Create any storage the backend needs"""
+
+    @abc.abstractmethod
+    async def enqueue(self, document_id: str, payload: dict, max_attempts: int) -> str:
+        """
+        Queue a job for a document and return its id. A queued job for the
+        document takes the new payload; JobAlreadyRunningError if one is running.
+        """
+
+    @abc.abstractmethod
+    async def claim(self, worker_id: str, lease_seconds: float) -> Optional[dict]:
+        """Lease the next runnable job, or return None"""
+
+    @abc.abstractmethod
+    async def heartbeat(self, job_id: str, worker_id: str, lease_seconds: float) -> bool:
+        """Extend a lease; returns False if the worker no longer holds it"""
+
+    @abc.abstractmethod
+    async def complete(self, job_id: str, worker_id: str):
+        """Mark a leased job as succeeded"""
+
+    @abc.abstractmethod
+    async def fail(self, job_id: str, worker_id: str, error: str, retry_delay: Optional[float] = None):
+        """Record a failure; requeue after ``retry_delay`` seconds, or fail permanently if None"""
+
+    @abc.abstractmethod
+    async def get_job_for_document(self, document_id: str) -> Optional[dict]:
+        """Most recent job for a document"""
+
+    async def has_active_job(self, document_id: str) -> bool:
+        """Whether a document has a queued or running job"""
+        job = await self.get_job_for_document(document_id)
+        return job is not None and job['status'] in (JOB_QUEUED, JOB_RUNNING)
+
+    @abc.abstractmethod
+    async def get_stats(self) -> dict:
+        """Job counts by status"""
+
+    async def close(self):
+        """Release backend resources"""
+
+class PostgresJobQueue(BaseJobQueue):
+    """Job queue stored in the ingestion_jobs table, claimed with FOR UPDATE SKIP LOCKED"""
+
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+
+    async def enqueue(self, document_id: str, payload: dict, max_attempts: int) -> str:
+        sql = """
+        INSERT INTO ingestion_jobs (id, document_id, payload, max_attempts)
+        VALUES ($1, $2, $3, $4)
+        ON CONFLICT (document_id) WHERE status IN ('queued', 'running') DO UPDATE SET
+            payload = EXCLUDED.payload,
+            updated_at = NOW()
+        WHERE ingestion_jobs.status = 'queued'
+        RETURNING id
+        """
+        async with self.db_manager.get_connection() as conn:
+            for _ in range(ENQUEUE_ATTEMPTS):
+                job_id = await conn.fetchval(sql, str(uuid.uuid4()), document_id, payload, max_attempts)
+                if job_id is not None:
+                    return job_id
+                # The conflicting job is running; it may also have finished since the insert
+                if await conn.fetchval(
+                    "SELECT id FROM ingestion_jobs WHERE document_id = $1 AND status = 'running'",
+                    document_id
+                ) is not None:
+                    raise JobAlreadyRunningError(f"Document {document_id} is already being processed")
+        raise RuntimeError(f"Could not queue a job for document {document_id}")
+
+    async def claim(self, worker_id: str, lease_seconds: float) -> Optional[dict]:
+        sql = """
+        UPDATE ingestion_jobs
+        SET status = 'running',
+            attempts = attempts + 1,
+            locked_by = $1,
+            lease_expires_at = NOW() + make_interval(secs => $2),
+            started_at = NOW(),
+            updated_at = NOW()
+        WHERE id = (
+            SELECT id FROM ingestion_jobs
+            WHERE (status = 'queued' AND run_at <= NOW())
+               OR (status = 'running' AND lease_expires_at < NOW())
+            ORDER BY run_at
+            FOR UPDATE SKIP LOCKED
+            LIMIT 1
+        )
+        RETURNING id, document_id, payload, attempts, max_attempts
+        """
+        async with self.db_manager.get_connection() as conn:
+            row = await conn.fetchrow(sql, worker_id, float(lease_seconds))
+            return dict(row) if row else None
+
+    async def heartbeat(self, job_id: str, worker_id: str, lease_seconds: float) -> bool:
+        sql = """
+        UPDATE ingestion_jobs
+        SET lease_expires_at = NOW() + make_interval(secs => $3), updated_at = NOW()
+        WHERE id = $1 AND locked_by = $2 AND status = 'running'
+        RETURNING id
+        """
+        async with self.db_manager.get_connection() as conn:
+            return await conn.fetchval(sql, job_id, worker_id, float(lease_seconds)) is not None
+
+    async def complete(self, job_id: str, worker_id: str):
+        sql = """
+        UPDATE ingestion_jobs
+        SET status = 'succeeded', locked_by = NULL, lease_expires_at = NULL,
+            finished_at = NOW(), updated_at = NOW()
+        WHERE id = $1 AND locked_by = $2
+        """
+        async with self.db_manager.get_connection() as conn:
+            await conn.execute(sql, job_id, worker_id)
+
+    async def fail(self, job_id: str, worker_id: str, error: str, retry_delay: Optional[float] = None):
+        if retry_delay is not None:
+            sql = """
+            UPDATE ingestion_jobs
+            SET status = 'queued', locked_by = NULL, lease_expires_at = NULL,
+                run_at = NOW() + make_interval(secs => $4), last_error = $3, updated_at = NOW()
+            WHERE id = $1 AND locked_by = $2
+            """
+            args = (job_id, worker_id, error, float(retry_delay))
+        else:
+            sql = """
+            UPDATE ingestion_jobs
+            SET status = 'failed', locked_by = NULL, lease_expires_at = NULL,
+                last_error = $3, finished_at = NOW(), updated_at = NOW()
+            WHERE id = $1 AND locked_by = $2
+            """
+            args = (job_id, worker_id, error)
+
+        async with self.db_manager.get_connection() as conn:
+            await conn.execute(sql, *args)
+
+    async def get_job_for_document(self, document_id: str) -> Optional[dict]:
+        sql = """
+        SELECT id, status, attempts, max_attempts, last_error, run_at, created_at, updated_at
+        FROM ingestion_jobs
+        WHERE document_id = $1
+        ORDER BY created_at DESC
+        LIMIT 1
+        """
+        async with self.db_manager.get_connection() as conn:
+            row = await conn.fetchrow(sql, document_id)
+            return dict(row) if row else None
+
+    async def get_stats(self) -> dict:
+        sql = "SELECT status, COUNT(*) AS count FROM ingestion_jobs GROUP BY status"
+        async with self.db_manager.get_connection() as conn:
+            rows = await conn.fetch(sql)
+            return {"backend": "postgres", **{row['status']: row['count'] for row in rows}}
+
+class SQLiteJobQueue(BaseJobQueue):
+    """
+    Job queue stored in a local SQLite file, for tests and single-host setups.
+    Calls run in a worker thread; a lock serializes access to the connection.
+    """
+
+    CREATE_SQL = """
+    CREATE TABLE IF NOT EXISTS ingestion_jobs (
+        id TEXT PRIMARY KEY,
+        document_id TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'queued',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        max_attempts INTEGER NOT NULL,
+        run_at REAL NOT NULL,
+        lease_expires_at REAL,
+        locked_by TEXT,
+        last_error TEXT,
+        created_at REAL NOT NULL,
+        updated_at REAL NOT NULL,
+        started_at REAL,
+        finished_at REAL
+    );
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_ingestion_jobs_active_document
+        ON ingestion_jobs(document_id) WHERE status IN ('queued', 'running');
+    CREATE INDEX IF NOT EXISTS idx_ingestion_jobs_runnable ON ingestion_jobs(status, run_at);
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.row_factory = sqlite3.Row
+        return self._conn
+
+    async def _run(self, func, *args):
+        """Run a blocking function holding the connection lock, off the event loop"""
+        def locked():
+            with self._lock:
+                return func(self._connection(), *args)
+        return await asyncio.to_thread(locked)
+
+    @staticmethod
+    def _row_to_job(row) -> Optional[dict]:
+        if row is None:
+            return None
+        job = dict(row)
+        if 'payload' in job:
+            job['payload'] = json.loads(job['payload'])
+        return job
+
+    async def initialize(self):
+        await self._run(lambda conn: conn.executescript(self.CREATE_SQL))
+
+    async def enqueue(self, document_id: str, payload: dict, max_attempts: int) -> str:
+        def enqueue(conn):
+            now = time.time()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT id, status FROM ingestion_jobs "
+                    "WHERE document_id = ? AND status IN ('queued', 'running')",
+                    (document_id,)
+                ).fetchone()
+                if row is not None:
+                    if row['status'] == JOB_RUNNING:
+                        raise JobAlreadyRunningError(f"Document {document_id} is already being processed")
+                    conn.execute(
+                        "UPDATE ingestion_jobs SET payload = ?, updated_at = ? WHERE id = ?",
+                        (json.dumps(payload), now, row['id'])
+                    )
+                    job_id = row['id']
+                else:
+                    job_id = str(uuid.uuid4())
+                    conn.execute(
+                        "INSERT INTO ingestion_jobs (id, document_id, payload, max_attempts, run_at, created_at, updated_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (job_id, document_id, json.dumps(payload), max_attempts, now, now, now)
+                    )
+                conn.execute("COMMIT")
+                return job_id
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+        return await self._run(enqueue)
+
+    async def claim(self, worker_id: str, lease_seconds: float) -> Optional[dict]:
+        def claim(conn):
+            now = time.time()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT id FROM ingestion_jobs "
+                    "WHERE (status = 'queued' AND run_at <= ?) OR (status = 'running' AND lease_expires_at < ?) "
+                    "ORDER BY run_at LIMIT 1",
+                    (now, now)
+                ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+                conn.execute(
+                    "UPDATE ingestion_jobs SET status = 'running', attempts = attempts + 1, locked_by = ?, "
+                    "lease_expires_at = ?, started_at = ?, updated_at = ? WHERE id = ?",
+                    (worker_id, now + lease_seconds, now, now, row['id'])
+                )
+                job = conn.execute(
+                    "SELECT id, document_id, payload, attempts, max_attempts FROM ingestion_jobs WHERE id = ?",
+                    (row['id'],)
+                ).fetchone()
+                conn.execute("COMMIT")
+                return self._row_to_job(job)
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+        return await self._run(claim)
+
+    async def heartbeat(self, job_id: str, worker_id: str, lease_seconds: float) -> bool:
+        def heartbeat(conn):
+            now = time.time()
+            cursor = conn.execute(
+                "UPDATE ingestion_jobs SET lease_expires_at = ?, updated_at = ? "
+                "WHERE id = ? AND locked_by = ? AND status = 'running'",
+                (now + lease_seconds, now, job_id, worker_id)
+            )
+            return cursor.rowcount > 0
+
+        return await self._run(heartbeat)
+
+    async def complete(self, job_id: str, worker_id: str):
+        def complete(conn):
+            now = time.time()
+            conn.execute(
+                "UPDATE ingestion_jobs SET status = 'succeeded', locked_by = NULL, lease_expires_at = NULL, "
+                "finished_at = ?, updated_at = ? WHERE id = ? AND locked_by = ?",
+                (now, now, job_id, worker_id)
+            )
+
+        await self._run(complete)
+
+    async def fail(self, job_id: str, worker_id: str, error: str, retry_delay: Optional[float] = None):
+        def fail(conn):
+            now = time.time()
+            if retry_delay is not None:
+                conn.execute(
+                    "UPDATE ingestion_jobs SET status = 'queued', locked_by = NULL, lease_expires_at = NULL, "
+                    "run_at = ?, last_error = ?, updated_at = ? WHERE id = ? AND locked_by = ?",
+                    (now + retry_delay, error, now, job_id, worker_id)
+                )
+            else:
+                conn.execute(
+                    "UPDATE ingestion_jobs SET status = 'failed', locked_by = NULL, lease_expires_at = NULL, "
+                    "last_error = ?, finished_at = ?, updated_at = ? WHERE id = ? AND locked_by = ?",
+                    (error, now, now, job_id, worker_id)
+                )
+
+        await self._run(fail)
+
+    async def get_job_for_document(self, document_id: str) -> Optional[dict]:
+        def get_job(conn):
+            return self._row_to_job(conn.execute(
+                "SELECT id, status, attempts, max_attempts, last_error, run_at, created_at, updated_at "
+                "FROM ingestion_jobs WHERE document_id = ? ORDER BY created_at DESC LIMIT 1",
+                (document_id,)
+            ).fetchone())
+
+        return await self._run(get_job)
+
+    async def get_stats(self) -> dict:
+        def stats(conn):
+            rows = conn.execute("SELECT status, COUNT(*) AS count FROM ingestion_jobs GROUP BY status").fetchall()
+            return {"backend": "sqlite", **{row['status']: row['count'] for row in rows}}
+
+        return await self._run(stats)
+
+    async def close(self):
+        def close(conn):
+            conn.close()
+            self._conn = None
+
+        if self._conn is not None:
+            await self._run(close)
+
+def create_job_queue() -> BaseJobQueue:
+    """Build the job queue backend selected in settings"""
+    if settings.job_queue_backend == "sqlite":
+        return SQLiteJobQueue(settings.job_queue_sqlite_path)
+    if settings.job_queue_backend == "postgres":
+        return PostgresJobQueue(async_db_manager)
+    raise ValueError(f"Unsupported job queue backend: {settings.job_queue_backend}")
+
+# Global job queue instance
+job_queue = create_job_queue()
@@ -0,0 +1,125 @@
+from concurrent.futures import ProcessPoolExecutor
+import concurrent.futures
+import multiprocessing
+import signal
+import logging
+import os
+from typing import Iterator, List, Tuple
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+class PageTimeoutError(Exception):
+    """Raised inside a worker when a single page takes too long to extract"""
+
+def _raise_page_timeout(signum, frame):
+    raise PageTimeoutError()
+
+def _extract_page_range(path: str, start: int, end: int, page_timeout: float) -> List[Tuple[int, str]]:
+    """
+    Extract pages [start, end) of a PDF in a worker process.
+
+    Returns (page_number, text) pairs with 1-based page numbers. Pages that fail
+    or exceed ``page_timeout`` seconds are skipped. The timeout uses SIGALRM,
+    which is available on Unix where pool tasks run on the worker's main thread.
+    """
+    import PyPDF2
+
+    use_alarm = page_timeout > 0 and hasattr(signal, "SIGALRM")
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _raise_page_timeout)
+
+    reader = PyPDF2.PdfReader(path)
+    pages = []
+    for page_num in range(start, end):
+        try:
+            if use_alarm:
+                signal.setitimer(signal.ITIMER_REAL, page_timeout)
+            page_text = reader.pages[page_num].extract_text()
+        except PageTimeoutError:
+            logger.warning(f"Timed out extracting text from page {page_num} after {page_timeout}s")
+            continue
+        except Exception as e:
+            logger.warning(f"Failed to extract text from page {page_num}: {e}")
+            continue
+        finally:
+            if use_alarm:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+
+        if page_text and page_text.strip():
+            pages.append((page_num + 1, page_text))
+
+    return pages
+
+class ParallelPdfExtractor:
+    """
+    Shards PDF text extraction by page range across a process pool.
+
+    PyPDF2 extraction is CPU-bound pure Python, so large documents are split
+    into ranges of ``pages_per_shard`` pages that worker processes extract
+    independently; results are yielded back in page order as soon as each
+    leading shard completes.
+    """
+
+    def __init__(self, workers: int = 0, pages_per_shard: int = 16,
+                 page_timeout: float = 10.0, min_pages: int = 32):
+        self.workers = workers or os.cpu_count() or 1
+        self.pages_per_shard = pages_per_shard
+        self.page_timeout = page_timeout
+        self.min_pages = min_pages
+        self._pool = None
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        """Worker pool, created on first use"""
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            logger.info(f"Started PDF extraction pool with {self.workers} workers")
+        return self._pool
+
+    def should_parallelize(self, page_count: int) -> bool:
+        """Whether a document is large enough to be worth sharding"""
+        return self.workers > 1 and page_count >= self.min_pages
+
+    def iter_pages(self, path: str, page_count: int) -> Iterator[Tuple[int, str]]:
+        """Yield (page_number, text) for every page with text, in page order"""
+        shards = [
+            (start, min(start + self.pages_per_shard, page_count))
+            for start in range(0, page_count, self.pages_per_shard)
+        ]
+        futures = [
+            self.pool.submit(_extract_page_range, path, start, end, self.page_timeout)
+            for start, end in shards
+        ]
+        logger.info(f"Extracting {page_count} PDF pages in {len(shards)} shards")
+
+        try:
+            for (start, end), future in zip(shards, futures):
+                # Generous bound in case a worker hangs outside the per-page alarm
+                shard_timeout = self.page_timeout * (end - start) + 30 if self.page_timeout > 0 else None
+                try:
+                    yield from future.result(timeout=shard_timeout)
+                except concurrent.futures.TimeoutError:
+                    logger.warning(f"Timed out extracting PDF pages {start}-{end - 1}; skipping them")
+                except Exception as e:
+                    logger.warning(f"Failed to extract PDF pages {start}-{end - 1}: {e}")
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def shutdown(self):
+        """Shut down the worker pool"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+# Global PDF extractor instance
+pdf_extractor = ParallelPdfExtractor(
+    workers=settings.pdf_extraction_workers,
+    pages_per_shard=settings.pdf_pages_per_shard,
+    page_timeout=settings.pdf_page_timeout_seconds,
+    min_pages=settings.pdf_parallel_min_pages
+)
@@ -0,0 +1,160 @@
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import logging
+import threading
+import time
+from typing import List, Optional, Tuple
+from app.config import settings
+from app.models.schemas import RelevantChunk
+from app.utils.lru_cache import BoundedLRUCache
+from app.utils.text_processing import content_hash
+
+logger = logging.getLogger(__name__)
+
+class Reranker:
+    """
+    Cross-encoder reranking of retrieved chunks under a latency budget.
+
+    Candidates are scored in batches on a dedicated worker thread. Before each
+    batch the remaining budget is checked, and if it runs out the candidates
+    are returned in their original (vector) order instead. A batch still in
+    flight when the budget expires finishes in the background and its scores
+    are cached. Scores are cached by (query hash, chunk id); chunk ids change
+    whenever chunk content changes, so cached scores never go stale.
+    """
+
+    def __init__(self, model_name: str, batch_size: int = 16, max_length: int = 512,
+                 cache_max_entries: int = 50000):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.cache = BoundedLRUCache(max_entries=cache_max_entries)
+
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="reranker")
+
+        # Metrics
+        self.requests = 0
+        self.reranked = 0
+        self.fallbacks = 0
+        self.errors = 0
+        self.pairs_scored = 0
+
+    @property
+    def model(self):
+        """Cross-encoder model, loaded on first use"""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    from sentence_transformers import CrossEncoder
+                    logger.info(f"Loading reranker model: {self.model_name}")
+                    self._model = CrossEncoder(self.model_name, max_length=self.max_length, device="cpu")
+        return self._model
+
+    def _score_batch(self, query_key: str, query: str, chunks: List[RelevantChunk]) -> List[float]:
+        """Score (query, chunk) pairs and cache the results (runs on the worker thread)"""
+        scores = self.model.predict(
+            [(query, chunk.content) for chunk in chunks],
+            batch_size=self.batch_size,
+            show_progress_bar=False
+        )
+        scores = [float(score) for score in scores]
+        for chunk, score in zip(chunks, scores):
+            self.cache.put(f"{query_key}:{chunk.chunk_id}", score)
+        self.pairs_scored += len(chunks)
+        return scores
+
+    async def rerank(self, query: str, chunks: List[RelevantChunk], top_k: int,
+                     budget_ms: Optional[float] = None) -> Tuple[List[RelevantChunk], dict]:
+        """
+        Reorder chunks by cross-encoder score and keep the top_k. Returns the
+        chunks and a summary of the rerank (falls back to the given order when
+        the budget is exceeded or scoring fails).
+        """
+        self.requests += 1
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        budget = (settings.reranker_budget_ms if budget_ms is None else budget_ms) / 1000.0
+        deadline = start + budget
+
+        query_key = content_hash(query, self.model_name)
+        scores = {}
+        pending = []
+        for chunk in chunks:
+            cached = self.cache.get(f"{query_key}:{chunk.chunk_id}")
+            if cached is None:
+                pending.append(chunk)
+            else:
+                scores[chunk.chunk_id] = cached
+        cache_hits = len(scores)
+
+        def fallback(reason: str) -> Tuple[List[RelevantChunk], dict]:
+            self.fallbacks += 1
+            return chunks[:top_k], {
+                "reranked": False,
+                "reason": reason,
+                "candidates": len(chunks),
+                "cache_hits": cache_hits,
+                "rerank_ms": round((loop.time() - start) * 1000, 3)
+            }
+
+        try:
+            for offset in range(0, len(pending), self.batch_size):
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return fallback("budget_exceeded")
+                batch = pending[offset:offset + self.batch_size]
+                future = loop.run_in_executor(self._executor, self._score_batch, query_key, query, batch)
+                # shield: on timeout the batch keeps running and still fills the cache
+                batch_scores = await asyncio.wait_for(asyncio.shield(future), remaining)
+                scores.update((chunk.chunk_id, score) for chunk, score in zip(batch, batch_scores))
+        except asyncio.TimeoutError:
+            return fallback("budget_exceeded")
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Reranking failed, keeping vector order: {e}")
+            return fallback("error")
+
+        ranked = sorted(chunks, key=lambda chunk: scores[chunk.chunk_id], reverse=True)[:top_k]
+        for chunk in ranked:
+            chunk.metadata = {**(chunk.metadata or {}), 'rerank_score': scores[chunk.chunk_id]}
+
+        self.reranked += 1
+        return ranked, {
+            "reranked": True,
+            "candidates": len(chunks),
+            "cache_hits": cache_hits,
+            "rerank_ms": round((loop.time() - start) * 1000, 3)
+        }
+
+    def warmup(self):
+        """Load the model and run one pair so the first request is not charged for it"""
+        start = time.time()
+        self.model.predict([("warmup", "warmup")], show_progress_bar=False)
+        logger.info(f"Reranker model ready in {time.time() - start:.2f}s")
+
+    def shutdown(self):
+        """Stop the scoring thread"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_stats(self) -> dict:
+        """Rerank, fallback and cache metrics"""
+        return {
+            "model_name": self.model_name,
+            "model_loaded": self._model is not None,
+            "requests": self.requests,
+            "reranked": self.reranked,
+            "fallbacks": self.fallbacks,
+            "errors": self.errors,
+            "pairs_scored": self.pairs_scored,
+            "cache": self.cache.get_stats()
+        }
+
+# Global reranker instance
+reranker = Reranker(
+    settings.reranker_model_name,
+    batch_size=settings.reranker_batch_size,
+    max_length=settings.reranker_max_length,
+    cache_max_entries=settings.reranker_cache_max_entries
+)
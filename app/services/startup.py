@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+class StartupTracker:
+    """
+    Per-phase startup timings and the readiness gate behind /health/ready.
+
+    Blocking phases run before the port opens; background phases (e.g. the
+    model warm-up with LAZY_STARTUP) run after it. The service is ready once
+    the blocking phases have finished and every background phase succeeded.
+    """
+
+    def __init__(self):
+        self.created_at = time.time()
+        self.phases: Dict[str, float] = {}
+        self.pending = set()
+        self.errors: Dict[str, str] = {}
+        self.startup_complete = False
+        self._tasks = []
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a blocking startup phase"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name: str, seconds: float):
+        self.phases[name] = seconds
+        logger.info(f"Startup phase {name} took {seconds:.3f}s")
+
+    def run_in_background(self, name: str, func: Callable):
+        """Run a blocking function in a thread after startup; readiness waits for it"""
+        self.pending.add(name)
+
+        async def run():
+            start = time.perf_counter()
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, func)
+                self.record(name, time.perf_counter() - start)
+            except Exception as e:
+                logger.error(f"Background startup phase {name} failed: {e}")
+                self.errors[name] = str(e)
+            finally:
+                self.pending.discard(name)
+
+        self._tasks.append(asyncio.get_running_loop().create_task(run()))
+
+    def complete(self):
+        """Mark the blocking phases done (the port is about to open)"""
+        self.startup_complete = True
+        logger.info(
+            f"Startup completed in {sum(self.phases.values()):.3f}s "
+            f"({', '.join(f'{name} {seconds:.3f}s' for name, seconds in self.phases.items())})"
+            + (f"; still warming up: {', '.join(sorted(self.pending))}" if self.pending else "")
+        )
+
+    @property
+    def ready(self) -> bool:
+        return self.startup_complete and not self.pending and not self.errors
+
+    @property
+    def status(self) -> str:
+        if self.errors:
+            return "failed"
+        return "ready" if self.ready else "starting"
+
+    async def stop(self):
+        """Cancel background phases still running at shutdown"""
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+    def get_stats(self) -> dict:
+        """Readiness and per-phase timings in milliseconds"""
+        return {
+            "status": self.status,
+            "uptime_seconds": round(time.time() - self.created_at, 1),
+            "phases_ms": {name: round(seconds * 1000, 1) for name, seconds in self.phases.items()},
+            "pending": sorted(self.pending),
+            "errors": self.errors
+        }
+
+# Global startup tracker instance
+startup_tracker = StartupTracker()
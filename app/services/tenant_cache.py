@@ -0,0 +1,213 @@
+import numpy as np
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+from app.config import settings
+from app.models.async_database import async_db_manager, vector_to_numpy
+from app.models.migrations import TENANT_VECTORS_CHANNEL
+from app.utils.lru_cache import BoundedLRUCache
+
+logger = logging.getLogger(__name__)
+
+# Seconds between liveness checks of the LISTEN connection, and before reconnecting
+LISTENER_CHECK_SECONDS = 30.0
+LISTENER_RETRY_SECONDS = 5.0
+
+class TenantIndex:
+    """One tenant's searchable chunk embeddings as a contiguous, L2-normalized float32 matrix"""
+
+    def __init__(self, chunk_ids: List[str], document_ids: List[str], embeddings: List[list]):
+        self.chunk_ids = np.array(chunk_ids, dtype=object)
+        self.document_ids = np.array(document_ids, dtype=object)
+        matrix = np.ascontiguousarray(embeddings, dtype=np.float32).reshape(len(chunk_ids), settings.embedding_dimension)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        self.matrix = matrix / norms
+        self.loaded_at = time.time()
+
+    @property
+    def nbytes(self) -> int:
+        # Object arrays hold pointers; count the id strings roughly as well
+        return self.matrix.nbytes + 2 * self.chunk_ids.size * 64
+
+    def search(self, query_embedding: list, top_k: int, similarity_threshold: float,
+               document_ids: Optional[List[str]] = None) -> List[Tuple[str, float]]:
+        """Exact cosine search: one matrix-vector product, argpartition for the top_k"""
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query_norm = np.linalg.norm(query)
+        if query_norm == 0 or self.matrix.shape[0] == 0:
+            return []
+
+        scores = self.matrix @ (query / query_norm)
+        if document_ids:
+            scores = np.where(np.isin(self.document_ids, document_ids), scores, -np.inf)
+
+        k = min(top_k, scores.shape[0])
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            (self.chunk_ids[i], float(scores[i]))
+            for i in top if scores[i] >= similarity_threshold
+        ]
+
+class TenantVectorCache:
+    """
+    In-process cache of small tenants' embeddings for exact search without a
+    database round trip.
+
+    A tenant is loaded on its first search if it has at most ``max_chunks``
+    searchable chunks; larger tenants are remembered and left to Postgres.
+    Tenants are evicted least-recently-used once the matrices exceed
+    ``max_mb``. Entries are invalidated when one of the tenant's documents
+    starts processing, completes or is deleted: directly in the process that
+    made the change, and in every other process (API workers, standalone
+    ingestion workers) through the documents triggers' NOTIFY, which
+    ``start_listener`` subscribes to. While the LISTEN connection is down
+    nothing is served from the cache; ``ttl_seconds`` is a last backstop.
+    """
+
+    def __init__(self, db_manager, max_mb: float = 256, max_chunks: int = 20000,
+                 ttl_seconds: float = 600, enabled: bool = False):
+        self.db_manager = db_manager
+        self.max_chunks = max_chunks
+        self.enabled = enabled
+        self._indexes = BoundedLRUCache(
+            max_entries=1_000_000,
+            max_bytes=int(max_mb * 1024 * 1024),
+            ttl_seconds=ttl_seconds,
+            sizeof=lambda index: index.nbytes
+        )
+        self._oversized = BoundedLRUCache(max_entries=10000, ttl_seconds=ttl_seconds)
+        self._load_locks: Dict[str, asyncio.Lock] = {}
+        # Tenants with a load in flight -> invalidated since the load started
+        self._loading: Dict[str, bool] = {}
+        self._listener_task: Optional[asyncio.Task] = None
+        self._listening = False
+
+        # Metrics
+        self.loads = 0
+        self.load_time_total = 0.0
+        self.invalidations = 0
+        self.remote_invalidations = 0
+
+    async def get(self, user_id: str) -> Optional[TenantIndex]:
+        """The tenant's index, loading it if needed; None when the tenant is too large to cache"""
+        if not self.enabled or (self._listener_task is not None and not self._listening):
+            # Changes from other processes are not being received
+            return None
+        index = self._indexes.get(user_id)
+        if index is not None or self._oversized.get(user_id):
+            return index
+
+        lock = self._load_locks.setdefault(user_id, asyncio.Lock())
+        async with lock:
+            index = self._indexes.get(user_id)
+            if index is None and not self._oversized.get(user_id):
+                index = await self._load(user_id)
+        if not lock.locked():
+            self._load_locks.pop(user_id, None)
+        return index
+
+    async def _load(self, user_id: str) -> Optional[TenantIndex]:
+        start = time.time()
+        self._loading[user_id] = False
+        try:
+            rows = await self.db_manager.get_user_embeddings(user_id, limit=self.max_chunks + 1)
+        finally:
+            invalidated = self._loading.pop(user_id)
+        if len(rows) > self.max_chunks:
+            if not invalidated:
+                self._oversized.put(user_id, True)
+            return None
+
+        index = TenantIndex(
+            [row['id'] for row in rows],
+            [row['document_id'] for row in rows],
+            [vector_to_numpy(row['embedding']) for row in rows]
+        )
+        # Drop the load if the tenant was invalidated while it was running
+        if not invalidated:
+            self._indexes.put(user_id, index)
+
+        duration = time.time() - start
+        self.loads += 1
+        self.load_time_total += duration
+        logger.debug(f"Cached {len(rows)} vectors for user {user_id} in {duration:.3f}s")
+        return index
+
+    def invalidate(self, user_id: str):
+        """Forget a tenant's cached vectors (its documents changed)"""
+        if user_id in self._loading:
+            self._loading[user_id] = True
+        self._indexes.pop(user_id)
+        self._oversized.pop(user_id)
+        self.invalidations += 1
+
+    def clear(self):
+        """Forget every tenant (change notifications may have been missed)"""
+        for user_id in self._loading:
+            self._loading[user_id] = True
+        self._indexes.clear()
+        self._oversized.clear()
+
+    def _on_notification(self, connection, pid, channel, user_id):
+        self.remote_invalidations += 1
+        self.invalidate(user_id)
+
+    async def start_listener(self):
+        """Subscribe to tenant change notifications from other processes"""
+        if self.enabled and self._listener_task is None:
+            self._listener_task = asyncio.get_running_loop().create_task(self._listen())
+
+    async def _listen(self):
+        """Hold a LISTEN connection, reconnecting (and clearing the cache) after failures"""
+        while True:
+            conn = None
+            try:
+                conn = await self.db_manager.connect_listener()
+                await conn.add_listener(TENANT_VECTORS_CHANNEL, self._on_notification)
+                # Anything cached may have changed while nobody was listening
+                self.clear()
+                self._listening = True
+                logger.info(f"Tenant cache listening for {TENANT_VECTORS_CHANNEL} notifications")
+                while True:
+                    await asyncio.sleep(LISTENER_CHECK_SECONDS)
+                    await asyncio.wait_for(conn.fetchval("SELECT 1"), LISTENER_CHECK_SECONDS)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Tenant cache listener failed, retrying in {LISTENER_RETRY_SECONDS}s: {e}")
+            finally:
+                self._listening = False
+                if conn is not None:
+                    conn.terminate()
+            await asyncio.sleep(LISTENER_RETRY_SECONDS)
+
+    async def stop(self):
+        """Stop listening for change notifications"""
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+            self._listener_task = None
+
+    def get_stats(self) -> dict:
+        """Occupancy, load and invalidation metrics"""
+        return {
+            "enabled": self.enabled,
+            "max_chunks_per_tenant": self.max_chunks,
+            "loads": self.loads,
+            "avg_load_ms": round(self.load_time_total / self.loads * 1000, 3) if self.loads else 0.0,
+            "invalidations": self.invalidations,
+            "remote_invalidations": self.remote_invalidations,
+            "listening": self._listening,
+            **self._indexes.get_stats()
+        }
+
+# Global tenant vector cache instance
+tenant_vector_cache = TenantVectorCache(
+    async_db_manager,
+    max_mb=settings.tenant_cache_max_mb,
+    max_chunks=settings.tenant_cache_max_chunks,
+    ttl_seconds=settings.tenant_cache_ttl_seconds,
+    enabled=settings.tenant_cache_enabled
+)
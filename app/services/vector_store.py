@@ -1,16 +1,61 @@
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 import time
-from app.models.database import db_manager
+from app.config import settings
+from app.models.async_database import async_db_manager
 from app.services.embedding_service import embedding_service
+from app.services.embedding_executor import embedding_executor
+from app.services.embedding_batcher import embedding_batcher
+from app.services.tenant_cache import tenant_vector_cache
 from app.models.schemas import RelevantChunk
 
 logger = logging.getLogger(__name__)
 
 class VectorStore:
     def __init__(self):
-        self.db_manager = db_manager
+        self.db_manager = async_db_manager
         self.embedding_service = embedding_service
+        self.embedding_executor = embedding_executor
+        self.embedding_batcher = embedding_batcher
+        self.tenant_cache = tenant_vector_cache
+    
+    async def embed_chunks(self, chunks_data: List[dict],
+                           known_embeddings: Optional[Dict[str, Any]] = None) -> List[tuple]:
+        """
+        Generate embeddings for chunks and return rows ready for insert_chunks.
+        
+        Chunks whose content hash is in ``known_embeddings`` reuse that embedding;
+        only the remaining distinct texts are encoded, and their embeddings are
+        added to ``known_embeddings`` for later batches.
+        """
+        if known_embeddings is None:
+            known_embeddings = {}
+        
+        # Collect the distinct texts that still need an embedding
+        pending = {}
+        for chunk in chunks_data:
+            if chunk['content_hash'] not in known_embeddings:
+                pending.setdefault(chunk['content_hash'], chunk['content'])
+        
+        if pending:
+            # Generate embeddings in the bulk lane so searches are not held up
+            embeddings = await self.embedding_executor.encode_documents(list(pending.values()))
+            known_embeddings.update(zip(pending.keys(), embeddings))
+        
+        # Prepare data for database insertion
+        db_chunks_data = []
+        for chunk in chunks_data:
+            db_chunks_data.append((
+                chunk['chunk_id'],
+                chunk['document_id'],
+                chunk['content'],
+                chunk['chunk_index'],
+                known_embeddings[chunk['content_hash']],
+                chunk['content_hash'],
+                chunk.get('metadata', {})
+            ))
+        
+        return db_chunks_data
     
     async def store_document_chunks(self, chunks_data: List[dict]) -> int:
         """
@@ -22,26 +67,10 @@ class VectorStore:
             
             logger.info(f"Processing {len(chunks_data)} chunks for embedding storage")
             
-            # Extract texts for batch embedding generation
-            texts = [chunk['content'] for chunk in chunks_data]
-            
-            # Generate embeddings in batch
-            embeddings = self.embedding_service.generate_embeddings_batch(texts)
-            
-            # Prepare data for database insertion
-            db_chunks_data = []
-            for chunk, embedding in zip(chunks_data, embeddings):
-                db_chunks_data.append((
-                    chunk['chunk_id'],
-                    chunk['document_id'],
-                    chunk['content'],
-                    chunk['chunk_index'],
-                    embedding,  # This will be converted to vector type by psycopg2
-                    chunk.get('metadata', {})
-                ))
+            db_chunks_data = await self.embed_chunks(chunks_data)
             
             # Insert chunks into database
-            self.db_manager.insert_chunks(db_chunks_data)
+            await self.db_manager.insert_chunks(db_chunks_data)
             
             logger.info(f"Successfully stored {len(db_chunks_data)} chunks with embeddings")
             return len(db_chunks_data)
@@ -53,7 +82,9 @@ class VectorStore:
     async def similarity_search(self, query: str, user_id: str, 
                                document_ids: List[str] = None, 
                                top_k: int = 5, 
-                               similarity_threshold: float = 0.3) -> List[RelevantChunk]:
+                               similarity_threshold: float = 0.3,
+                               probes: Optional[int] = None,
+                               ef_search: Optional[int] = None) -> List[RelevantChunk]:
         """
         Perform similarity search against stored document chunks
         """
@@ -61,54 +92,178 @@ class VectorStore:
             start_time = time.time()
             
             # Generate embedding for the query
-            query_embedding = self.embedding_service.generate_embedding(query)
+            query_embedding = await self.embedding_batcher.embed(query)
+            
+            # Small tenants are searched exactly in memory; only content is fetched
+            search_results = await self._cached_search(
+                query_embedding, user_id, document_ids, top_k, similarity_threshold
+            )
+            
+            if search_results is None:
+                # Perform semantic search
+                search_results = await self.db_manager.semantic_search(
+                    query_embedding=query_embedding,
+                    user_id=user_id,
+                    document_ids=document_ids,
+                    top_k=top_k,
+                    similarity_threshold=similarity_threshold,
+                    probes=probes,
+                    ef_search=ef_search
+                )
+            
+            search_time = time.time() - start_time
+            relevant_chunks = self._to_relevant_chunks(search_results, search_time)
+            
+            logger.info(f"Found {len(relevant_chunks)} relevant chunks in {search_time:.3f}s")
+            
+            return relevant_chunks
             
-            # Perform semantic search
-            search_results = self.db_manager.semantic_search(
+        except Exception as e:
+            logger.error(f"Similarity search failed: {e}")
+            raise RuntimeError(f"Search failed: {str(e)}")
+    
+    async def _cached_search(self, query_embedding: list, user_id: str, document_ids: Optional[List[str]],
+                             top_k: int, similarity_threshold: float) -> Optional[List[dict]]:
+        """Exact search over the tenant's cached vectors, or None if the tenant is not cacheable"""
+        index = await self.tenant_cache.get(user_id)
+        if index is None:
+            return None
+        
+        matches = index.search(query_embedding, top_k, similarity_threshold, document_ids)
+        if not matches:
+            return []
+        
+        chunks = await self.db_manager.get_chunks_by_ids(user_id, [chunk_id for chunk_id, _ in matches])
+        # A chunk missing here changed after the vectors were cached; skip it
+        return [
+            {**chunks[chunk_id], 'similarity_score': score}
+            for chunk_id, score in matches if chunk_id in chunks
+        ]
+    
+    def invalidate_tenant(self, user_id: str):
+        """Drop a tenant's cached vectors after its documents change"""
+        self.tenant_cache.invalidate(user_id)
+    
+    async def hybrid_search(self, query: str, user_id: str,
+                            document_ids: List[str] = None,
+                            top_k: int = 5,
+                            similarity_threshold: float = 0.3,
+                            vector_weight: Optional[float] = None,
+                            lexical_weight: Optional[float] = None,
+                            probes: Optional[int] = None,
+                            ef_search: Optional[int] = None) -> Tuple[List[RelevantChunk], Dict[str, Any]]:
+        """
+        Hybrid lexical + vector search fused by reciprocal rank; returns the
+        chunks and the timing of each step with each leg's candidate count
+        """
+        try:
+            start_time = time.time()
+            
+            query_embedding = await self.embedding_batcher.embed(query)
+            embedded_at = time.time()
+            
+            search_results, legs = await self.db_manager.hybrid_search(
                 query_embedding=query_embedding,
+                query_text=query,
                 user_id=user_id,
                 document_ids=document_ids,
                 top_k=top_k,
-                similarity_threshold=similarity_threshold
+                similarity_threshold=similarity_threshold,
+                vector_weight=vector_weight,
+                lexical_weight=lexical_weight,
+                probes=probes,
+                ef_search=ef_search
             )
             
             search_time = time.time() - start_time
+            timings = {
+                'embedding_ms': round((embedded_at - start_time) * 1000, 3),
+                'retrieval_ms': round((time.time() - embedded_at) * 1000, 3),
+                **legs
+            }
             
-            # Convert results to RelevantChunk objects
-            relevant_chunks = []
-            for result in search_results:
-                chunk = RelevantChunk(
-                    chunk_id=result['chunk_id'],
-                    document_id=result['document_id'],
-                    content=result['content'],
-                    similarity_score=float(result['similarity_score']),
-                    metadata={
-                        **(result.get('chunk_metadata') or {}),
-                        'document_metadata': result.get('document_metadata') or {},
-                        'search_time': search_time
-                    },
-                    filename=result.get('filename')
+            relevant_chunks = self._to_relevant_chunks(search_results, search_time)
+            for chunk, result in zip(relevant_chunks, search_results):
+                chunk.metadata.update(
+                    fusion_score=float(result['fusion_score']),
+                    vector_rank=result['vector_rank'],
+                    lexical_rank=result['lexical_rank']
                 )
-                relevant_chunks.append(chunk)
             
-            logger.info(f"Found {len(relevant_chunks)} relevant chunks in {search_time:.3f}s")
+            logger.info(
+                f"Hybrid search found {len(relevant_chunks)} chunks in {search_time:.3f}s "
+                f"({legs['vector_candidates']} vector, {legs['lexical_candidates']} lexical candidates)"
+            )
             
-            return relevant_chunks
+            return relevant_chunks, timings
             
         except Exception as e:
-            logger.error(f"Similarity search failed: {e}")
+            logger.error(f"Hybrid search failed: {e}")
             raise RuntimeError(f"Search failed: {str(e)}")
     
-    def get_document_statistics(self, document_id: str) -> Dict[str, Any]:
+    async def batch_similarity_search(self, queries: List[str], user_id: str,
+                                      top_ks: List[int], similarity_thresholds: List[float],
+                                      document_ids: List[str] = None,
+                                      probes: Optional[int] = None,
+                                      ef_search: Optional[int] = None) -> List[List[RelevantChunk]]:
+        """
+        Search several queries at once: one embedding call for all of them and
+        one database statement for all the nearest-neighbour lookups
+        """
+        try:
+            start_time = time.time()
+            
+            query_embeddings = await self.embedding_batcher.embed_many(queries)
+            
+            batch_results = await self.db_manager.batch_semantic_search(
+                query_embeddings=query_embeddings,
+                user_id=user_id,
+                top_ks=top_ks,
+                similarity_thresholds=similarity_thresholds,
+                document_ids=document_ids,
+                probes=probes,
+                ef_search=ef_search
+            )
+            
+            search_time = time.time() - start_time
+            logger.info(f"Batch search of {len(queries)} queries completed in {search_time:.3f}s")
+            
+            return [self._to_relevant_chunks(results, search_time) for results in batch_results]
+            
+        except Exception as e:
+            logger.error(f"Batch similarity search failed: {e}")
+            raise RuntimeError(f"Batch search failed: {str(e)}")
+    
+    @staticmethod
+    def _to_relevant_chunks(search_results: List[dict], search_time: float) -> List[RelevantChunk]:
+        """Convert database search rows to RelevantChunk objects"""
+        relevant_chunks = []
+        for result in search_results:
+            chunk = RelevantChunk(
+                chunk_id=result['chunk_id'],
+                document_id=result['document_id'],
+                content=result['content'],
+                similarity_score=float(result['similarity_score']),
+                metadata={
+                    **(result.get('chunk_metadata') or {}),
+                    'document_metadata': result.get('document_metadata') or {},
+                    'search_time': search_time
+                },
+                filename=result.get('filename')
+            )
+            relevant_chunks.append(chunk)
+        return relevant_chunks
+    
+    async def get_document_statistics(self, document_id: str) -> Dict[str, Any]:
         """Get statistics for a processed document"""
         try:
-            chunk_count = self.db_manager.get_document_chunks_count(document_id)
+            chunk_count = await self.db_manager.get_document_chunks_count(document_id)
             
             return {
                 'document_id': document_id,
                 'total_chunks': chunk_count,
                 'embedding_model': self.embedding_service.model_name,
-                'embedding_dimension': len(self.embedding_service.generate_embedding("test"))
+                'embedding_dimension': settings.embedding_dimension
             }
             
         except Exception as e:
@@ -118,32 +273,16 @@ class VectorStore:
                 'error': str(e)
             }
     
-    def health_check(self) -> Dict[str, Any]:
-        """Check the health of the vector store"""
-        try:
-            # Test database connection
-            with self.db_manager.get_connection() as conn:
-                with conn.cursor() as cur:
-                    cur.execute("SELECT 1")
-                    db_healthy = cur.fetchone() is not None
-            
-            # Test embedding service
-            test_embedding = self.embedding_service.generate_embedding("test")
-            embedding_healthy = len(test_embedding) == self.embedding_service.model.get_sentence_embedding_dimension()
-            
-            return {
-                'database_healthy': db_healthy,
-                'embedding_service_healthy': embedding_healthy,
-                'model_info': self.embedding_service.get_model_info()
-            }
-            
-        except Exception as e:
-            logger.error(f"Health check failed: {e}")
-            return {
-                'database_healthy': False,
-                'embedding_service_healthy': False,
-                'error': str(e)
-            }
+    def get_stats(self) -> Dict[str, Any]:
+        """Model information and pool/cache metrics (no checks; see HealthMonitor)"""
+        return {
+            'model_info': self.embedding_service.get_model_info(),
+            'database_pool': self.db_manager.get_pool_stats(),
+            'embedding_batcher': self.embedding_batcher.get_stats(),
+            'embedding_executor': self.embedding_executor.get_stats(),
+            'embedding_cache': self.embedding_service.cache.get_stats(),
+            'tenant_cache': self.tenant_cache.get_stats()
+        }
 
 # Global vector store instance
 vector_store = VectorStore()
\ No newline at end of file
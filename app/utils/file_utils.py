@@ -0,0 +1,105 @@
+import tempfile
+import io
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+class SpooledFile:
+    """
+    Write-once file body that stays in memory up to ``spool_threshold`` bytes
+    and spills to a named temporary file beyond that.
+
+    Writing past ``max_size`` raises ValueError, so callers can abort a
+    download as soon as the limit is crossed. Once written, the body is read
+    back through ``open_stream`` (the in-memory buffer, or a read-only handle
+    on the temporary file) without making another in-memory copy.
+    """
+
+    def __init__(self, spool_threshold: int, max_size: Optional[int] = None,
+                 directory: Optional[str] = None, suffix: str = ""):
+        self.spool_threshold = spool_threshold
+        self.max_size = max_size
+        self.directory = directory
+        self.suffix = suffix
+
+        self.size = 0
+        self._buffer = io.BytesIO()
+        self._file = None
+        self._readers = []
+
+    @property
+    def on_disk(self) -> bool:
+        return self._file is not None
+
+    @property
+    def path(self) -> Optional[str]:
+        """Filesystem path of the spilled body (flushed, so other processes can read it), or None while in memory"""
+        if self._file is None:
+            return None
+        self._file.flush()
+        return self._file.name
+
+    def write(self, data: bytes):
+        """Append data, spilling to disk past the threshold"""
+        if self.max_size is not None and self.size + len(data) > self.max_size:
+            raise ValueError(f"File size exceeds maximum allowed size of {self.max_size // (1024 * 1024)}MB")
+
+        if self._file is None and self.size + len(data) > self.spool_threshold:
+            self.rollover()
+
+        target = self._file if self._file is not None else self._buffer
+        target.write(data)
+        self.size += len(data)
+
+    def rollover(self):
+        """Move the in-memory body into a temporary file"""
+        if self._file is not None:
+            return
+        self._file = tempfile.NamedTemporaryFile(
+            prefix="smartmate-", suffix=self.suffix, dir=self.directory
+        )
+        self._file.write(self._buffer.getbuffer())
+        self._file.flush()
+        self._buffer = None
+        logger.debug(f"Spooled download to {self._file.name}")
+
+    def open_stream(self):
+        """Seekable binary stream over the written body"""
+        if self._file is None:
+            self._buffer.seek(0)
+            return self._buffer
+
+        self._file.flush()
+        reader = open(self._file.name, "rb")
+        self._readers.append(reader)
+        return reader
+
+    def getvalue(self) -> bytes:
+        """Copy of the whole body (avoid for large files)"""
+        return self.open_stream().read()
+
+    def close(self):
+        """Release the buffer, open readers and temporary file"""
+        for reader in self._readers:
+            reader.close()
+        self._readers = []
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._buffer = None
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def open_binary_stream(file_content):
+    """Seekable stream for raw bytes or a SpooledFile"""
+    if isinstance(file_content, SpooledFile):
+        return file_content.open_stream()
+    return io.BytesIO(file_content)
@@ -0,0 +1,48 @@
+import numpy as np
+import struct
+import io
+from typing import Iterable, Sequence
+
+# Binary COPY format: https://www.postgresql.org/docs/current/sql-copy.html#id-1.9.3.55.9.4
+_COPY_SIGNATURE = b'PGCOPY\n\xff\r\n\x00'
+_COPY_HEADER = _COPY_SIGNATURE + struct.pack('>ii', 0, 0)
+_COPY_TRAILER = struct.pack('>h', -1)
+_NULL_FIELD = struct.pack('>i', -1)
+
+def encode_text(value: str) -> bytes:
+    """Binary wire format for text/varchar"""
+    return value.encode('utf-8')
+
+def encode_int4(value: int) -> bytes:
+    """Binary wire format for integer"""
+    return struct.pack('>i', value)
+
+def encode_vector(value) -> bytes:
+    """Binary wire format for pgvector's vector type: dim, unused, float32 values (big-endian)"""
+    array = np.asarray(value, dtype='>f4')
+    return struct.pack('>HH', array.shape[0], 0) + array.tobytes()
+
+def write_binary_copy(rows: Iterable[Sequence], encoders: Sequence) -> io.BytesIO:
+    """
+    Serialize rows into a buffer in PostgreSQL binary COPY format.
+
+    ``encoders`` holds one function per column turning a Python value into its
+    binary representation; ``None`` values are written as NULL.
+    """
+    buffer = io.BytesIO()
+    buffer.write(_COPY_HEADER)
+    field_count = struct.pack('>h', len(encoders))
+
+    for row in rows:
+        buffer.write(field_count)
+        for value, encode in zip(row, encoders):
+            if value is None:
+                buffer.write(_NULL_FIELD)
+                continue
+            data = encode(value)
+            buffer.write(struct.pack('>i', len(data)))
+            buffer.write(data)
+
+    buffer.write(_COPY_TRAILER)
+    buffer.seek(0)
+    return buffer
@@ -1,9 +1,20 @@
 import re
-from typing import List
+import hashlib
+import unicodedata
+from typing import Iterable, Iterator, List, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
+def normalize_text(text: str) -> str:
+    """Normalize text for content hashing: Unicode NFKC and collapsed whitespace"""
+    text = unicodedata.normalize("NFKC", text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+def content_hash(text: str, model_name: str) -> str:
+    """Content address of a text under an embedding model (sha256 of model name and normalized text)"""
+    return hashlib.sha256(f"{model_name}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
 class TextChunker:
     def __init__(self, chunk_size: int = 500, chunk_overlap: int = 50):
         self.chunk_size = chunk_size
@@ -26,8 +37,8 @@ class TextChunker:
         
         return text.strip()
     
-    def split_into_sentences(self, text: str) -> List[str]:
-        """Split text into sentences"""
+    def _split_sentences(self, text: str):
+        """Split text into sentences, returning (sentences, unterminated remainder)"""
         sentences = []
         current_pos = 0
         
@@ -37,41 +48,73 @@ class TextChunker:
                 sentences.append(sentence)
             current_pos = match.end()
         
+        return sentences, text[current_pos:].strip()
+    
+    def split_into_sentences(self, text: str) -> List[str]:
+        """Split text into sentences"""
+        sentences, remaining = self._split_sentences(text)
+        
         # Add remaining text if any
-        if current_pos < len(text):
-            remaining = text[current_pos:].strip()
-            if remaining and len(remaining) > 10:
-                sentences.append(remaining)
+        if remaining and len(remaining) > 10:
+            sentences.append(remaining)
         
         return sentences
     
-    def chunk_text(self, text: str) -> List[str]:
+    def _iter_page_sentences(self, pages: Iterable[Tuple[Optional[int], str]]) -> Iterator[Tuple[str, Optional[int], Optional[int]]]:
         """
-        Chunk text into overlapping segments while preserving sentence boundaries
+        Yield (sentence, start_page, end_page) from a stream of (page_number, text)
+        pieces, carrying an unterminated trailing sentence over to the next piece
+        """
+        carry = ""
+        carry_page = None
+        for page_number, text in pages:
+            text = self.clean_text(f"{carry} {text}" if carry else text)
+            sentences, remainder = self._split_sentences(text)
+            
+            for i, sentence in enumerate(sentences):
+                start_page = carry_page if i == 0 and carry else page_number
+                yield sentence, start_page, page_number
+            
+            if not remainder:
+                carry, carry_page = "", None
+            elif not sentences and carry:
+                carry = remainder  # Still the same unterminated sentence
+            else:
+                carry, carry_page = remainder, page_number
+        
+        if carry and len(carry) > 10:
+            yield carry, carry_page, carry_page
+    
+    def iter_sentences(self, texts: Iterable[str]) -> Iterator[str]:
+        """
+        Yield sentences from a stream of text pieces (e.g. pages), carrying an
+        unterminated trailing sentence over to the next piece
+        """
+        for sentence, _, _ in self._iter_page_sentences((None, text) for text in texts):
+            yield sentence
+    
+    def _chunk_sentences(self, sentences: Iterable[Tuple[str, Optional[int], Optional[int]]]) -> Iterator[Tuple[str, Optional[int], Optional[int]]]:
+        """
+        Group (sentence, start_page, end_page) items into overlapping chunks of
+        roughly chunk_size characters, yielding (chunk, first_page, last_page)
         """
-        # Clean the text first
-        text = self.clean_text(text)
-        
-        # Split into sentences
-        sentences = self.split_into_sentences(text)
-        
-        if not sentences:
-            return []
-        
-        chunks = []
         current_chunk = []
         current_length = 0
         
-        i = 0
-        while i < len(sentences):
-            sentence = sentences[i]
-            sentence_length = len(sentence)
+        def finalize(items):
+            chunk_text = ' '.join(sentence for sentence, _, _ in items)
+            pages = [page for _, start, end in items for page in (start, end) if page is not None]
+            return chunk_text, min(pages, default=None), max(pages, default=None)
+        
+        for item in sentences:
+            sentence_length = len(item[0])
             
             # If adding this sentence would exceed chunk size
             if current_length + sentence_length > self.chunk_size and current_chunk:
                 # Finalize current chunk
-                chunk_text = ' '.join(current_chunk)
-                chunks.append(chunk_text)
+                chunk = finalize(current_chunk)
+                if len(chunk[0].strip()) > 50:  # Filter out very short chunks
+                    yield chunk
                 
                 # Start new chunk with overlap
                 overlap_chunk = []
@@ -79,10 +122,10 @@ class TextChunker:
                 
                 # Add sentences from the end of current chunk for overlap
                 for j in range(len(current_chunk) - 1, -1, -1):
-                    overlap_sentence = current_chunk[j]
-                    if overlap_length + len(overlap_sentence) <= self.chunk_overlap:
-                        overlap_chunk.insert(0, overlap_sentence)
-                        overlap_length += len(overlap_sentence)
+                    overlap_item = current_chunk[j]
+                    if overlap_length + len(overlap_item[0]) <= self.chunk_overlap:
+                        overlap_chunk.insert(0, overlap_item)
+                        overlap_length += len(overlap_item[0])
                     else:
                         break
                 
@@ -90,23 +133,52 @@ class TextChunker:
                 current_length = overlap_length
             
             # Add current sentence
-            current_chunk.append(sentence)
+            current_chunk.append(item)
             current_length += sentence_length
-            
-            i += 1
         
         # Add the last chunk if it has content
         if current_chunk:
-            chunk_text = ' '.join(current_chunk)
-            chunks.append(chunk_text)
+            chunk = finalize(current_chunk)
+            if len(chunk[0].strip()) > 50:
+                yield chunk
+    
+    def chunk_text(self, text: str) -> List[str]:
+        """
+        Chunk text into overlapping segments while preserving sentence boundaries
+        """
+        # Clean the text first
+        text = self.clean_text(text)
         
-        # Filter out very short chunks
-        chunks = [chunk for chunk in chunks if len(chunk.strip()) > 50]
+        # Split into sentences
+        sentences = self.split_into_sentences(text)
+        
+        if not sentences:
+            return []
+        
+        chunks = [
+            chunk for chunk, _, _ in
+            self._chunk_sentences((sentence, None, None) for sentence in sentences)
+        ]
         
         logger.info(f"Created {len(chunks)} chunks from {len(sentences)} sentences")
         
         return chunks
     
+    def chunk_stream(self, texts: Iterable[str]) -> Iterator[str]:
+        """
+        Incrementally chunk a stream of text pieces; yields the same chunks as
+        chunk_text would for the pieces joined together
+        """
+        for chunk, _, _ in self.chunk_pages((None, text) for text in texts):
+            yield chunk
+    
+    def chunk_pages(self, pages: Iterable[Tuple[Optional[int], str]]) -> Iterator[Tuple[str, Optional[int], Optional[int]]]:
+        """
+        Incrementally chunk (page_number, text) pieces, yielding
+        (chunk, first_page, last_page) so chunks keep their page span
+        """
+        return self._chunk_sentences(self._iter_page_sentences(pages))
+    
     def chunk_by_paragraphs(self, text: str) -> List[str]:
         """
         Alternative chunking method that preserves paragraph structure
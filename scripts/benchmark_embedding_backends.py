@@ -0,0 +1,124 @@
+"""
+Benchmark the embedding backends (EMBEDDING_BACKEND): torch, onnx and
+onnx-int8.
+
+Usage:
+    python -m scripts.export_onnx_model
+    python -m scripts.benchmark_embedding_backends
+    python -m scripts.benchmark_embedding_backends --backends onnx,onnx-int8 --threads 2
+
+Each backend runs in its own subprocess so import time and memory are
+measured from a clean interpreter. Reports model load time (imports
+included), peak RSS, single-query latency percentiles, batch throughput on
+chunk-sized texts, and the cosine similarity of each backend's vectors to the
+torch backend's.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+
+QUERY_TEXTS = [
+    "When is the midterm exam?",
+    "Explain the difference between mitosis and meiosis.",
+    "What are the grading criteria for the lab report?",
+    "Summarize the key points of lecture five.",
+    "How does gradient descent find a minimum?"
+]
+
+def chunk_texts(count: int) -> list:
+    """Chunk-sized passages of varying length"""
+    words = ("the student reviewed lecture notes on thermodynamics entropy energy "
+             "transfer and equilibrium before the final exam while the course "
+             "project covered statistics regression and hypothesis testing").split()
+    rng = np.random.default_rng(0)
+    return [" ".join(rng.choice(words, size=rng.integers(40, 200))) for _ in range(count)]
+
+def run_backend(backend_name: str, queries: int, batch_texts: int, batch_size: int, output: str):
+    """Child process: load one backend, time it, save its vectors for comparison"""
+    load_start = time.perf_counter()
+    from app.services.embedding_backends import create_embedding_backend
+    from app.config import settings
+    backend = create_embedding_backend(backend_name, settings.embedding_model_name)
+    load_seconds = time.perf_counter() - load_start
+
+    backend.encode(QUERY_TEXTS[0])  # warm up
+    latencies = []
+    for i in range(queries):
+        start = time.perf_counter()
+        backend.encode(QUERY_TEXTS[i % len(QUERY_TEXTS)])
+        latencies.append(time.perf_counter() - start)
+
+    texts = chunk_texts(batch_texts)
+    start = time.perf_counter()
+    embeddings = backend.encode(texts, batch_size=batch_size)
+    batch_seconds = time.perf_counter() - start
+
+    np.save(output, np.vstack([backend.encode(QUERY_TEXTS), embeddings[:100]]))
+    p50, p95 = np.percentile(np.array(latencies) * 1000, [50, 95])
+    print(json.dumps({
+        "load_s": load_seconds,
+        # ru_maxrss is in kilobytes on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "query_p50_ms": p50,
+        "query_p95_ms": p95,
+        "texts_per_s": len(texts) / batch_seconds
+    }))
+
+def main(args):
+    backends = args.backends.split(",")
+    env = dict(os.environ)
+    if args.threads:
+        env["EMBEDDING_ONNX_THREADS"] = str(args.threads)
+
+    results, vectors = {}, {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in backends:
+            output = os.path.join(tmp, f"{backend}.npy")
+            completed = subprocess.run(
+                [sys.executable, "-m", "scripts.benchmark_embedding_backends", "--child", backend,
+                 "--queries", str(args.queries), "--batch-texts", str(args.batch_texts),
+                 "--batch-size", str(args.batch_size), "--output", output],
+                env=env, capture_output=True, text=True
+            )
+            if completed.returncode != 0:
+                print(f"{backend} failed:\n{completed.stderr.strip()}")
+                continue
+            results[backend] = json.loads(completed.stdout.strip().splitlines()[-1])
+            vectors[backend] = np.load(output)
+
+    reference = vectors.get("torch")
+    print(f"\n{args.queries} single queries, {args.batch_texts} chunk texts (batch size {args.batch_size})")
+    print(f"  {'backend':<10} {'load':>8} {'peak rss':>10} {'query p50':>10} {'query p95':>10} "
+          f"{'texts/s':>9} {'min cos vs torch':>17}")
+    for backend, result in results.items():
+        agreement = "-"
+        if reference is not None and backend != "torch":
+            candidate = vectors[backend]
+            cosines = (reference * candidate).sum(axis=1) / (
+                np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1)
+            )
+            agreement = f"{cosines.min():.6f}"
+        print(f"  {backend:<10} {result['load_s']:7.2f}s {result['peak_rss_mb']:8.0f}MB "
+              f"{result['query_p50_ms']:8.1f}ms {result['query_p95_ms']:8.1f}ms "
+              f"{result['texts_per_s']:9.1f} {agreement:>17}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", default="torch,onnx,onnx-int8")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch-texts", type=int, default=512)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=0, help="onnxruntime intra-op threads (0 = default)")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        run_backend(args.child, args.queries, args.batch_texts, args.batch_size, args.output)
+    else:
+        main(args)
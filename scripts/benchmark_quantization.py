@@ -0,0 +1,87 @@
+"""
+Benchmark compact embedding storage: recall@k and latency of the configured
+storage (EMBEDDING_STORAGE) and of the binary-quantized first pass with exact
+re-scoring, against an exact float32 scan.
+
+Usage:
+    python -m scripts.benchmark_search --chunks 1000000 --tenants 1000
+    python -m scripts.benchmark_quantization --queries 200 --shortlists 50,100,200,400
+
+Uses the synthetic data loaded by scripts.benchmark_search (ids prefixed
+with "bench-search-"); build the binary index first with VECTOR_QUANTIZATION=binary
+(it is built at startup) or POST /admin/index/rebuild {"binary": true}. The
+float32 baseline casts stored embeddings to vector, so after converting to
+halfvec it measures ranking loss only; run once before converting to compare
+against true float32 values. Also prints the size of each vector index.
+"""
+import argparse
+import asyncio
+import time
+import numpy as np
+from app.config import settings
+from app.models.database import HNSW_MAX_EF_SEARCH
+from app.models.async_database import async_db_manager, SEMANTIC_SEARCH_SQL, BINARY_SEARCH_SQL
+from app.services.index_manager import index_manager
+from scripts.benchmark_search import ID_PREFIX, make_centroids, sample_vectors, percentiles
+
+# Exact top-k over float32 values, ignoring the threshold
+FLOAT32_EXACT_SQL = """
+SELECT dc.id
+FROM document_chunks dc
+WHERE dc.user_id = $2 AND dc.searchable
+ORDER BY (dc.embedding::vector <=> $1::vector) + 0  -- "+ 0" keeps the ANN index out of it
+LIMIT $3
+"""
+
+async def run_pass(sql: str, query, user_id: str, candidate_limit: int, top_k: int) -> list:
+    """One search pass (no widening) with ef_search raised to the candidate limit"""
+    async with async_db_manager.get_connection() as conn:
+        await async_db_manager._apply_search_settings(conn, None, min(candidate_limit, HNSW_MAX_EF_SEARCH))
+        rows = await conn.fetch(sql, query, user_id, -1.0, None, candidate_limit, top_k)
+        return [row['chunk_id'] for row in rows if row['chunk_id'] is not None]
+
+async def exact_ids(query, user_id: str, top_k: int) -> set:
+    async with async_db_manager.get_connection() as conn:
+        return {row['id'] for row in await conn.fetch(FLOAT32_EXACT_SQL, query, user_id, top_k)}
+
+async def benchmark(query_count: int, tenant_count: int, top_k: int, shortlists: list, rng, centroids):
+    queries = sample_vectors(rng, centroids, query_count, noise=0.5)
+    users = [f"{ID_PREFIX}user-{rng.integers(0, tenant_count)}" for _ in range(query_count)]
+    truths = [await exact_ids(query, user_id, top_k) for query, user_id in zip(queries, users)]
+
+    variants = [(f"{settings.embedding_storage} ann (candidates={top_k * settings.search_candidate_multiplier})",
+                 SEMANTIC_SEARCH_SQL, top_k * settings.search_candidate_multiplier)]
+    variants += [(f"binary + rescore (shortlist={size})", BINARY_SEARCH_SQL, size) for size in shortlists]
+
+    print(f"\n{query_count} queries, top_k={top_k}, storage={settings.embedding_storage}")
+    for name, sql, candidate_limit in variants:
+        timings, hits, total = [], 0, 0
+        for query, user_id, truth in zip(queries, users, truths):
+            start = time.perf_counter()
+            found = await run_pass(sql, query, user_id, candidate_limit, top_k)
+            timings.append(time.perf_counter() - start)
+            hits += len(truth & set(found))
+            total += len(truth)
+        recall = hits / total if total else 0.0
+        print(f"  {name:<40} recall@{top_k} {recall:.3f}  {percentiles(timings)}")
+
+    print("\nVector indexes:")
+    for index in await index_manager.list_indexes():
+        print(f"  {index['name']:<55} {index['method']:<8} {index['size_bytes'] / (1024 * 1024):10.1f} MB")
+
+async def main(args):
+    rng = np.random.default_rng(1)
+    centroids = make_centroids(np.random.default_rng(0))
+    try:
+        shortlists = [int(size) for size in args.shortlists.split(",")]
+        await benchmark(args.queries, args.tenants, args.top_k, shortlists, rng, centroids)
+    finally:
+        await async_db_manager.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tenants", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--shortlists", default="50,100,200,400", help="Binary first-pass shortlist sizes")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,192 @@
+"""
+Benchmark semantic search: the legacy filter-then-sort query against the
+index-driven candidate scan in AsyncDatabaseManager.semantic_search.
+
+Usage:
+    python -m scripts.benchmark_search --chunks 1000000 --tenants 1000 --queries 200
+    python -m scripts.benchmark_search --skip-load --queries 500
+    python -m scripts.benchmark_search --cleanup
+
+Loads synthetic clustered embeddings for many tenants into the database
+configured by DATABASE_URL (ids prefixed with "bench-search-"), builds the
+configured vector index, then prints latency percentiles for both query
+shapes, recall@k of the index-driven search against an exact scan, and the
+EXPLAIN ANALYZE plan of each shape for one query so index usage can be
+verified.
+"""
+import argparse
+import asyncio
+import time
+import uuid
+import numpy as np
+from app.config import settings
+from app.models.database import db_manager, initial_candidate_limit, HNSW_MAX_EF_SEARCH
+from app.models.async_database import async_db_manager, SEMANTIC_SEARCH_SQL
+from app.services.index_manager import index_manager, VECTOR_INDEX_NAME
+
+ID_PREFIX = "bench-search-"
+CHUNKS_PER_DOCUMENT = 100
+LOAD_BATCH_SIZE = 10000
+CLUSTERS = 256
+
+# Query shape before the index-driven rewrite, kept here for comparison
+LEGACY_SEARCH_SQL = """
+SELECT
+    dc.id as chunk_id,
+    dc.document_id,
+    dc.content,
+    dc.metadata as chunk_metadata,
+    d.filename,
+    d.metadata as document_metadata,
+    1 - (dc.embedding <=> $1) as similarity_score
+FROM document_chunks dc
+JOIN documents d ON dc.document_id = d.id
+WHERE d.user_id = $2
+AND d.status = 'completed'
+AND 1 - (dc.embedding <=> $1) >= $3
+AND ($4::text[] IS NULL OR d.id = ANY($4::text[]))
+ORDER BY similarity_score DESC
+LIMIT $5
+"""
+
+def make_centroids(rng) -> np.ndarray:
+    centroids = rng.standard_normal((CLUSTERS, settings.embedding_dimension)).astype(np.float32)
+    return centroids / np.linalg.norm(centroids, axis=1, keepdims=True)
+
+def sample_vectors(rng, centroids: np.ndarray, count: int, noise: float = 0.35) -> np.ndarray:
+    """Unit vectors scattered around random cluster centroids"""
+    vectors = centroids[rng.integers(0, CLUSTERS, count)]
+    vectors = vectors + noise * rng.standard_normal(vectors.shape).astype(np.float32) / np.sqrt(vectors.shape[1])
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def load(chunk_count: int, tenant_count: int, rng, centroids: np.ndarray):
+    """Insert completed documents and their chunks for the synthetic tenants"""
+    document_count = max(chunk_count // CHUNKS_PER_DOCUMENT, 1)
+    documents = [
+        (f"{ID_PREFIX}doc-{d}", f"{ID_PREFIX}user-{d % tenant_count}")
+        for d in range(document_count)
+    ]
+
+    with db_manager.get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.executemany(
+                "INSERT INTO documents (id, user_id, filename, file_type, file_url, status) "
+                "VALUES (%s, %s, 'bench.pdf', 'pdf', 'https://example.com/bench.pdf', 'completed') "
+                "ON CONFLICT (id) DO NOTHING",
+                documents
+            )
+
+    content = "lorem ipsum dolor sit amet " * 18
+    start = time.perf_counter()
+    for offset in range(0, chunk_count, LOAD_BATCH_SIZE):
+        size = min(LOAD_BATCH_SIZE, chunk_count - offset)
+        vectors = sample_vectors(rng, centroids, size)
+        rows = []
+        for i in range(size):
+            position = offset + i
+            document_id = documents[(position // CHUNKS_PER_DOCUMENT) % document_count][0]
+            rows.append((
+                str(uuid.uuid4()), document_id, content, position % CHUNKS_PER_DOCUMENT,
+                vectors[i].tolist(), None, {}
+            ))
+        db_manager._insert_chunks_copy(rows)
+        print(f"\rLoaded {offset + size}/{chunk_count} chunks", end="", flush=True)
+    print(f"\nLoad took {time.perf_counter() - start:.0f}s")
+
+    with db_manager.get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("ANALYZE documents; ANALYZE document_chunks")
+
+def cleanup():
+    with db_manager.get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM documents WHERE id LIKE %s", (f"{ID_PREFIX}%",))
+            print(f"Deleted {cur.rowcount} benchmark documents (and their chunks)")
+
+def percentiles(samples: list) -> str:
+    p50, p95, p99 = np.percentile(np.array(samples) * 1000, [50, 95, 99])
+    return f"p50 {p50:7.1f}ms  p95 {p95:7.1f}ms  p99 {p99:7.1f}ms"
+
+async def legacy_search(query, user_id: str, top_k: int, threshold: float) -> list:
+    async with async_db_manager.get_connection() as conn:
+        return [dict(row) for row in await conn.fetch(LEGACY_SEARCH_SQL, query, user_id, threshold, None, top_k)]
+
+async def exact_search(query, user_id: str, top_k: int, threshold: float) -> list:
+    async with async_db_manager.get_connection() as conn:
+        return await async_db_manager._exact_search(conn, query, user_id, None, top_k, threshold)
+
+async def explain(sql: str, *args, ef_search: int = None) -> str:
+    async with async_db_manager.get_connection() as conn:
+        if ef_search:
+            await async_db_manager._apply_search_settings(conn, None, ef_search)
+        rows = await conn.fetch(f"EXPLAIN (ANALYZE, BUFFERS) {sql}", *args)
+        return "\n".join(row[0] for row in rows)
+
+async def benchmark(query_count: int, tenant_count: int, top_k: int, threshold: float, rng, centroids):
+    queries = sample_vectors(rng, centroids, query_count, noise=0.5)
+    users = [f"{ID_PREFIX}user-{rng.integers(0, tenant_count)}" for _ in range(query_count)]
+
+    timings = {"legacy": [], "index-driven": []}
+    recall_hits, recall_total = 0, 0
+    for query, user_id in zip(queries, users):
+        start = time.perf_counter()
+        await legacy_search(query, user_id, top_k, threshold)
+        timings["legacy"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        results = await async_db_manager.semantic_search(query, user_id, top_k=top_k, similarity_threshold=threshold)
+        timings["index-driven"].append(time.perf_counter() - start)
+
+        truth = {row['chunk_id'] for row in await exact_search(query, user_id, top_k, threshold)}
+        recall_hits += len(truth & {row['chunk_id'] for row in results})
+        recall_total += len(truth)
+
+    print(f"\n{query_count} queries, top_k={top_k}, threshold={threshold}")
+    for name, samples in timings.items():
+        print(f"  {name:<13} {percentiles(samples)}")
+    if recall_total:
+        print(f"  recall@{top_k} of index-driven vs exact: {recall_hits / recall_total:.3f}")
+
+    # Plans for one query; the index-driven plan should show an index scan on the vector index
+    candidate_limit = initial_candidate_limit(top_k)
+
+    legacy_plan = await explain(LEGACY_SEARCH_SQL, queries[0], users[0], threshold, None, top_k)
+    new_plan = await explain(
+        SEMANTIC_SEARCH_SQL, queries[0], users[0], threshold, None, candidate_limit, top_k,
+        ef_search=min(candidate_limit, HNSW_MAX_EF_SEARCH)
+    )
+    print("\nLegacy plan:\n" + legacy_plan)
+    print("\nIndex-driven plan (first pass):\n" + new_plan)
+    print(f"\nVector index used by legacy query:       {VECTOR_INDEX_NAME in legacy_plan}")
+    print(f"Vector index used by index-driven query: {VECTOR_INDEX_NAME in new_plan}")
+
+async def main(args):
+    rng = np.random.default_rng(0)
+    centroids = make_centroids(rng)
+
+    try:
+        if args.cleanup:
+            cleanup()
+            return
+
+        if not args.skip_load:
+            load(args.chunks, args.tenants, rng, centroids)
+            print(f"Building {settings.vector_index_type} index...")
+            build = await index_manager.rebuild(settings.vector_index_type)
+            print(f"Index built in {build['duration_seconds']}s with {build['params']}")
+
+        await benchmark(args.queries, args.tenants, args.top_k, args.threshold, rng, centroids)
+    finally:
+        await async_db_manager.close()
+        db_manager.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=1_000_000)
+    parser.add_argument("--tenants", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--threshold", type=float, default=0.3)
+    parser.add_argument("--skip-load", action="store_true", help="Reuse previously loaded benchmark data")
+    parser.add_argument("--cleanup", action="store_true", help="Delete the benchmark data and exit")
+    asyncio.run(main(parser.parse_args()))
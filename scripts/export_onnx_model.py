@@ -0,0 +1,122 @@
+"""
+Export the embedding model for the ONNX embedding backends.
+
+Writes into EMBEDDING_ONNX_DIR (default models/onnx):
+    model.onnx        the transformer graph (fp32), exported from PyTorch
+    model_int8.onnx   the same graph with dynamic int8 weight quantization
+    tokenizer.json    the fast tokenizer shared by every backend
+    manifest.json     model name, pooling settings and verification results
+
+Usage:
+    python -m scripts.export_onnx_model
+    python -m scripts.export_onnx_model --output models/onnx --opset 17
+
+Every exported graph is run through the ONNX backends' tokenization and pooling
+on a set of sample texts and compared with SentenceTransformer.encode (what
+the torch backend runs, and what produced the stored vectors); the export
+fails if the vectors do not match (cosine below --min-cosine for fp32,
+--min-cosine-int8 for int8).
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+import numpy as np
+import torch
+from onnxruntime.quantization import quantize_dynamic, QuantType
+from sentence_transformers import SentenceTransformer
+from app.config import settings
+from app.services.embedding_backends import (
+    OnnxEmbeddingBackend, sentence_transformer_config,
+    ONNX_MODEL_FILE, ONNX_INT8_MODEL_FILE, ONNX_MANIFEST_FILE, TOKENIZER_FILE
+)
+
+SAMPLE_TEXTS = [
+    "What is the deadline for the final project submission?",
+    "Photosynthesis converts light energy into chemical energy stored in glucose.",
+    "The mitochondria is the powerhouse of the cell.",
+    "Summarize chapter three of the lecture notes on linear algebra.",
+    "Eigenvalues of a symmetric matrix are always real, and its eigenvectors can be chosen orthonormal.",
+    "Kısa bir Türkçe cümle.",
+    "a",
+    " ".join(["Long inputs are truncated to the model's maximum sequence length."] * 60)
+]
+
+def export_graph(sentence_model, output_path: Path, opset: int):
+    """torch.onnx.export of the transformer with dynamic batch and sequence axes"""
+    transformer = sentence_model[0].auto_model.eval()
+    encoded = sentence_model.tokenizer(SAMPLE_TEXTS[:2], padding=True, return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in encoded]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["token_embeddings"] = {0: "batch", 1: "sequence"}
+
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(encoded[name] for name in input_names),
+            str(output_path),
+            input_names=input_names,
+            output_names=["token_embeddings"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+            do_constant_folding=True
+        )
+
+def compare(reference: np.ndarray, candidate: np.ndarray) -> dict:
+    """Per-text cosine and element-wise difference between two embedding sets"""
+    cosines = (reference * candidate).sum(axis=1) / (
+        np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1)
+    )
+    return {
+        "min_cosine": float(cosines.min()),
+        "mean_cosine": float(cosines.mean()),
+        "max_abs_diff": float(np.abs(reference - candidate).max())
+    }
+
+def main(args) -> int:
+    output = Path(args.output)
+    output.mkdir(parents=True, exist_ok=True)
+    model_name = settings.embedding_model_name
+
+    print(f"Exporting {model_name} to {output}")
+    sentence_model = SentenceTransformer(model_name, device="cpu")
+    config = sentence_transformer_config(sentence_model)
+
+    export_graph(sentence_model, output / ONNX_MODEL_FILE, args.opset)
+    quantize_dynamic(
+        str(output / ONNX_MODEL_FILE),
+        str(output / ONNX_INT8_MODEL_FILE),
+        weight_type=QuantType.QInt8
+    )
+    sentence_model.tokenizer.backend_tokenizer.save(str(output / TOKENIZER_FILE))
+
+    manifest = {"model_name": model_name, **config, "opset": args.opset, "verification": {}}
+    (output / ONNX_MANIFEST_FILE).write_text(json.dumps(manifest, indent=2))
+
+    # Verify each graph, through the backends' own tokenizer and pooling, against
+    # SentenceTransformer.encode itself (the torch backend and the stored vectors)
+    reference = sentence_model.encode(SAMPLE_TEXTS, convert_to_numpy=True)
+    thresholds = {"onnx": args.min_cosine, "onnx-int8": args.min_cosine_int8}
+    failed = False
+    for quantized in (False, True):
+        backend = OnnxEmbeddingBackend(output, model_name, quantized=quantized)
+        result = compare(reference, backend.encode(SAMPLE_TEXTS))
+        manifest["verification"][backend.name] = result
+        passed = result["min_cosine"] >= thresholds[backend.name]
+        failed = failed or not passed
+        print(f"  {backend.name:<10} min cosine {result['min_cosine']:.6f}  "
+              f"max abs diff {result['max_abs_diff']:.6f}  {'ok' if passed else 'FAILED'}")
+
+    (output / ONNX_MANIFEST_FILE).write_text(json.dumps(manifest, indent=2))
+    if failed:
+        print("Exported vectors do not match SentenceTransformer.encode; do not deploy this export")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default=settings.embedding_onnx_dir)
+    parser.add_argument("--opset", type=int, default=17)
+    parser.add_argument("--min-cosine", type=float, default=0.9999)
+    parser.add_argument("--min-cosine-int8", type=float, default=0.99)
+    sys.exit(main(parser.parse_args()))